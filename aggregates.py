@@ -0,0 +1,59 @@
+import math
+import threading
+
+
+class ExpenseAggregates:
+    """Running per-category and grand totals
+
+    Every append updates the counters in O(1), so readers never have to
+    re-sum the raw expense lists. Department and other hierarchy spending
+    comes from periods.PeriodRollups.
+    """
+
+    def __init__(self, categories=()):
+        self._lock = threading.Lock()
+        self.category_totals = {category: 0.0 for category in categories}
+        self.grand_total = 0.0
+
+    def add_category(self, category):
+        """Start counting a category that appeared after construction (at zero)"""
+        with self._lock:
+            self.category_totals.setdefault(category, 0.0)
+
+    def add(self, category, amount):
+        """Add an expense (or a pre-summed total of several) to the counters"""
+        with self._lock:
+            self.category_totals[category] = self.category_totals.get(category, 0.0) + amount
+            self.grand_total += amount
+
+    def totals(self):
+        """Return a copy of {category: total}"""
+        with self._lock:
+            return dict(self.category_totals)
+
+    def rebuild(self, categories_data):
+        """Recompute every counter from the raw {category: [amounts]} data"""
+        with self._lock:
+            self.category_totals = {}
+            self.grand_total = 0.0
+            for category, expenses in categories_data.items():
+                total = math.fsum(expenses)
+                self.category_totals[category] = total
+                self.grand_total += total
+
+    def is_consistent(self, categories_data, rel_tol=1e-9, abs_tol=0.005):
+        """Check the running totals against the raw data (tolerating float drift)"""
+        with self._lock:
+            for category, expenses in categories_data.items():
+                if not math.isclose(self.category_totals.get(category, 0.0), math.fsum(expenses),
+                                    rel_tol=rel_tol, abs_tol=abs_tol):
+                    return False
+            grand_total = math.fsum(math.fsum(expenses) for expenses in categories_data.values())
+            return math.isclose(self.grand_total, grand_total, rel_tol=rel_tol, abs_tol=abs_tol)
+
+    def verify(self, categories_data):
+        """Rebuild the counters if they drifted from the raw data; returns True if they were consistent"""
+        if self.is_consistent(categories_data):
+            return True
+        self.rebuild(categories_data)
+        return False
@@ -0,0 +1,174 @@
+import json
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from insights_cache import InsightsCache, make_key
+
+# Completions endpoint (override with GROQ_API_URL, e.g. to point at a local stand-in server)
+DEFAULT_API_URL = "https://api.groq.com/v1/completions"
+
+# Hard limit for one insights request, including every retry
+DEFAULT_DEADLINE = 60.0
+CONNECT_TIMEOUT = 5.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Bump whenever build_insights_prompt changes so cached answers are not reused
+PROMPT_VERSION = 1
+
+MODEL_PARAMS = {
+    "max_tokens": 1000,
+    "temperature": 0.7
+}
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+
+
+class InsightsError(Exception):
+    """Raised when the completions API cannot produce insights"""
+
+
+class InsightsCancelled(InsightsError):
+    """Raised when the caller cancels a request in flight"""
+
+
+def get_session():
+    """Return the shared, connection-pooled HTTP session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_cache():
+    """Return the persistent insights cache"""
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = InsightsCache()
+        return _cache
+
+
+def cache_key(expense_data):
+    """Key for the insights of one expense snapshot under the current prompt and model"""
+    return make_key(expense_data, PROMPT_VERSION, {"url": os.getenv("GROQ_API_URL", DEFAULT_API_URL), **model_params()})
+
+
+def build_insights_prompt(expense_data):
+    return f"""Analyze this company expense data and provide insights and recommendations:
+
+        Expense Breakdown:
+        {json.dumps(expense_data, indent=2)}
+
+        Total Expenses: ₹{sum(expense_data.values()):.2f}
+
+        Please provide:
+        1. Key observations about spending patterns
+        2. Potential areas for cost optimization
+        3. Recommendations for budget allocation
+        4. Any unusual spending patterns to investigate
+
+        Respond in clear, actionable bullet points suitable for a business manager."""
+
+
+def model_params():
+    """Return the completion parameters sent with every request"""
+    params = dict(MODEL_PARAMS)
+    if os.getenv("GROQ_MODEL"):
+        params["model"] = os.getenv("GROQ_MODEL")
+    return params
+
+
+def _chunk_text(chunk):
+    """Pull the generated text out of a completions or chat-completions chunk"""
+    choice = chunk.get("choices", [{}])[0]
+    if "text" in choice:
+        return choice["text"] or ""
+    delta = choice.get("delta") or choice.get("message") or {}
+    return delta.get("content") or ""
+
+
+def _stream_response(response, on_token, deadline, cancel):
+    """Feed tokens from a server-sent-events (or plain JSON) response to on_token"""
+    if "text/event-stream" not in response.headers.get("Content-Type", ""):
+        text = _chunk_text(response.json())
+        on_token(text)
+        return text
+
+    parts = []
+    for line in response.iter_lines(decode_unicode=True):
+        if cancel is not None and cancel.is_set():
+            raise InsightsCancelled("Request cancelled")
+        if time.monotonic() > deadline:
+            raise InsightsError("AI insights timed out")
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        token = _chunk_text(json.loads(data))
+        if token:
+            parts.append(token)
+            on_token(token)
+    return "".join(parts)
+
+
+def stream_completion(prompt, on_token, api_key=None, deadline=DEFAULT_DEADLINE,
+                      max_retries=MAX_RETRIES, cancel=None):
+    """Stream a completion, calling on_token(text) for each piece as it arrives
+
+    Connection errors, timeouts and 429/5xx responses are retried with
+    exponential backoff and jitter, but only until the first token has been
+    delivered and never past the overall deadline (seconds). Returns the full
+    text.
+    """
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise InsightsError("Groq API key not found in environment variables")
+
+    url = os.getenv("GROQ_API_URL", DEFAULT_API_URL)
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream"
+    }
+    payload = {"prompt": prompt, "stream": True, **model_params()}
+
+    end = time.monotonic() + deadline
+    delivered = []
+
+    def track(token):
+        delivered.append(token)
+        on_token(token)
+
+    for attempt in range(max_retries + 1):
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise InsightsError("AI insights timed out")
+        try:
+            with get_session().post(url, headers=headers, json=payload, stream=True,
+                                    timeout=(min(CONNECT_TIMEOUT, remaining), remaining)) as response:
+                if response.status_code in RETRY_STATUSES and attempt < max_retries:
+                    raise InsightsError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                return _stream_response(response, track, end, cancel)
+        except (requests.ConnectionError, requests.Timeout, InsightsError) as e:
+            if isinstance(e, InsightsCancelled) or delivered or attempt == max_retries:
+                raise
+            delay = BACKOFF_BASE * (2 ** attempt) * (1 + random.random() * 0.1)
+            if time.monotonic() + delay >= end:
+                raise InsightsError(f"AI insights timed out after {attempt + 1} attempts: {e}")
+            if cancel is not None and cancel.wait(delay):
+                raise InsightsCancelled("Request cancelled")
+            if cancel is None:
+                time.sleep(delay)
@@ -0,0 +1,75 @@
+"""Measure the per-image overhead of the subprocess OCR path versus the warm engine pool
+
+Usage:
+    python benchmarks/bench_ocr_engines.py [--count N] [--repeat R]
+
+A tiny blank image isolates fixed per-call cost (process start-up and model
+load); synthetic receipts show the effect on a realistic bill. The pooled
+backend needs the optional tesserocr package.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+import ocr  # noqa: F401  (sets the tesseract executable path)
+from ocr_engines import SubprocessEngine, TesserocrEngine, tesserocr
+from preprocess import preprocess
+from bench_preprocess import make_synthetic_receipts
+
+
+def time_calls(engine, images, repeat):
+    """Return the median seconds per image_to_string call"""
+    samples = []
+    for _ in range(repeat):
+        for img in images:
+            start = time.perf_counter()
+            engine.image_to_string(img)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5, help="synthetic receipts to OCR")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the image set")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="receipts_")
+    names = make_synthetic_receipts(folder, args.count)
+    receipts = []
+    for name in names:
+        with Image.open(os.path.join(folder, name)) as img:
+            receipts.append(preprocess(img))
+    blank = [Image.new("L", (64, 32), 255)]
+
+    backends = [("subprocess", SubprocessEngine())]
+    if tesserocr is not None:
+        start = time.perf_counter()
+        engine = TesserocrEngine()
+        print(f"tesserocr engine start-up (paid once per pool slot): {(time.perf_counter() - start) * 1000:.1f} ms")
+        backends.append(("tesserocr pool", engine))
+    else:
+        print("tesserocr is not installed; only the subprocess backend is measured")
+
+    print(f"{'backend':<18}{'blank ms':>12}{'receipt ms':>14}")
+    results = {}
+    for label, engine in backends:
+        results[label] = (time_calls(engine, blank, args.repeat * 5), time_calls(engine, receipts, args.repeat))
+        print(f"{label:<18}{results[label][0] * 1000:>12.1f}{results[label][1] * 1000:>14.1f}")
+
+    if len(results) == 2:
+        saved_blank = results["subprocess"][0] - results["tesserocr pool"][0]
+        saved_receipt = results["subprocess"][1] - results["tesserocr pool"][1]
+        print(f"overhead saved per image: {saved_blank * 1000:.1f} ms (blank), {saved_receipt * 1000:.1f} ms (receipt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare OCR latency and TOTAL extraction accuracy with and without each preprocessing stage
+
+Usage:
+    python benchmarks/bench_preprocess.py [fixture_dir] [--count N] [--mode full|roi]
+
+fixture_dir must contain the receipt images plus an expected.csv with
+"file,total" rows. Without it, synthetic 12 MP phone-style receipts are
+generated into a temporary folder.
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+import ocr
+from preprocess import ALL_STAGES
+
+
+def make_synthetic_receipts(folder, count, seed=42):
+    """Render skewed, noisy 4000x3000 receipt photos with a known TOTAL"""
+    rng = random.Random(seed)
+    try:
+        font = ImageFont.truetype("DejaVuSansMono.ttf", 28)
+    except OSError:
+        font = ImageFont.load_default()
+
+    expected = {}
+    for i in range(count):
+        receipt = Image.new("L", (700, 900), 250)
+        draw = ImageDraw.Draw(receipt)
+        y = 30
+        subtotal = 0.0
+        for line in range(rng.randint(5, 10)):
+            price = round(rng.uniform(10, 900), 2)
+            subtotal += price
+            draw.text((30, y), f"ITEM{rng.randint(1000, 9999)}  {price:>10.2f}", fill=20, font=font)
+            y += 45
+        tax = round(subtotal * 0.18, 2)
+        total = round(subtotal + tax, 2)
+        draw.text((30, y + 20), f"SUBTOTAL  {subtotal:>10.2f}", fill=20, font=font)
+        draw.text((30, y + 65), f"TAX       {tax:>10.2f}", fill=20, font=font)
+        draw.text((30, y + 110), f"TOTAL     {total:>10.2f}", fill=0, font=font)
+
+        # Photograph it: tilt, place on a darker table, upscale to 12 MP, blur
+        receipt = receipt.rotate(rng.uniform(-4, 4), expand=True, fillcolor=250)
+        photo = Image.new("RGB", (1400, 1050), (90, 80, 70))
+        photo.paste(receipt.convert("RGB"), (rng.randint(50, 600), rng.randint(20, 100)))
+        photo = photo.resize((4000, 3000), Image.Resampling.BICUBIC).filter(ImageFilter.GaussianBlur(1.2))
+
+        name = f"receipt_{i:03d}.jpg"
+        photo.save(os.path.join(folder, name), quality=90)
+        expected[name] = total
+    return expected
+
+
+def load_fixtures(folder):
+    with open(os.path.join(folder, "expected.csv"), newline="", encoding="utf-8") as f:
+        return {row["file"]: float(row["total"]) for row in csv.DictReader(f)}
+
+
+def run_variant(folder, expected, stages, mode):
+    """Return (mean seconds per image, accuracy) for one set of stages"""
+    elapsed = 0.0
+    correct = 0
+    for name, total in expected.items():
+        with Image.open(os.path.join(folder, name)) as img:
+            img.load()
+            start = time.perf_counter()
+            text = ocr.run_ocr(img, stages=stages, mode=mode)
+            elapsed += time.perf_counter() - start
+        amounts = ocr.extract_total_amounts(text)
+        if amounts and abs(max(amounts) - total) < 0.01:
+            correct += 1
+    return elapsed / len(expected), correct / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture_dir", nargs="?")
+    parser.add_argument("--count", type=int, default=10, help="synthetic receipts to generate")
+    parser.add_argument("--mode", choices=("full", "roi"), default="full", help="OCR mode to benchmark")
+    args = parser.parse_args()
+
+    if args.fixture_dir:
+        folder = args.fixture_dir
+        expected = load_fixtures(folder)
+    else:
+        folder = tempfile.mkdtemp(prefix="receipts_")
+        expected = make_synthetic_receipts(folder, args.count)
+
+    variants = [("none", ()), ("all", ALL_STAGES)]
+    variants += [(f"all - {stage}", tuple(s for s in ALL_STAGES if s != stage)) for stage in ALL_STAGES]
+    variants += [(f"only {stage}", (stage,)) for stage in ALL_STAGES]
+
+    print(f"{len(expected)} receipts from {folder} ({args.mode} OCR)")
+    print(f"{'variant':<20}{'ms/image':>12}{'accuracy':>12}")
+    for label, stages in variants:
+        seconds, accuracy = run_variant(folder, expected, stages, args.mode)
+        print(f"{label:<20}{seconds * 1000:>12.1f}{accuracy:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
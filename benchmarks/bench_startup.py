@@ -0,0 +1,80 @@
+"""Measure start-up time and fail if it regresses past a budget
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS] [--max-first-frame-ms MS]
+
+Each run starts a fresh interpreter, imports project.py and builds the main
+window against a throwaway ledger. It reports the time until `import project`
+returns and until the first frame of root.mainloop has been drawn. The
+script exits with status 1 when the median of either figure exceeds its
+budget. The first-frame figure needs a display.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import project
+imported = time.perf_counter()
+
+def first_frame(self, n=0):
+    # Stand-in for mainloop: draw one frame, report, and exit
+    self.update()
+    print(json.dumps({"import": imported - start, "first_frame": time.perf_counter() - start}))
+    self.destroy()
+
+project.tk.Tk.mainloop = first_frame
+if sys.argv[2] == "1":
+    project.main_window()
+else:
+    print(json.dumps({"import": imported - start, "first_frame": None}))
+"""
+
+
+def run_once(with_window):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, EXPENSE_DB_PATH=os.path.join(tmp, "expenses.db"))
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, ROOT, "1" if with_window else "0"],
+            check=True, capture_output=True, text=True, env=env
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=250.0)
+    parser.add_argument("--max-first-frame-ms", type=float, default=1500.0)
+    parser.add_argument("--no-window", action="store_true", help="only measure the import (no display needed)")
+    args = parser.parse_args()
+
+    with_window = not args.no_window and (sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY")))
+    runs = [run_once(with_window) for _ in range(args.runs)]
+    import_ms = statistics.median(run["import"] for run in runs) * 1000
+    print(f"import project:  {import_ms:8.1f} ms (budget {args.max_import_ms:.0f} ms)")
+
+    failed = import_ms > args.max_import_ms
+    if with_window:
+        frame_ms = statistics.median(run["first_frame"] for run in runs) * 1000
+        print(f"first frame:     {frame_ms:8.1f} ms (budget {args.max_first_frame_ms:.0f} ms)")
+        failed = failed or frame_ms > args.max_first_frame_ms
+    else:
+        print("first frame:     skipped (no display)")
+
+    if failed:
+        print("Start-up budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Measure voice intent parsing latency and accuracy over a generated utterance corpus
+
+Usage:
+    python benchmarks/bench_voice_intents.py [--count N] [--seed S]
+
+The corpus mixes digit and spoken amounts (with decimals), multi-word
+categories and synonyms, batch utterances joined with "and", plain commands
+and unrecognisable noise, so every utterance has a known expected result.
+The single-item regex matcher the parser replaced is timed on the same
+corpus for reference.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from expense_core import categories_data
+from voice_grammar import CATEGORY_SYNONYMS
+from voice_intents import COMMAND_ACTIONS, IntentParser
+
+ONES = ("zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+        "fifteen sixteen seventeen eighteen nineteen").split()
+TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+
+
+def spoken(number):
+    """Indian-style words for a whole number below one crore"""
+    parts = []
+    for scale, name in ((100000, "lakh"), (1000, "thousand"), (100, "hundred")):
+        if number >= scale:
+            parts += [spoken(number // scale), name]
+            number %= scale
+    if number >= 20:
+        parts.append(TENS[number // 10])
+        number %= 10
+        if number:
+            parts.append(ONES[number])
+    elif number or not parts:
+        parts.append(ONES[number])
+    return " ".join(parts)
+
+
+def make_item(rng, categories):
+    category = rng.choice(categories)
+    names = [category.lower()] + list(CATEGORY_SYNONYMS.get(category, ()))
+    rupees = rng.randint(1, 250000)
+    paise = rng.choice((0, 0, 0, 5, 50, 25))
+    if rng.random() < 0.5:
+        amount_text = f"{rupees:,}" if rupees >= 1000 and rng.random() < 0.5 else str(rupees)
+        if paise:
+            amount_text += f".{paise:02d}"
+    else:
+        amount_text = spoken(rupees)
+        if paise:
+            amount_text += " point " + " ".join(ONES[int(d)] for d in f"{paise:02d}".rstrip("0"))
+    filler = rng.choice(("for", "for", "to", "rupees for", "on"))
+    return f"{amount_text} {filler} {rng.choice(names)}", ("add", category, rupees + paise / 100)
+
+
+def make_corpus(count, seed):
+    rng = random.Random(seed)
+    categories = list(categories_data.keys())
+    corpus = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.7:
+            items = [make_item(rng, categories) for _ in range(rng.choice((1, 1, 1, 2, 3)))]
+            text = "add " + " and ".join(item_text for item_text, _ in items)
+            corpus.append((text, [expected for _, expected in items]))
+        elif kind < 0.9:
+            phrase = rng.choice(list(COMMAND_ACTIONS))
+            corpus.append((rng.choice(("", "please ", "can you ")) + phrase, [("command", COMMAND_ACTIONS[phrase])]))
+        else:
+            corpus.append((rng.choice(("what is the weather", "hello there", "open the window")), []))
+    return corpus
+
+
+def legacy_parse(command, categories):
+    """The previous matcher: one "add <digits> for <word>" and a linear prefix scan"""
+    match = re.search(r"add (\d+) for (\w+)", command.lower())
+    if not match:
+        return []
+    for category in categories:
+        if category.lower().startswith(match.group(2)):
+            return [("add", category, float(match.group(1)))]
+    return []
+
+
+def time_parser(parse, corpus):
+    samples = []
+    results = []
+    for text, _ in corpus:
+        start = time.perf_counter()
+        result = parse(text)
+        samples.append(time.perf_counter() - start)
+        results.append(result)
+    return samples, results
+
+
+def accuracy(results, corpus):
+    correct = 0
+    for result, (_, expected) in zip(results, corpus):
+        got = [(r[0], r[1], round(r[2], 2)) if r[0] == "add" else r for r in result]
+        want = [(e[0], e[1], round(e[2], 2)) if e[0] == "add" else e for e in expected]
+        correct += got == want
+    return correct / len(corpus)
+
+
+def report(name, samples, acc):
+    samples = sorted(samples)
+    total = sum(samples)
+    p99 = samples[int(len(samples) * 0.99)]
+    print(f"{name:<14} {len(samples) / total:>12,.0f} utt/s  p50 {statistics.median(samples) * 1e6:6.1f} us  "
+          f"p99 {p99 * 1e6:6.1f} us  accuracy {acc:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count, args.seed)
+    categories = list(categories_data.keys())
+
+    start = time.perf_counter()
+    intent_parser = IntentParser(categories)
+    print(f"compile:       {(time.perf_counter() - start) * 1000:.2f} ms for {len(categories)} categories")
+
+    samples, results = time_parser(intent_parser.parse, corpus)
+    report("intent parser", samples, accuracy(results, corpus))
+    samples, results = time_parser(lambda text: legacy_parse(text, categories), corpus)
+    report("legacy regex", samples, accuracy(results, corpus))
+
+
+if __name__ == "__main__":
+    main()
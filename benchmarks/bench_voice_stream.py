@@ -0,0 +1,115 @@
+"""Replay recorded voice commands and measure the time to first action
+
+Usage:
+    python benchmarks/bench_voice_stream.py command.wav [more.wav ...] [--backend vosk]
+
+Each recording is played through the streaming pipeline (VAD segmentation,
+incremental decoding, intent parsing) and through the previous one
+(1 s ambient-noise calibration, then recognizer.listen with a 0.8 s pause
+threshold and whole-phrase recognition). Audio is replayed faster than real
+time on a simulated clock: an action's time is the audio consumed before the
+pipeline could act plus the wall-clock time spent recognising and parsing,
+i.e. when it would have happened with a live microphone. Recordings should
+start with a little room noise, as they would from the microphone.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+import speech_backends
+from expense_core import categories_data
+from voice_intents import IntentParser
+from voice_stream import StreamingListener
+
+
+def streaming_first_action(path, backend, parser):
+    """(seconds to first action, seconds from end of speech to it, transcript) or None"""
+    found = []
+    frame_started = 0.0
+
+    def on_final(text, utterance, heard_at):
+        intents = parser.parse(text) if text and not found else []
+        if intents:
+            # Earlier frames were processed while later audio was still arriving;
+            # only the work on the frame that closed the utterance delays the action
+            found.append((utterance, text, time.perf_counter() - frame_started))
+
+    with sr.AudioFile(path) as source:
+        listener = StreamingListener(backend, source.SAMPLE_RATE, source.SAMPLE_WIDTH, on_final)
+        while not found:
+            chunk = source.stream.read(listener.frame_samples)
+            frame_started = time.perf_counter()
+            if not chunk:
+                listener.flush()
+                break
+            listener.feed(chunk)
+    if not found:
+        return None
+    utterance, text, compute = found[0]
+    return utterance.end + compute, utterance.end - utterance.speech_end + compute, text
+
+
+def legacy_first_action(path, backend, parser, calibrate=True):
+    """The same for the previous listen()/recognize() loop"""
+    recognizer = sr.Recognizer()
+    compute = 0.0
+    with sr.AudioFile(path) as source:
+        if calibrate:
+            recognizer.adjust_for_ambient_noise(source)
+        while source.audio_reader.tell() < source.FRAME_COUNT:
+            start = time.perf_counter()
+            audio = recognizer.listen(source, phrase_time_limit=5)
+            text = backend.recognize(audio) if audio.frame_data else None
+            intents = parser.parse(text) if text else []
+            compute += time.perf_counter() - start
+            if intents:
+                return source.audio_reader.tell() / source.SAMPLE_RATE + compute, text
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="recorded commands (WAV/AIFF/FLAC)")
+    parser.add_argument("--backend", choices=("vosk", "sphinx", "google"),
+                        help="speech backend (default: VOICE_BACKEND or the best available)")
+    parser.add_argument("--no-calibrate", action="store_true",
+                        help="skip the previous pipeline's 1 s calibration (it used it on the microphone only)")
+    args = parser.parse_args()
+
+    categories = list(categories_data.keys())
+    backend = speech_backends.create_backend(categories, args.backend)
+    intent_parser = IntentParser(categories)
+    print(f"backend: {backend.name}")
+
+    streaming, legacy, after_speech = [], [], []
+    for path in args.paths:
+        new = streaming_first_action(path, backend, intent_parser)
+        old = legacy_first_action(path, backend, intent_parser, not args.no_calibrate)
+        name = os.path.basename(path)
+        if new:
+            streaming.append(new[0])
+            after_speech.append(new[1])
+            print(f"{name:<24} streaming {new[0]:6.2f} s ({new[1]:.2f} s after speech)  {new[2]!r}")
+        else:
+            print(f"{name:<24} streaming      - no action")
+        if old:
+            legacy.append(old[0])
+            print(f"{'':<24} previous  {old[0]:6.2f} s  {old[1]!r}")
+        else:
+            print(f"{'':<24} previous       - no action")
+
+    if streaming:
+        print(f"streaming: median {statistics.median(streaming):.2f} s to first action, "
+              f"{statistics.median(after_speech):.2f} s after end of speech ({len(streaming)}/{len(args.paths)} files)")
+    if legacy:
+        print(f"previous:  median {statistics.median(legacy):.2f} s to first action ({len(legacy)}/{len(args.paths)} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import json
+import os
+from datetime import date
+from periods import PERIODS, period_key
+
+# Budget rules file (override with EXPENSE_BUDGET_RULES_PATH)
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budget_rules.json")
+
+# Percentages of a budget at which an alert fires
+DEFAULT_TIERS = (80, 100, 120)
+
+LEVELS = ("company", "division", "department", "category")
+
+# Budgets are per calendar month unless a rule says otherwise
+DEFAULT_PERIOD = "month"
+PERIOD_ADJECTIVES = {"day": "daily", "week": "weekly", "month": "monthly", "quarter": "quarterly", "year": "yearly"}
+
+
+class BudgetRule:
+    """A budget per period on one node of the cost-center hierarchy, with its alert tiers (percent)"""
+
+    __slots__ = ("key", "level", "name", "node", "budget", "tiers", "period")
+
+    def __init__(self, level, name, node, budget, tiers=DEFAULT_TIERS, period=DEFAULT_PERIOD):
+        if period not in PERIODS:
+            raise ValueError(f"Unknown budget period {period!r} (expected one of {', '.join(PERIODS)})")
+        self.key = f"{level}:{name}"
+        self.level = level
+        self.name = name
+        self.node = node
+        self.budget = float(budget)
+        self.tiers = tuple(sorted(float(tier) for tier in tiers))
+        self.period = period
+
+    def tier_for(self, spent):
+        """Highest tier reached by spent, or 0.0 below the first"""
+        if self.budget <= 0:
+            return self.tiers[-1] if spent > 0 else 0.0
+        used = spent / self.budget * 100
+        reached = 0.0
+        for tier in self.tiers:
+            if used >= tier:
+                reached = tier
+        return reached
+
+    def message(self, spent, bucket):
+        adjective = PERIOD_ADJECTIVES[self.period]
+        if self.level == "company":
+            if spent > self.budget:
+                return f"Company-wide budget overrun: ₹{spent - self.budget:,.2f} over {adjective} budget ({bucket})"
+            label = "Company-wide spending"
+        else:
+            label = self.name if self.level == "department" else f"{self.name} ({self.level})"
+            if spent > self.budget:
+                return f"Budget overrun in {label}: ₹{spent - self.budget:,.2f} over {adjective} budget ({bucket})"
+        used = spent / self.budget * 100 if self.budget else 0.0
+        return f"{label} has used {used:.0f}% of its {adjective} budget of ₹{self.budget:,.2f} ({bucket})"
+
+
+class BudgetRuleEngine:
+    """Evaluates budget rules incrementally against period rollups
+
+    Rules are indexed by hierarchy node, so after a batch only the rules on
+    the changed categories' ancestor paths are looked at. Each rule
+    remembers, per period bucket, the highest tier it has alerted on; an
+    alert fires when a higher tier is reached (once, for the highest one),
+    a new month (or quarter...) starts from scratch, and the rule re-arms if
+    a raised budget takes it back below a tier. Once a rule has moved on to
+    a new bucket, what it remembered about earlier ones is dropped.
+    """
+
+    def __init__(self, rules, state=None):
+        self.rules = {rule.key: rule for rule in rules}
+        self.by_node = {}
+        for rule in rules:
+            self.by_node.setdefault(rule.node, []).append(rule)
+        self.state = dict(state or {})  # "rule key@bucket" -> highest tier alerted
+        self.active = {}  # rule key -> (tier, message) for rules at or past a tier in the current bucket
+        self.buckets = {}  # rule key -> bucket whose earlier state has been dropped
+
+    def evaluate(self, rollups, nodes=None, today=None):
+        """Re-check the rules on the given nodes (all rules if None) against a periods.PeriodRollups
+
+        Returns (fired, cleared): fired is a list of ("rule key@bucket", tier,
+        spent, budget, message) for new tier crossings; cleared lists the
+        state keys that fell back below their alerted tier or belong to a
+        bucket that has ended, so their stored state must be updated.
+        """
+        today = today or date.today()
+        rules = self.rules.values() if nodes is None else [
+            rule for node in nodes for rule in self.by_node.get(node, ())
+        ]
+        buckets = {}
+        fired, cleared = [], []
+        for rule in rules:
+            bucket = buckets.get(rule.period)
+            if bucket is None:
+                bucket = buckets[rule.period] = period_key(rule.period, today)
+            if self.buckets.get(rule.key) != bucket:
+                cleared.extend(self._expire(rule, bucket))
+            spent = rollups.total(rule.period, bucket, rule.node)
+            tier = rule.tier_for(spent)
+            state_key = f"{rule.key}@{bucket}"
+            alerted = self.state.get(state_key, 0.0)
+            if tier > alerted:
+                fired.append((state_key, tier, spent, rule.budget, rule.message(spent, bucket)))
+                self.state[state_key] = tier
+            elif tier < alerted:
+                cleared.append(state_key)
+                if tier:
+                    self.state[state_key] = tier
+                else:
+                    del self.state[state_key]
+            if tier:
+                self.active[rule.key] = (tier, rule.message(spent, bucket))
+            else:
+                self.active.pop(rule.key, None)
+        return fired, cleared
+
+    def _expire(self, rule, bucket):
+        """Forget the rule's state for buckets before this one; returns the dropped keys"""
+        self.buckets[rule.key] = bucket
+        expired = []
+        for state_key in list(self.state):
+            key, _, state_bucket = state_key.rpartition("@")
+            if key == rule.key and state_bucket < bucket:
+                del self.state[state_key]
+                expired.append(state_key)
+        return expired
+
+    def alerts(self):
+        """Current alert messages, most severe first"""
+        return [message for _, message in sorted(self.active.values(), key=lambda alert: -alert[0])]
+
+
+def build_rules(hierarchy, company_budget, config=None):
+    """Monthly rules for every department with a budget and the company, plus any in config
+
+    config is {"tiers": [...], "rules": [{"department": name, "budget": n, "tiers": [...], "period": "quarter"}, ...]};
+    a rule names exactly one of company/division/department/category, and
+    replaces the default rule for the same node.
+    """
+    config = config or {}
+    tiers = config.get("tiers", DEFAULT_TIERS)
+    rules = {("company", hierarchy.names[hierarchy.root]): BudgetRule(
+        "company", hierarchy.names[hierarchy.root], hierarchy.root, company_budget, tiers)}
+    for department, budget in hierarchy.departments().items():
+        if budget:
+            rules[("department", department)] = BudgetRule(
+                "department", department, hierarchy.node("department", department), budget, tiers)
+
+    for spec in config.get("rules", ()):
+        levels = [level for level in LEVELS if level in spec]
+        if len(levels) != 1 or "budget" not in spec:
+            raise ValueError(f"Budget rule needs a budget and one of {', '.join(LEVELS)}: {spec}")
+        level = levels[0]
+        name = hierarchy.names[hierarchy.root] if level == "company" else spec[level]
+        try:
+            node = hierarchy.root if level == "company" else hierarchy.node(level, name)
+        except KeyError:
+            raise ValueError(f"Budget rule for unknown {level} {name!r}") from None
+        rules[(level, name)] = BudgetRule(level, name, node, spec["budget"], spec.get("tiers", tiers),
+                                          spec.get("period", DEFAULT_PERIOD))
+    return list(rules.values())
+
+
+def load_rules_config(path=None):
+    """Read EXPENSE_BUDGET_RULES_PATH (default budget_rules.json); {} if it doesn't exist"""
+    path = path or os.getenv("EXPENSE_BUDGET_RULES_PATH", DEFAULT_RULES_PATH)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}") from e
+
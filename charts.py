@@ -0,0 +1,131 @@
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+from matplotlib import cm
+from matplotlib.figure import Figure
+
+# Rendered PNGs keyed by totals snapshot + dpi, so re-exporting unchanged data is free
+PNG_CACHE_SIZE = 16
+_png_cache = OrderedDict()
+_png_cache_lock = threading.Lock()
+
+START_ANGLE = 140
+LABEL_DISTANCE = 1.1
+PCT_DISTANCE = 0.6
+
+
+def snapshot_key(totals, *extra):
+    """Stable hash of a {category: amount} snapshot (amounts rounded to paise)"""
+    digest = hashlib.sha256()
+    for category, amount in totals.items():
+        digest.update(f"{category}\0{amount:.2f}\0".encode("utf-8"))
+    for value in extra:
+        digest.update(f"{value}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _autopct_text(percent, shown_total):
+    return f'{percent:.1f}%\n(₹{percent * shown_total / 100:.2f})' if percent > 1 else ''
+
+
+class PieChart:
+    """Expenditure pie owned by one chart window
+
+    The Figure is created directly (not through pyplot), so it never enters
+    pyplot's global registry; update() moves the existing wedges and labels
+    instead of building a new figure.
+    """
+
+    def __init__(self, title='Company Expenditure Distribution', figsize=(8, 6)):
+        self.title = title
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot(111)
+        self.categories = None
+        self.wedges, self.texts, self.autotexts = [], [], []
+        self.totals = {}
+
+    def update(self, totals):
+        """Show new totals, redrawing from scratch only if the categories changed"""
+        self.totals = dict(totals)
+        if list(totals.keys()) != self.categories:
+            self._draw()
+        else:
+            self._move_wedges()
+
+    def _shown_amounts(self):
+        # Create small slices for zero values so all categories appear
+        return [v if v > 0 else 0.1 for v in self.totals.values()]
+
+    def _draw(self):
+        self.ax.clear()
+        self.categories = list(self.totals.keys())
+        amounts = self._shown_amounts()
+        shown_total = sum(amounts)
+
+        # Create a colorful palette
+        colors = cm.tab20c(range(len(self.categories)))
+        self.wedges, self.texts, self.autotexts = self.ax.pie(
+            amounts,
+            labels=self.categories,
+            autopct=lambda p: _autopct_text(p, shown_total),
+            startangle=START_ANGLE,
+            colors=colors,
+            labeldistance=LABEL_DISTANCE,
+            pctdistance=PCT_DISTANCE,
+            wedgeprops={'linewidth': 1, 'edgecolor': 'white'}
+        )
+        self._hide_empty()
+        self.ax.axis('equal')
+        self.ax.set_title(self.title, pad=20, fontweight='bold')
+        self.figure.tight_layout()
+
+    def _move_wedges(self):
+        amounts = self._shown_amounts()
+        shown_total = sum(amounts)
+        theta = START_ANGLE
+        for wedge, text, autotext, amount in zip(self.wedges, self.texts, self.autotexts, amounts):
+            span = 360.0 * amount / shown_total
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + span)
+
+            # Same label placement rules as Axes.pie
+            mid = math.radians(theta + span / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            text.set_position((LABEL_DISTANCE * x, LABEL_DISTANCE * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((PCT_DISTANCE * x, PCT_DISTANCE * y))
+            autotext.set_text(_autopct_text(100.0 * amount / shown_total, shown_total))
+            theta += span
+        self._hide_empty()
+
+    def _hide_empty(self):
+        # Hide labels and percentages for zero (actually 0.1) values
+        for text, autotext, amount in zip(self.texts, self.autotexts, self.totals.values()):
+            text.set_visible(amount != 0)
+            autotext.set_visible(amount != 0)
+
+    def render_png(self, dpi=300):
+        """Return the chart as PNG bytes, reusing a cached render for unchanged totals"""
+        key = snapshot_key(self.totals, self.title, dpi)
+        with _png_cache_lock:
+            if key in _png_cache:
+                _png_cache.move_to_end(key)
+                return _png_cache[key]
+
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+        png = buffer.getvalue()
+
+        with _png_cache_lock:
+            _png_cache[key] = png
+            while len(_png_cache) > PNG_CACHE_SIZE:
+                _png_cache.popitem(last=False)
+        return png
+
+    def close(self):
+        """Release the figure's artists once its window is gone"""
+        self.figure.clear()
+        self.wedges, self.texts, self.autotexts = [], [], []
+        self.categories = None
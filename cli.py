@@ -0,0 +1,317 @@
+"""Command-line interface to the expense tracker (no display needed)
+
+Examples:
+    python cli.py add Food 450
+    python cli.py add - < expenses.csv          # "category,amount[,date]" per line
+    python cli.py ingest bills/ --category Travel
+    python cli.py import statement.csv --category Travel --rejects rejected.csv
+    python cli.py totals --json
+    python cli.py totals --period quarter        # this quarter only
+    python cli.py alerts
+    python cli.py alerts --history 20            # budget alerts that fired
+    python cli.py export report.csv
+    python cli.py export items.jsonl.gz --items   # every expense, streamed
+    python cli.py qr summary.png --items 50      # writes summary-1.png... if split
+    python cli.py qr-decode < scanned.txt        # one scanned part per line
+    python cli.py voice command.wav --backend vosk
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+import expense_core as core
+
+
+def parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def read_expense_lines(lines):
+    """Parse "category,amount[,date]" lines, returning (expenses, errors)"""
+    expenses, errors = [], []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = [part.strip() for part in line.split(",")]
+        try:
+            if len(parts) not in (2, 3):
+                raise ValueError("expected category,amount[,date]")
+            category = core.resolve_category(parts[0])
+            if category is None:
+                raise ValueError(f"unknown category '{parts[0]}'")
+            amount = float(parts[1])
+            if amount <= 0:
+                raise ValueError("amount must be positive")
+            timestamp = parse_timestamp(parts[2] if len(parts) == 3 else None) or datetime.now()
+        except ValueError as e:
+            errors.append(f"line {number}: {e}")
+            continue
+        expenses.append((category, amount, timestamp))
+    return expenses, errors
+
+
+def cmd_add(args):
+    if args.category == "-":
+        expenses, errors = read_expense_lines(sys.stdin)
+        for error in errors:
+            print(error, file=sys.stderr)
+        core.record_expenses(expenses, source="cli")
+        print(f"Added {len(expenses)} expenses ({len(errors)} rejected)")
+        return 1 if errors else 0
+
+    if args.amount is None:
+        print("add: amount is required", file=sys.stderr)
+        return 2
+    category = core.resolve_category(args.category)
+    if category is None:
+        print(f"add: unknown category '{args.category}'", file=sys.stderr)
+        return 2
+    if args.amount <= 0:
+        print("add: amount must be positive", file=sys.stderr)
+        return 2
+    timestamp = core.record_expense(category, args.amount, source="cli", timestamp=parse_timestamp(args.date))
+    print(f"Added ₹{args.amount:.2f} to {category} at {timestamp}")
+    return 0
+
+
+def cmd_ingest(args):
+    import ocr
+    category = core.resolve_category(args.category)
+    if category is None:
+        print(f"ingest: unknown category '{args.category}'", file=sys.stderr)
+        return 2
+
+    items = []
+    for path in args.paths:
+        images = ocr.find_bill_images(path) if os.path.isdir(path) else [path]
+        items.extend((image, category) for image in images)
+
+    def progress(done, total, index, result):
+        print(f"\r{done}/{total} bills scanned", end="", file=sys.stderr, flush=True)
+
+    results = core.ingest_bills(items, max_workers=args.workers, progress=progress)
+    print(file=sys.stderr)
+
+    failed = 0
+    for image_path, _, amount, error in results:
+        if error:
+            failed += 1
+            print(f"{image_path}\tFAILED\t{error}")
+        else:
+            print(f"{image_path}\tOK\t{amount:.2f}")
+    print(f"Added {len(results) - failed} bills, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_import(args):
+    import importer
+    default_category = None
+    if args.category:
+        default_category = core.resolve_category(args.category)
+        if default_category is None:
+            print(f"import: unknown category '{args.category}'", file=sys.stderr)
+            return 2
+
+    mapping = {}
+    for item in args.map:
+        field, sep, column = item.partition("=")
+        if not sep:
+            print(f"import: --map expects FIELD=COLUMN, got '{item}'", file=sys.stderr)
+            return 2
+        mapping[field.strip()] = column.strip()
+
+    try:
+        result = core.import_expenses(
+            args.path, default_category=default_category, mapping=mapping,
+            date_format=args.date_format, debits_negative=args.debits_negative,
+            decimal="," if args.decimal_comma else "."
+        )
+    except importer.ExpenseImportError as e:
+        print(f"import: {e}", file=sys.stderr)
+        return 2
+
+    for line, reason, _ in result.rejected[:20]:
+        print(f"line {line}: {reason}", file=sys.stderr)
+    if len(result.rejected) > 20:
+        print(f"... and {len(result.rejected) - 20} more", file=sys.stderr)
+    if args.rejects and result.rejected:
+        result.write_rejections(args.rejects)
+    total = sum(amount for _, amount, _ in result.expenses)
+    print(f"Imported {len(result.expenses)} expenses totalling {total:.2f} "
+          f"({len(result.rejected)} rejected, {result.skipped} skipped)")
+    return 1 if result.rejected else 0
+
+
+def cmd_totals(args):
+    totals = core.calculate_totals(args.period)
+    if args.json:
+        print(json.dumps({"categories": totals, "grand_total": sum(totals.values())}, indent=2))
+        return 0
+    for category, amount in totals.items():
+        print(f"{category:<20} {amount:>12.2f}")
+    print(f"{'GRAND TOTAL':<20} {sum(totals.values()):>12.2f}")
+    return 0
+
+
+def cmd_alerts(args):
+    if args.history:
+        for ts, rule, tier, spent, budget, message in core.get_ledger().alert_history(args.history):
+            print(f"{ts}  {tier:>4.0f}%  {message}")
+        return 0
+    for alert in core.ceo_dashboard_data["alerts"]:
+        print(alert)
+    return 1 if core.ceo_dashboard_data["alerts"] and args.fail_on_alert else 0
+
+
+def cmd_export(args):
+    if args.items:
+        category = None
+        if args.category:
+            category = core.resolve_category(args.category)
+            if category is None:
+                print(f"export: unknown category '{args.category}'", file=sys.stderr)
+                return 2
+
+        def progress(done, total):
+            print(f"\r{done}/{total} expenses written", end="", file=sys.stderr, flush=True)
+
+        try:
+            written = core.export_expenses(args.filename, category=category, progress=progress)
+        except ValueError as e:
+            print(f"export: {e}", file=sys.stderr)
+            return 2
+        print(file=sys.stderr)
+        print(f"Exported {written} expenses to {args.filename}")
+        return 0
+    core.export_totals(core.calculate_totals(), args.filename)
+    print(f"Report exported to {args.filename}")
+    return 0
+
+
+def cmd_qr(args):
+    import qr_summary
+    items = []
+    if args.items:
+        for _, ts, category, _, amount, _ in core.get_ledger().page_expenses(0, args.items, descending=True):
+            items.append((datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"), category, amount))
+    _, texts, images = qr_summary.summary_codes(core.calculate_totals(), items=items, size=args.size)
+
+    base, ext = os.path.splitext(args.filename)
+    for index, (text, image) in enumerate(zip(texts, images), start=1):
+        path = args.filename if len(images) == 1 else f"{base}-{index}{ext or '.png'}"
+        image.save(path)
+        print(f"{path}\t{text}")
+    return 0
+
+
+def cmd_qr_decode(args):
+    import qr_summary
+    texts = args.parts or [line for line in sys.stdin.read().splitlines() if line.strip()]
+    try:
+        summary = qr_summary.decode_parts(texts)
+    except (qr_summary.QRPayloadError, ValueError) as e:
+        print(f"qr-decode: {e}", file=sys.stderr)
+        return 1
+    print(f"Generated on: {summary['generated']:%Y-%m-%d %H:%M}")
+    for category, amount in summary["totals"].items():
+        print(f"{category:<20} {amount:>12.2f}")
+    print(f"{'GRAND TOTAL':<20} {summary['grand_total']:>12.2f}")
+    for moment, category, amount in summary["items"]:
+        print(f"{moment:%Y-%m-%d %H:%M}  {category:<20} {amount:>10.2f}")
+    return 0
+
+
+def cmd_voice(args):
+    import speech_backends
+    try:
+        backend = speech_backends.create_backend(core.categories_data.keys(), args.backend)
+    except ValueError as e:
+        print(f"voice: {e}", file=sys.stderr)
+        return 2
+    transcripts = speech_backends.transcribe_file(args.path, backend)
+    for text in transcripts:
+        print(text)
+    return 0 if transcripts else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Company Expense Tracker command-line interface",
+        epilog=__doc__.split("\n\n", 1)[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db", help="ledger file (default: EXPENSE_DB_PATH or expenses.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add an expense, or many from stdin with '-'")
+    add.add_argument("category", help="category name, or '-' to read category,amount[,date] lines from stdin")
+    add.add_argument("amount", type=float, nargs="?")
+    add.add_argument("--date", help="ISO date/time of the expense (default: now)")
+    add.set_defaults(func=cmd_add)
+
+    ingest = commands.add_parser("ingest", help="OCR bill images or folders in parallel")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--category", required=True)
+    ingest.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    ingest.set_defaults(func=cmd_ingest)
+
+    imp = commands.add_parser("import", help="bulk import a CSV/JSONL file or bank statement")
+    imp.add_argument("path")
+    imp.add_argument("--category", help="category for rows without one (needed if the file has no category column)")
+    imp.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                     help="use COLUMN for FIELD (date, amount, debit, credit, category); repeatable")
+    imp.add_argument("--date-format", help="strptime format of the date column (default: detected)")
+    imp.add_argument("--debits-negative", action="store_true",
+                     help="bare signed amounts: expenses are the negative ones and positive rows are skipped "
+                          "(amounts marked Cr are always skipped, Dr or (parentheses) always imported)")
+    imp.add_argument("--decimal-comma", action="store_true", help='amounts are written like "1.234,50"')
+    imp.add_argument("--rejects", help="write rejected rows to this CSV file")
+    imp.set_defaults(func=cmd_import)
+
+    totals = commands.add_parser("totals", help="print category totals")
+    totals.add_argument("--json", action="store_true")
+    totals.add_argument("--period", choices=("day", "week", "month", "quarter", "year"),
+                        help="only the current day, week, month, quarter or year")
+    totals.set_defaults(func=cmd_totals)
+
+    alerts = commands.add_parser("alerts", help="print budget alerts")
+    alerts.add_argument("--fail-on-alert", action="store_true", help="exit with status 1 if any alert is active")
+    alerts.add_argument("--history", type=int, metavar="N", help="print the last N alerts that fired instead")
+    alerts.set_defaults(func=cmd_alerts)
+
+    export = commands.add_parser("export", help="export totals to a .txt or .csv report")
+    export.add_argument("filename")
+    export.add_argument("--items", action="store_true",
+                        help="export every expense instead (.csv or .jsonl, optionally .gz/.zst)")
+    export.add_argument("--category", help="with --items, only this category")
+    export.set_defaults(func=cmd_export)
+
+    qr = commands.add_parser("qr", help="write the summary QR code(s) as PNG")
+    qr.add_argument("filename")
+    qr.add_argument("--items", type=int, default=0, help="also include the N most recent expenses")
+    qr.add_argument("--size", type=int, default=250, help="approximate image size in pixels")
+    qr.set_defaults(func=cmd_qr)
+
+    qr_decode = commands.add_parser("qr-decode", help="decode scanned summary QR text (args or stdin lines)")
+    qr_decode.add_argument("parts", nargs="*")
+    qr_decode.set_defaults(func=cmd_qr_decode)
+
+    voice = commands.add_parser("voice", help="transcribe a recorded voice command (WAV/AIFF/FLAC)")
+    voice.add_argument("path")
+    voice.add_argument("--backend", choices=("vosk", "sphinx", "google"),
+                       help="speech backend (default: VOICE_BACKEND or the best available)")
+    voice.set_defaults(func=cmd_voice)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    core.initialize_ceo_dashboard()
+    core.open_ledger(args.db)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
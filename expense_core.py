@@ -0,0 +1,326 @@
+from datetime import date, datetime
+from ledger import Ledger
+from aggregates import ExpenseAggregates
+from hierarchy import CostCenterHierarchy
+from budget_rules import BudgetRuleEngine, build_rules, load_rules_config
+from periods import PeriodRollups, period_key, quarter_key
+
+# Initialize global variables with additional categories
+categories_data = {
+    "Food": [],
+    "Health": [],
+    "Monthly Bills": [],
+    "EMI": [],
+    "Shopping": [],
+    "Entertainment": [],
+    "Education": [],
+    "Insurance": [],
+    "Travel": [],
+    "Office Supplies": [],
+    "Utilities": [],
+    "Maintenance": [],
+    "Marketing": [],
+    "Software": [],
+    "Hardware": []
+}
+
+# Running totals kept in sync with categories_data on every append
+aggregates = ExpenseAggregates(categories_data.keys())
+
+# Persistent expense ledger (opened by open_ledger)
+ledger = None
+
+# Category -> department -> division -> company tree (loaded by load_hierarchy)
+hierarchy = None
+
+# Day/week/month/quarter/year spending per hierarchy node (built with the hierarchy)
+period_rollups = None
+
+# Budget rules with alert tiers, evaluated against the hierarchy rollups (see load_budget_rules)
+budget_engine = None
+
+# Fired alerts kept in memory for the dashboard, newest first
+ALERT_HISTORY_SIZE = 100
+
+# Callbacks run after every recorded batch of expenses (e.g. to refresh open charts)
+expense_listeners = []
+
+# CEO Dashboard data
+ceo_dashboard_data = {
+    "monthly_budget": 100000,  # Default budget
+    "department_spending": {},
+    "alerts": [],
+    "alert_history": [],  # (ts, rule, tier, spent, budget, message), newest first
+    "savings_goals": {}
+}
+
+def initialize_ceo_dashboard():
+    """Initialize default CEO dashboard data"""
+    load_hierarchy()
+    ceo_dashboard_data["department_spending"] = {
+        department: {"budget": budget, "spent": department_spent(department)}
+        for department, budget in hierarchy.departments().items()
+    }
+    load_budget_rules()
+    ceo_dashboard_data["savings_goals"] = {
+        "Q1": {"target": 50000, "saved": 0},
+        "Q2": {"target": 60000, "saved": 0},
+        "Q3": {"target": 70000, "saved": 0},
+        "Q4": {"target": 80000, "saved": 0}
+    }
+    update_savings_goals()
+
+def load_hierarchy(path=None):
+    """Load the cost-center hierarchy (EXPENSE_HIERARCHY_PATH, default hierarchy.json) once
+    
+    Categories named in the file become expense categories; the ones it doesn't place belong to its default
+    department. Raises hierarchy.HierarchyError for a malformed file.
+    """
+    global hierarchy, period_rollups
+    if hierarchy is not None and path is None:
+        return hierarchy
+    loaded = CostCenterHierarchy.load(path, categories_data.keys())
+    for category in loaded.categories():
+        if category not in categories_data:
+            categories_data[category] = []
+            aggregates.add_category(category)
+    hierarchy = loaded
+    period_rollups = PeriodRollups(hierarchy)
+    if ledger is not None:
+        period_rollups.load(ledger.load_daily_totals())
+    return hierarchy
+
+def load_budget_rules(path=None):
+    """Build the budget rule engine from the hierarchy's department budgets, the monthly company budget and
+    EXPENSE_BUDGET_RULES_PATH (default budget_rules.json), keeping what has already been alerted"""
+    global budget_engine
+    rules = build_rules(load_hierarchy(), ceo_dashboard_data["monthly_budget"], load_rules_config(path))
+    state = budget_engine.state if budget_engine is not None else None
+    budget_engine = BudgetRuleEngine(rules, state)
+    return budget_engine
+
+def get_department(category):
+    """Map an expense category to the department that owns it"""
+    return load_hierarchy().department_of(category)
+
+def department_spent(department, period="month"):
+    """Spending of a department in the current month (or other period) under the current hierarchy"""
+    return period_spent(period, hierarchy.node("department", department))
+
+def period_spent(period, node=None, today=None):
+    """Spending of a hierarchy node (default: the company) in the current day/week/month/quarter/year"""
+    load_hierarchy()
+    return period_rollups.current(period, node, today)
+
+def month_node_totals(today=None):
+    """{hierarchy node: spending} for the current month"""
+    load_hierarchy()
+    return period_rollups.node_totals("month", period_key("month", today or date.today()))
+
+def update_savings_goals(today=None):
+    """Saved so far in each quarter of this year: three monthly budgets minus what was spent in the quarter
+    
+    Quarters that haven't started show nothing saved.
+    """
+    today = today or date.today()
+    current = (today.month - 1) // 3 + 1
+    quarter_budget = 3 * ceo_dashboard_data["monthly_budget"]
+    for quarter, goal in ceo_dashboard_data["savings_goals"].items():
+        number = int(quarter[1:])
+        if number <= current:
+            goal["saved"] = quarter_budget - period_rollups.total("quarter", quarter_key(today.year, number))
+        else:
+            goal["saved"] = 0
+
+def open_ledger(path=None):
+    """Open the expense ledger and load persisted totals into memory"""
+    global ledger
+    if ledger is not None:
+        return ledger
+    # The hierarchy decides which categories exist and holds the period rollups filled below, so it must be loaded
+    # first whatever the caller has set up (before the ledger opens, so its totals are read only once)
+    load_hierarchy()
+    ledger = Ledger(path)
+    
+    # Seed each category with its stored running total instead of replaying history
+    for category, total in ledger.load_totals().items():
+        if category in categories_data and total:
+            categories_data[category].append(total)
+            aggregates.add(category, total)
+    
+    # Day/week/month/quarter/year rollups come from the per-day totals the ledger maintains (backfilled on open
+    # for older ledgers), so start-up reads one row per day and category instead of every expense
+    period_rollups.load(ledger.load_daily_totals())
+    
+    # Department spending is rolled up through the configured hierarchy rather than taken from the department stored
+    # with each expense, so a reorganisation applies to past spending too
+    for department, data in ceo_dashboard_data["department_spending"].items():
+        data["spent"] = department_spent(department)
+    update_savings_goals()
+    
+    # Tiers already alerted on in earlier sessions don't fire again
+    load_budget_rules().state.update(ledger.load_alert_state())
+    ceo_dashboard_data["alert_history"] = ledger.alert_history(ALERT_HISTORY_SIZE)
+    check_budget_alerts()
+    return ledger
+
+def record_expense(category, amount, source="manual", timestamp=None):
+    """Store an expense in memory and in the ledger, then refresh the dashboard"""
+    timestamp = timestamp or datetime.now()
+    record_expenses([(category, amount, timestamp)], source)
+    return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+
+def record_expenses(expenses, source="manual"):
+    """Store many (category, amount, timestamp) expenses in one batch
+    
+    Raises ValueError for an unknown category before anything is stored, so a bad row leaves the batch unrecorded
+    everywhere. The ledger write is a single transaction and the dashboard is refreshed once at the end rather than
+    per expense.
+    """
+    rows = []
+    for category, amount, timestamp in expenses:
+        if category not in categories_data:
+            raise ValueError(f"Unknown category: {category}")
+        rows.append((category, get_department(category), amount, timestamp, source))
+    
+    # The ledger goes first: if it fails, memory still matches it
+    if ledger is not None:
+        ledger.add_expenses(rows)
+    for category, _, amount, _, _ in rows:
+        categories_data[category].append(amount)
+        aggregates.add(category, amount)
+    period_rollups.add_batch([(category, amount, timestamp) for category, _, amount, timestamp, _ in rows])
+    update_ceo_dashboard_batch([(category, amount) for category, _, amount, _, _ in rows])
+    for listener in expense_listeners:
+        listener()
+    return len(rows)
+
+def update_ceo_dashboard(category, amount):
+    """Update CEO dashboard data when new expenses are added"""
+    update_ceo_dashboard_batch([(category, amount)])
+
+def update_ceo_dashboard_batch(expenses):
+    """Update CEO dashboard data once for a batch of (category, amount) expenses"""
+    # Refresh this month's spending of the departments the batch touched (the period rollups are already updated,
+    # and back-dated expenses must not count towards this month)
+    categories = {category for category, _ in expenses}
+    for department in {get_department(category) for category in categories}:
+        if department in ceo_dashboard_data["department_spending"]:
+            ceo_dashboard_data["department_spending"][department]["spent"] = department_spent(department)
+    
+    # Only the rules on the changed categories' paths can have moved
+    check_budget_alerts(categories)
+    update_savings_goals()
+
+def check_budget_alerts(categories=None):
+    """Evaluate the budget rules for the given categories' ancestors (all rules if None)
+    
+    Crossing a tier fires one alert, recorded in the alert history (and the ledger); ceo_dashboard_data["alerts"] holds
+    the current status of every rule at or past a tier.
+    """
+    if budget_engine is None:
+        load_budget_rules()
+    nodes = None
+    if categories is not None:
+        nodes = {node for category in categories for node in hierarchy.path(category)}
+    fired, cleared = budget_engine.evaluate(period_rollups, nodes)
+    
+    if fired or cleared:
+        changed = [alert[0] for alert in fired] + cleared
+        timestamp = datetime.now()
+        if ledger is not None:
+            ledger.record_alerts(fired, {rule: budget_engine.state.get(rule, 0.0) for rule in changed}, timestamp)
+        ts = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        history = ceo_dashboard_data["alert_history"]
+        history[:0] = [(ts,) + alert for alert in reversed(fired)]
+        del history[ALERT_HISTORY_SIZE:]
+    ceo_dashboard_data["alerts"] = budget_engine.alerts()
+    return fired
+
+def calculate_totals(period=None, today=None):
+    """{category: total} over all time, or for the current day/week/month/quarter/year"""
+    load_hierarchy()
+    if period is None:
+        totals = aggregates.totals()
+        return {category: totals.get(category, 0.0) for category in categories_data}
+    spent = period_rollups.node_totals(period, period_key(period, today or date.today()))
+    # Same order as the all-time totals (categories_data), not the hierarchy's
+    return {category: spent.get(hierarchy.path(category)[0], 0.0) for category in categories_data}
+
+def verify_aggregates():
+    """Rebuild the running totals from categories_data if they have drifted"""
+    return aggregates.verify(categories_data)
+
+
+def get_ledger():
+    """The expense ledger, opened (and its totals loaded) on first use"""
+    return ledger if ledger is not None else open_ledger()
+
+def resolve_category(name):
+    """Return the canonical category for a case-insensitive name, or None"""
+    name = name.strip().lower()
+    for category in categories_data:
+        if category.lower() == name:
+            return category
+    return None
+
+def ingest_bills(items, max_workers=None, progress=None):
+    """OCR (image_path, category) pairs across all cores and record the readable ones in one batch
+    
+    Returns the per-file (image_path, category, amount, error) results.
+    """
+    import ocr
+    results = ocr.batch_ocr(items, max_workers=max_workers, progress=progress)
+    timestamp = datetime.now()
+    record_expenses(
+        [(category, amount, timestamp) for _, category, amount, error in results if not error],
+        source="ocr"
+    )
+    return results
+
+def export_totals(totals, filename):
+    """Write a totals report as CSV (for .csv filenames) or plain text"""
+    if filename.endswith('.csv'):
+        # Export as CSV with UTF-8 encoding
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("Category,Amount (₹)\n")
+            for category, amount in totals.items():
+                f.write(f"{category},{amount:.2f}\n")
+            GT = sum(totals.values())
+            f.write(f"GRAND TOTAL,{GT:.2f}\n")
+    else:
+        # Export as text with UTF-8 encoding
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("=== COMPANY EXPENSE REPORT ===\n\n")
+            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            
+            for category, amount in totals.items():
+                f.write(f"{category:<20}: ₹{amount:>10.2f}\n")
+            
+            GT = sum(totals.values())
+            f.write("\n")
+            f.write(f"{'GRAND TOTAL':<20}: ₹{GT:>10.2f}\n")
+
+def export_expenses(filename, category=None, start=None, end=None, progress=None, cancel=None):
+    """Stream every matching expense to filename (CSV or JSON Lines, optionally .gz/.zst)
+
+    Returns the number of rows written; see exporter.export_rows for
+    progress and cancel.
+    """
+    import exporter
+    expense_ledger = get_ledger()
+    total = expense_ledger.count_expenses(category) if not (start or end) else None
+    rows = expense_ledger.iter_expenses(category=category, start=start, end=end)
+    return exporter.export_rows(rows, filename, total=total, progress=progress, cancel=cancel)
+
+def import_expenses(path, default_category=None, mapping=None, source="import", **options):
+    """Parse a CSV/JSONL file or bank statement and record every valid row in one batch
+    
+    Returns the importer.ImportResult (rejected rows are not recorded).
+    """
+    import importer
+    result = importer.read_expense_file(
+        path, resolve_category, mapping=mapping, default_category=default_category, **options
+    )
+    record_expenses(result.expenses, source=source)
+    return result
@@ -0,0 +1,116 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+# Rows encoded and written per chunk; memory use depends on this, not on the ledger size
+CHUNK_ROWS = 5000
+
+FORMATS = ("csv", "jsonl")
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+FIELDS = ("id", "timestamp", "category", "department", "amount", "source")
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def detect_format(filename):
+    """Return (format, compression) implied by a name such as report.jsonl.gz"""
+    base, ext = os.path.splitext(filename.lower())
+    compression = COMPRESSIONS.get(ext)
+    if compression:
+        ext = os.path.splitext(base)[1]
+    return ("jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"), compression
+
+
+def _open_output(filename, compression):
+    if compression == "gzip":
+        # Level 6 is the usual size/speed balance; 9 is several times slower for ~2% less
+        return gzip.open(filename, "wb", compresslevel=6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd export needs the optional 'zstandard' package") from None
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(filename, "wb"), closefd=True)
+    return open(filename, "wb")
+
+
+def _csv_chunks(rows, chunk_rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDS)
+    chunk = []
+    for row in rows:
+        chunk.append(row[:4] + (f"{row[4]:.2f}",) + row[5:])
+        if len(chunk) >= chunk_rows:
+            writer.writerows(chunk)
+            yield buffer.getvalue(), len(chunk)
+            buffer.seek(0)
+            buffer.truncate()
+            chunk = []
+    writer.writerows(chunk)
+    yield buffer.getvalue(), len(chunk)
+
+
+def _jsonl_chunks(rows, chunk_rows):
+    # Category, department and source repeat constantly, so encode each distinct value once
+    encoded = {}
+
+    def quote(value):
+        text = encoded.get(value)
+        if text is None:
+            text = encoded[value] = json.dumps(value, ensure_ascii=False)
+        return text
+
+    lines = []
+    for row_id, ts, category, department, amount, source in rows:
+        lines.append(
+            f'{{"id": {row_id}, "timestamp": {json.dumps(ts)}, "category": {quote(category)}, '
+            f'"department": {quote(department)}, "amount": {amount:.2f}, "source": {quote(source)}}}\n'
+        )
+        if len(lines) >= chunk_rows:
+            yield "".join(lines), len(lines)
+            lines = []
+    yield "".join(lines), len(lines)
+
+
+def iter_chunks(rows, fmt="csv", chunk_rows=CHUNK_ROWS):
+    """Encode (id, ts, category, department, amount, source) rows as (text, row_count) chunks"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    chunks = _csv_chunks if fmt == "csv" else _jsonl_chunks
+    return chunks(rows, chunk_rows)
+
+
+def export_rows(rows, filename, fmt=None, compression=None, total=None, progress=None, cancel=None,
+                chunk_rows=CHUNK_ROWS):
+    """Stream rows into filename chunk by chunk and return the number written
+
+    fmt and compression default to what the filename implies. progress is
+    called as progress(done, total) after every chunk; setting the cancel
+    event stops the export, removes the partial file and raises
+    ExportCancelled.
+    """
+    implied_format, implied_compression = detect_format(filename)
+    fmt = fmt or implied_format
+    compression = compression if compression is not None else implied_compression
+
+    done = 0
+    try:
+        with _open_output(filename, compression) as f:
+            for text, count in iter_chunks(rows, fmt, chunk_rows):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                f.write(text.encode("utf-8"))
+                done += count
+                if progress:
+                    progress(done, total)
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    return done
@@ -0,0 +1,180 @@
+import csv
+import json
+import os
+
+# Cost-center hierarchy file (override with EXPENSE_HIERARCHY_PATH); .json or .csv
+DEFAULT_HIERARCHY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hierarchy.json")
+
+# Node levels, leaf first
+LEVELS = ("category", "department", "division", "company")
+
+# Used when there is no hierarchy file: the original four departments
+DEFAULT_HIERARCHY = {
+    "company": "Company",
+    "default_department": "Operations",
+    "divisions": {
+        "Corporate": {
+            "HR": {"budget": 20000, "categories": ["Health", "Insurance"]},
+            "Operations": {"budget": 25000, "categories": []},
+        },
+        "Technology": {
+            "IT": {"budget": 30000, "categories": ["Software", "Hardware", "Office Supplies"]},
+        },
+        "Commercial": {
+            "Marketing": {"budget": 25000, "categories": ["Marketing"]},
+        },
+    },
+}
+
+
+class HierarchyError(ValueError):
+    pass
+
+
+class CostCenterHierarchy:
+    """Category -> department -> division -> company tree flattened into lookup tables
+
+    Nodes are numbered; names, levels, parents, children and budgets are
+    parallel lists indexed by node id. Every category's chain of ancestors
+    is precomputed, so rolling an expense up to all of them is O(depth) with
+    no searching. Categories the configuration doesn't mention belong to the
+    default department.
+    """
+
+    def __init__(self, company, divisions, default_department=None, categories=()):
+        self.names = []
+        self.levels = []
+        self.parents = []
+        self.children = []
+        self.budgets = []
+        self.ids = {level: {} for level in LEVELS}  # level -> {name: node id}
+        self.paths = {}  # category -> (category node, department node, division node, company node)
+
+        self.root = self._add(company, "company", None)
+        for division, departments in divisions.items():
+            division_id = self._add(division, "division", self.root)
+            for department, spec in departments.items():
+                self._add(department, "department", division_id, spec.get("budget"))
+                for category in spec.get("categories", ()):
+                    self.add_category(category, department)
+
+        if default_department is None and self.ids["department"]:
+            default_department = next(iter(self.ids["department"]))
+        if default_department not in self.ids["department"]:
+            raise HierarchyError(f"Default department {default_department!r} is not in the hierarchy")
+        self.default_department = default_department
+        for category in categories:
+            if category not in self.paths:
+                self.add_category(category, default_department)
+
+        # A division's or the company's budget is the sum of its departments'
+        for department_id in self.ids["department"].values():
+            budget = self.budgets[department_id] or 0.0
+            self.budgets[department_id] = budget
+            node = self.parents[department_id]
+            while node is not None:
+                self.budgets[node] = (self.budgets[node] or 0.0) + budget
+                node = self.parents[node]
+
+    def _add(self, name, level, parent, budget=None):
+        if name in self.ids[level]:
+            raise HierarchyError(f"{level.title()} {name!r} appears more than once")
+        node = len(self.names)
+        self.names.append(name)
+        self.levels.append(level)
+        self.parents.append(parent)
+        self.children.append([])
+        self.budgets.append(float(budget) if budget is not None else None)
+        self.ids[level][name] = node
+        if parent is not None:
+            self.children[parent].append(node)
+        return node
+
+    def add_category(self, category, department):
+        """Attach a category under a department and precompute its ancestor chain"""
+        if department not in self.ids["department"]:
+            raise HierarchyError(f"Unknown department {department!r} for category {category!r}")
+        node = self._add(category, "category", self.ids["department"][department])
+        path = []
+        while node is not None:
+            path.append(node)
+            node = self.parents[node]
+        self.paths[category] = tuple(path)
+        return self.paths[category]
+
+    def path(self, category):
+        """Node ids from the category up to the company"""
+        return self.paths[category]
+
+    def department_of(self, category):
+        path = self.paths.get(category)
+        return self.names[path[1]] if path else self.default_department
+
+    def categories(self):
+        return list(self.paths)
+
+    def departments(self):
+        """{department: budget} in configuration order"""
+        return {name: self.budgets[node] for name, node in self.ids["department"].items()}
+
+    def node(self, level, name):
+        return self.ids[level][name]
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_dict(cls, data, categories=()):
+        """Build from {"company", "default_department", "divisions": {division: {department: {"budget", "categories"}}}}"""
+        try:
+            return cls(data.get("company", "Company"), data["divisions"],
+                       data.get("default_department"), categories)
+        except (KeyError, AttributeError, TypeError) as e:
+            raise HierarchyError(f"Malformed hierarchy: {e}") from e
+
+    @classmethod
+    def from_rows(cls, rows, categories=()):
+        """Build from dict rows with category, department, division and optional budget/company columns
+
+        A department's budget may be given on any of its rows; a row with an
+        empty category just declares the department. The first department is
+        the default one.
+        """
+        company = "Company"
+        divisions = {}
+        division_of = {}
+        for number, row in enumerate(rows, start=2):
+            row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+            department, division = row.get("department"), row.get("division")
+            if not department or not division:
+                raise HierarchyError(f"Line {number}: department and division are required")
+            company = row.get("company") or company
+            if division_of.setdefault(department, division) != division:
+                raise HierarchyError(f"Line {number}: department {department!r} is already in {division_of[department]!r}")
+            spec = divisions.setdefault(division, {}).setdefault(department, {"budget": None, "categories": []})
+            if row.get("budget"):
+                try:
+                    spec["budget"] = float(row["budget"].replace(",", ""))
+                except ValueError:
+                    raise HierarchyError(f"Line {number}: bad budget {row['budget']!r}") from None
+            if row.get("category"):
+                spec["categories"].append(row["category"])
+        return cls(company, divisions, None, categories)
+
+    @classmethod
+    def load(cls, path=None, categories=()):
+        """Read EXPENSE_HIERARCHY_PATH (default hierarchy.json), or the built-in default if it doesn't exist
+
+        categories are attached to the default department unless the file places them.
+        """
+        path = path or os.getenv("EXPENSE_HIERARCHY_PATH", DEFAULT_HIERARCHY_PATH)
+        if not os.path.exists(path):
+            return cls.from_dict(DEFAULT_HIERARCHY, categories)
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            if path.lower().endswith(".csv"):
+                return cls.from_rows(csv.DictReader(f), categories)
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise HierarchyError(f"{path}: {e}") from e
+        return cls.from_dict(data, categories)
@@ -0,0 +1,283 @@
+import csv
+import json
+import os
+from datetime import datetime
+import numpy as np
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Header names recognised for each field (compared case-insensitively)
+COLUMN_NAMES = {
+    "date": ("date", "timestamp", "transaction date", "txn date", "tran date", "value date",
+             "posting date", "booking date"),
+    "amount": ("amount", "amount (₹)", "amount(₹)", "amount (inr)", "value"),
+    "debit": ("debit", "debit amount", "withdrawal", "withdrawals", "withdrawal amt.",
+              "withdrawal amount", "withdrawal amt", "dr", "paid out"),
+    "credit": ("credit", "credit amount", "deposit", "deposits", "deposit amt.",
+               "deposit amount", "deposit amt", "cr", "paid in"),
+    "category": ("category",),
+    "description": ("description", "narration", "particulars", "details", "remarks", "memo"),
+}
+
+# Tried in order against a sample of the dates; day-first wins over month-first
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d",
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y",
+    "%d-%m-%y", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y", "%d %b %y", "%b %d, %Y", "%m/%d/%Y",
+)
+
+# Strings stripped from amounts before conversion
+CURRENCY_MARKS = (",", "₹", "Rs.", "Rs", "INR", " ")
+
+# Rows scanned for a header line (statements often start with account details)
+HEADER_SCAN_ROWS = 30
+
+
+class ExpenseImportError(Exception):
+    pass
+
+
+class ImportResult:
+    """Outcome of parsing one file
+
+    expenses are (category, amount, timestamp) tuples ready for
+    expense_core.record_expenses; rejected holds (line, reason, raw_row)
+    for every row that failed validation; skipped counts credit rows.
+    """
+
+    def __init__(self, expenses, rejected, skipped, mapping):
+        self.expenses = expenses
+        self.rejected = rejected
+        self.skipped = skipped
+        self.mapping = mapping
+
+    def write_rejections(self, path):
+        """Write a CSV report of rejected rows (line, reason, original fields)"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["line", "reason", "row"])
+            for line, reason, raw in self.rejected:
+                writer.writerow([line, reason, json.dumps(raw, ensure_ascii=False)])
+
+
+def detect_mapping(header):
+    """Return {field: column_index} for the recognised columns in a header row"""
+    normalized = [str(name).strip().lower() for name in header]
+    mapping = {}
+    for field, names in COLUMN_NAMES.items():
+        for index, name in enumerate(normalized):
+            if name in names:
+                mapping[field] = index
+                break
+    return mapping
+
+
+def _usable(mapping):
+    return "date" in mapping and ("amount" in mapping or "debit" in mapping)
+
+
+def read_table(path):
+    """Return (header, rows, first_line) for a CSV/TSV or JSON Lines file"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return _read_jsonl(path)
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.reader(f, dialect))
+
+    # The header is the first row naming a date and an amount/debit column
+    for index, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        if _usable(detect_mapping(row)):
+            return row, rows[index + 1:], index + 2
+    return (rows[0] if rows else []), rows[1:], 2
+
+
+def _read_jsonl(path):
+    header, index_of, rows = [], {}, []
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                rows.append([])
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {}
+            if not isinstance(record, dict):
+                record = {}
+            for key in record:
+                if key not in index_of:
+                    index_of[key] = len(header)
+                    header.append(key)
+            row = [""] * len(header)
+            for key, value in record.items():
+                row[index_of[key]] = "" if value is None else str(value)
+            rows.append(row)
+    return header, rows, 1
+
+
+def _column(rows, index):
+    if index is None:
+        return None
+    return [row[index] if len(row) > index else "" for row in rows]
+
+
+def parse_amounts(values, decimal=".", marks=False):
+    """Parse amount strings to a float array; unparseable entries become NaN
+
+    "(1,234.50)" and "1,234.50 Dr" style negatives are understood. With
+    decimal="," amounts are read as "1.234,50". With marks=True, also return
+    boolean arrays (debit, credit) telling which amounts were explicitly
+    marked as debits (Dr suffix or parentheses) or credits (Cr suffix).
+    """
+    raw = np.char.strip(np.asarray(values, dtype=str))
+    if raw.size == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return (empty, np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)) if marks else empty
+    if decimal == ",":
+        raw = np.char.replace(np.char.replace(raw, ".", ""), ",", ".")
+    upper = np.char.upper(raw)
+    debit = np.char.startswith(raw, "(") | np.char.endswith(upper, "DR")
+    credit = np.char.endswith(upper, "CR")
+    negative = debit | np.char.startswith(raw, "-")
+    cleaned = raw
+    for mark in CURRENCY_MARKS + ("(", ")", "-", "+"):
+        cleaned = np.char.replace(cleaned, mark, "")
+    cleaned = np.char.rstrip(np.char.rstrip(np.char.rstrip(cleaned, "rR"), "cCdD"), ".")
+    try:
+        amounts = cleaned.astype(np.float64)
+    except ValueError:
+        # Rare path: locate the bad entries one by one
+        amounts = np.array([_to_float(value) for value in cleaned.tolist()], dtype=np.float64)
+    amounts = np.where(negative, -amounts, amounts)
+    return (amounts, debit, credit) if marks else amounts
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def detect_date_format(values, sample_size=200):
+    """Pick the DATE_FORMATS entry that parses the most sampled distinct values
+
+    Footer lines such as "Closing balance" are tolerated; ties go to the
+    earlier format.
+    """
+    sample = [value for value in list(dict.fromkeys(values))[:sample_size] if value]
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = 0
+        for value in sample:
+            try:
+                datetime.strptime(value, fmt)
+                count += 1
+            except ValueError:
+                pass
+        if count > best_count:
+            best, best_count = fmt, count
+            if count == len(sample):
+                break
+    return best
+
+
+def parse_dates(values, date_format=None):
+    """Return ledger timestamp strings (None where unparseable), parsing each distinct value once"""
+    values = [value.strip() for value in values]
+    date_format = date_format or detect_date_format(values)
+    parsed = {}
+    for value in set(values):
+        try:
+            parsed[value] = datetime.strptime(value, date_format).strftime(TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            parsed[value] = None
+    return [parsed[value] for value in values]
+
+
+def parse_rows(header, rows, resolve_category, mapping=None, default_category=None,
+               date_format=None, debits_negative=False, decimal=".", first_line=2):
+    """Validate and convert raw rows into an ImportResult
+
+    mapping: optional {field: header name} overriding detection.
+    resolve_category: callable returning the canonical category or None.
+    debits_negative: with a single amount column, how a bare signed number
+    reads: by default positive amounts are expenses, with the flag negative
+    ones are (as in many bank exports) and positive rows are skipped.
+    Amounts marked "Cr" are always skipped as credits, and amounts marked
+    "Dr" or in parentheses are always expenses, whatever the flag.
+    decimal: "," for files written with decimal commas.
+    """
+    columns = detect_mapping(header)
+    for field, name in (mapping or {}).items():
+        if field not in COLUMN_NAMES:
+            raise ExpenseImportError(f"Unknown field '{field}'")
+        try:
+            columns[field] = header.index(name)
+        except ValueError:
+            raise ExpenseImportError(f"Column '{name}' not found (have: {', '.join(header)})") from None
+    if not _usable(columns):
+        raise ExpenseImportError("Could not find a date column and an amount or debit column")
+    if "category" not in columns and not default_category:
+        raise ExpenseImportError("The file has no category column, so a default category is required")
+
+    n = len(rows)
+    timestamps = parse_dates(_column(rows, columns["date"]), date_format)
+    if "debit" in columns:
+        amounts = parse_amounts(_column(rows, columns["debit"]), decimal)
+        amounts = np.abs(amounts)
+        credits = np.zeros(n, dtype=bool)
+        if "credit" in columns:
+            credit_amounts = parse_amounts(_column(rows, columns["credit"]), decimal)
+            credits = np.isnan(amounts) | (amounts == 0)
+            credits &= ~np.isnan(credit_amounts) & (credit_amounts != 0)
+    else:
+        amounts, debit, credit = parse_amounts(_column(rows, columns["amount"]), decimal, marks=True)
+        bare = ~debit & ~credit
+        if debits_negative:
+            credits = credit | (bare & (amounts > 0))
+            amounts = np.where(bare, -amounts, np.abs(amounts))
+        else:
+            credits = credit
+            amounts = np.where(debit, np.abs(amounts), amounts)
+
+    if "category" in columns:
+        raw_categories = _column(rows, columns["category"])
+        resolved = {value: resolve_category(value) if value.strip() else default_category
+                    for value in set(raw_categories)}
+        categories = [resolved[value] for value in raw_categories]
+    else:
+        categories = [default_category] * n
+
+    bad_amount = ~credits & ~(amounts > 0)  # NaN compares False, so it lands here too
+    missing_amount = np.isnan(amounts)
+    expenses, rejected = [], []
+    amount_list = amounts.tolist()
+    for i in np.flatnonzero(~credits & ~bad_amount).tolist():
+        if timestamps[i] is None or categories[i] is None:
+            rejected.append((i, "invalid date" if timestamps[i] is None else "unknown category"))
+        else:
+            expenses.append((categories[i], amount_list[i], timestamps[i]))
+    rejected.extend((i, "invalid amount" if missing_amount[i] else "amount must be positive")
+                    for i in np.flatnonzero(bad_amount).tolist())
+    rejected.sort()
+
+    report = [(first_line + i, reason, rows[i]) for i, reason in rejected if rows[i]]
+    blank = len(rejected) - len(report)
+    named = {field: header[index] for field, index in columns.items()}
+    return ImportResult(expenses, report, int(credits.sum()) + blank, named)
+
+
+def read_expense_file(path, resolve_category, **options):
+    """read_table + parse_rows for one file"""
+    if not os.path.exists(path):
+        raise ExpenseImportError(f"No such file: {path}")
+    header, rows, first_line = read_table(path)
+    return parse_rows(header, rows, resolve_category, first_line=first_line, **options)
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default location and lifetime of cached insights (override with AI_CACHE_PATH / AI_CACHE_TTL seconds)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai_cache.db")
+DEFAULT_TTL = 6 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS insights (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+def make_key(expense_data, prompt_version, params):
+    """Canonical hash of the expense snapshot, prompt template version and model parameters"""
+    snapshot = {category: round(float(amount), 2) for category, amount in expense_data.items()}
+    canonical = json.dumps(
+        {"data": snapshot, "prompt": prompt_version, "params": params},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class InsightsCache:
+    """Persistent cache of AI insights with a time-to-live"""
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or os.getenv("AI_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.ttl = float(os.getenv("AI_CACHE_TTL", DEFAULT_TTL)) if ttl is None else ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key):
+        """Return (text, created) for a fresh entry, or None"""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            row = self.conn.execute("SELECT text, created FROM insights WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row
+
+    def put(self, key, text):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO insights (key, text, created) VALUES (?, ?, ?)",
+                (key, text, time.time())
+            )
+            # Expired entries are never served again, so drop them on write
+            self.conn.execute("DELETE FROM insights WHERE created < ?", (time.time() - self.ttl,))
+
+    def invalidate(self, key):
+        with self._lock:
+            self.conn.execute("DELETE FROM insights WHERE key = ?", (key,))
@@ -0,0 +1,288 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Default location of the expense ledger (override with EXPENSE_DB_PATH)
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "expenses.db")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Orderings page_expenses accepts, as the columns to sort on (id breaks ties). Each
+# is walked in index order, with or without a category filter: category pages go
+# through idx_expenses_category_ts, whose rows end with the id
+SORT_COLUMNS = {"ts": ("ts",), "amount": ("amount",), "category": ("category", "ts")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    category TEXT NOT NULL,
+    department TEXT NOT NULL,
+    amount REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT 'manual'
+);
+DROP INDEX IF EXISTS idx_expenses_category;
+CREATE INDEX IF NOT EXISTS idx_expenses_department ON expenses(department);
+CREATE INDEX IF NOT EXISTS idx_expenses_ts ON expenses(ts);
+CREATE INDEX IF NOT EXISTS idx_expenses_amount ON expenses(amount);
+-- Per-category browsing walks these in order instead of sorting the category's rows
+CREATE INDEX IF NOT EXISTS idx_expenses_category_ts ON expenses(category, ts);
+CREATE INDEX IF NOT EXISTS idx_expenses_category_amount ON expenses(category, amount);
+
+CREATE TABLE IF NOT EXISTS category_totals (
+    category TEXT PRIMARY KEY,
+    department TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_expenses_totals AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO category_totals (category, department, total, count)
+    VALUES (NEW.category, NEW.department, NEW.amount, 1)
+    ON CONFLICT(category) DO UPDATE SET
+        department = NEW.department,
+        total = total + NEW.amount,
+        count = count + 1;
+END;
+
+-- Per-day, per-category totals: the source of the day/week/month/quarter/year rollups
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_expenses_daily AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO daily_totals (day, category, total, count)
+    VALUES (substr(NEW.ts, 1, 10), NEW.category, NEW.amount, 1)
+    ON CONFLICT(day, category) DO UPDATE SET
+        total = total + NEW.amount,
+        count = count + 1;
+END;
+
+-- Every budget alert that fired, and the highest tier each rule has alerted on
+CREATE TABLE IF NOT EXISTS alert_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    tier REAL NOT NULL,
+    spent REAL NOT NULL,
+    budget REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alert_state (
+    rule TEXT PRIMARY KEY,
+    tier REAL NOT NULL
+);
+"""
+
+
+class Ledger:
+    """Durable SQLite store holding one timestamped row per expense"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("EXPENSE_DB_PATH", DEFAULT_DB_PATH)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps readers unblocked; NORMAL sync is durable across app crashes
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._backfill_daily_totals()
+
+    def _backfill_daily_totals(self):
+        """Fill daily_totals in one pass when it doesn't cover every expense (e.g. a ledger from before it existed)"""
+        with self._lock:
+            daily = self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM daily_totals").fetchone()[0]
+            expenses = self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM category_totals").fetchone()[0]
+        if daily != expenses:
+            self.rebuild_daily_totals()
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes inside a single BEGIN/COMMIT"""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def add_expenses(self, rows):
+        """Insert many (category, department, amount, timestamp, source) rows in one transaction
+
+        timestamp may be None (now), a datetime or an already formatted string.
+        Returns the number of rows written.
+        """
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        records = []
+        for category, department, amount, timestamp, source in rows:
+            if timestamp is None:
+                timestamp = now
+            elif isinstance(timestamp, datetime):
+                timestamp = timestamp.strftime(TIMESTAMP_FORMAT)
+            records.append((timestamp, category, department, float(amount), source or "manual"))
+
+        if not records:
+            return 0
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO expenses (ts, category, department, amount, source) VALUES (?, ?, ?, ?, ?)",
+                records
+            )
+        return len(records)
+
+    def add_expense(self, category, department, amount, timestamp=None, source="manual"):
+        """Insert a single expense row"""
+        return self.add_expenses([(category, department, amount, timestamp, source)])
+
+    def load_totals(self):
+        """Return {category: total} from the maintained totals table (no history scan)"""
+        with self._lock:
+            rows = self.conn.execute("SELECT category, total FROM category_totals").fetchall()
+        return {category: total for category, total in rows}
+
+    def load_daily_totals(self):
+        """Return (day, category, total) rows from the maintained per-day table"""
+        with self._lock:
+            return self.conn.execute("SELECT day, category, total FROM daily_totals").fetchall()
+
+    def iter_expenses(self, category=None, department=None, start=None, end=None):
+        """Yield (id, ts, category, department, amount, source) rows in time order"""
+        query = "SELECT id, ts, category, department, amount, source FROM expenses WHERE 1=1"
+        params = []
+        if category:
+            query += " AND category = ?"
+            params.append(category)
+        if department:
+            query += " AND department = ?"
+            params.append(department)
+        if start:
+            query += " AND ts >= ?"
+            params.append(start)
+        if end:
+            query += " AND ts < ?"
+            params.append(end)
+        query += " ORDER BY ts, id"
+
+        cursor = self.conn.execute(query, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            yield from rows
+
+    def count_expenses(self, category=None):
+        """Number of expense rows, optionally for one category"""
+        with self._lock:
+            if category:
+                row = self.conn.execute("SELECT count FROM category_totals WHERE category = ?", (category,)).fetchone()
+                return row[0] if row else 0
+            return self.conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+    def page_expenses(self, offset, limit, sort="ts", descending=False, category=None):
+        """Return up to limit (id, ts, category, department, amount, source) rows starting at offset
+
+        Rows are ordered by one of SORT_COLUMNS (then id), so the same
+        offset always addresses the same row while the ledger is unchanged.
+        """
+        direction = "DESC" if descending else "ASC"
+        order = ", ".join(f"{column} {direction}" for column in SORT_COLUMNS[sort] + ("id",))
+        query = "SELECT id, ts, category, department, amount, source FROM expenses"
+        params = []
+        if category:
+            query += " WHERE category = ?"
+            params.append(category)
+        query += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend((limit, offset))
+        with self._lock:
+            return self.conn.execute(query, params).fetchall()
+
+    def load_month_columns(self, start=None, end=None):
+        """Return (rows, category_names) for time-series aggregation
+
+        rows are (month_index, category_id, total) tuples, one per month and
+        category, with month_index = year * 12 + month - 1; category_names
+        maps each category_id back to its name. They are summed from
+        daily_totals, so the result stays small however many expenses there
+        are. start and end bound the days ("YYYY-MM-DD", end exclusive).
+        """
+        query = ("SELECT CAST(substr(d.day, 1, 4) AS INTEGER) * 12 + CAST(substr(d.day, 6, 2) AS INTEGER) - 1 AS month, "
+                 "t.rowid, SUM(d.total) FROM daily_totals d JOIN category_totals t ON t.category = d.category WHERE 1=1")
+        params = []
+        if start:
+            query += " AND d.day >= ?"
+            params.append(start[:10])
+        if end:
+            query += " AND d.day < ?"
+            params.append(end[:10])
+        query += " GROUP BY month, t.rowid"
+        with self._lock:
+            names = dict(self.conn.execute("SELECT rowid, category FROM category_totals").fetchall())
+            return self.conn.execute(query, params).fetchall(), names
+
+    def record_alerts(self, fired, states, timestamp=None):
+        """Append fired (rule, tier, spent, budget, message) alerts to the history and save rule states
+
+        states maps rule -> highest alerted tier; a tier of 0 clears the rule.
+        """
+        timestamp = (timestamp or datetime.now()).strftime(TIMESTAMP_FORMAT)
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO alert_history (ts, rule, tier, spent, budget, message) VALUES (?, ?, ?, ?, ?, ?)",
+                [(timestamp,) + tuple(alert) for alert in fired]
+            )
+            conn.executemany(
+                "INSERT INTO alert_state (rule, tier) VALUES (?, ?) ON CONFLICT(rule) DO UPDATE SET tier = excluded.tier",
+                [(rule, tier) for rule, tier in states.items() if tier]
+            )
+            conn.executemany("DELETE FROM alert_state WHERE rule = ?",
+                             [(rule,) for rule, tier in states.items() if not tier])
+
+    def load_alert_state(self):
+        """Return {rule: highest alerted tier}"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT rule, tier FROM alert_state").fetchall())
+
+    def alert_history(self, limit=100):
+        """Return the latest (ts, rule, tier, spent, budget, message) alerts, newest first"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT ts, rule, tier, spent, budget, message FROM alert_history ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+    def rebuild_totals(self):
+        """Recompute the totals table from the raw expense rows"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM category_totals")
+            conn.execute(
+                """INSERT INTO category_totals (category, department, total, count)
+                   SELECT category, MAX(department), SUM(amount), COUNT(*)
+                   FROM expenses GROUP BY category"""
+            )
+        self.rebuild_daily_totals()
+
+    def rebuild_daily_totals(self):
+        """Recompute the per-day totals from the raw expense rows"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM daily_totals")
+            conn.execute(
+                """INSERT INTO daily_totals (day, category, total, count)
+                   SELECT substr(ts, 1, 10), category, SUM(amount), COUNT(*)
+                   FROM expenses GROUP BY substr(ts, 1, 10), category"""
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
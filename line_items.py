@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+BLOCK_SIZE = 500
+MAX_BLOCKS = 32
+
+
+class ExpensePager:
+    """Random access to ledger rows in one sort order, fetched in cached blocks
+
+    A view only ever asks for the handful of rows on screen; those are read
+    from the ledger a block at a time (LIMIT/OFFSET over an index), and the
+    most recently used blocks are kept so scrolling back and forth is free.
+    """
+
+    def __init__(self, ledger, sort="ts", descending=True, category=None,
+                 block_size=BLOCK_SIZE, max_blocks=MAX_BLOCKS):
+        self.ledger = ledger
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.sort = sort
+        self.descending = descending
+        self.category = category
+        self._blocks = OrderedDict()
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.ledger.count_expenses(self.category)
+        return self._count
+
+    def set_order(self, sort, descending):
+        self.sort, self.descending = sort, descending
+        self._blocks.clear()
+
+    def set_category(self, category):
+        self.category = category or None
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget cached rows and the row count (call after expenses change)"""
+        self._blocks.clear()
+        self._count = None
+
+    def _block(self, index):
+        if index in self._blocks:
+            self._blocks.move_to_end(index)
+            return self._blocks[index]
+        rows = self.ledger.page_expenses(index * self.block_size, self.block_size,
+                                         sort=self.sort, descending=self.descending, category=self.category)
+        self._blocks[index] = rows
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def rows(self, start, count):
+        """Return the rows at positions [start, start + count)"""
+        start = max(0, start)
+        result = []
+        position = start
+        end = min(start + count, len(self))
+        while position < end:
+            index, skip = divmod(position, self.block_size)
+            block = self._block(index)
+            if not block:
+                break
+            chunk = block[skip:skip + end - position]
+            result.extend(chunk)
+            position += len(chunk)
+        return result
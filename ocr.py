@@ -0,0 +1,250 @@
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+import pytesseract
+from ocr_cache import OCRCache, make_key
+from ocr_engines import get_engine_pool, init_worker_pool
+from preprocess import configured_stages, preprocess
+
+# Path to the Tesseract executable (change this or set TESSERACT_CMD if needed)
+pytesseract.pytesseract.tesseract_cmd = os.getenv(
+    "TESSERACT_CMD", r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff")
+
+# Bump whenever extract_total_amounts changes so cached texts get re-parsed
+PARSER_VERSION = 2
+
+# "roi" finds TOTAL lines with a fast low-res pass and re-reads only those
+# regions; "full" OCRs the whole receipt (override with OCR_MODE)
+DEFAULT_MODE = "roi"
+ROI_FAST_PASS_SIDE = 1200
+ROI_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789.,"
+
+# TOTAL / GRAND TOTAL / TOTAL: but not SUBTOTAL or item codes containing "TOTAL"
+TOTAL_TOKEN_PATTERN = re.compile(r'^(GRAND)?TOTAL\W*$', re.IGNORECASE)
+# A word that turns the TOTAL after it into a subtotal when OCR splits them ("SUB TOTAL", "SUB- TOTAL")
+SUB_TOKEN_PATTERN = re.compile(r'^SUB\W*$', re.IGNORECASE)
+# The same on a whole line: TOTAL as a word (digits may follow directly), not SUBTOTAL / SUB TOTAL / SUB-TOTAL
+TOTAL_LINE_PATTERN = re.compile(r'(?:(?<![A-Z])GRAND ?|(?<![A-Z])(?<!SUB[ -]))TOTAL(?![A-Z])', re.IGNORECASE)
+
+_cache = None
+_tesseract_version = None
+
+
+class OCRError(Exception):
+    """Raised when a bill image cannot be turned into a total amount"""
+
+
+def extract_total_amounts(text):
+    """Return every amount found on lines containing the word "TOTAL" (not SUBTOTAL)"""
+    # Filter sentences containing the keyword "TOTAL"
+    sentences = text.split('\n')
+    total_sentences = [sentence for sentence in sentences if TOTAL_LINE_PATTERN.search(sentence)]
+
+    # Extract and store the numerical part of the filtered sentences
+    total_amounts = []
+    for sentence in total_sentences:
+        # Use regular expression to extract numerical part (including commas)
+        total_amount = re.search(r'[\d,]+\.*\d*', sentence.replace(',', ''))
+        if total_amount:
+            total_amounts.append(float(total_amount.group()))
+    return total_amounts
+
+
+def get_cache():
+    """Return this process's OCR cache, or None if disabled with OCR_CACHE_MAX_MB=0"""
+    global _cache
+    if _cache is None and float(os.getenv("OCR_CACHE_MAX_MB", "1")) > 0:
+        _cache = OCRCache()
+    return _cache
+
+
+def tesseract_version():
+    global _tesseract_version
+    if _tesseract_version is None:
+        _tesseract_version = get_engine_pool().version()
+    return _tesseract_version
+
+
+def configured_mode():
+    mode = os.getenv("OCR_MODE", DEFAULT_MODE).strip().lower()
+    if mode not in ("roi", "full"):
+        raise ValueError(f"Unknown OCR_MODE: {mode}")
+    return mode
+
+
+def find_total_regions(img, engine, padding=0.5, config=""):
+    """Fast low-resolution pass: return full-resolution boxes right of each TOTAL token
+
+    Each box spans from the end of the TOTAL word to the right edge of the
+    image, on the token's line, padded vertically by `padding` line heights.
+    config is the caller's tesseract config; the page segmentation mode is
+    always sparse text.
+    """
+    scale = min(1.0, ROI_FAST_PASS_SIDE / float(max(img.size)))
+    small = img if scale == 1.0 else img.resize(
+        (max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.Resampling.BILINEAR
+    )
+    data = engine.image_to_data(small, config=f"{config} --psm 11".strip())
+
+    regions = []
+    previous = None  # index of the last non-empty token
+    for i, token in enumerate(data["text"]):
+        token = token.strip()
+        if not token:
+            continue
+        before, previous = previous, i
+        if not TOTAL_TOKEN_PATTERN.match(token):
+            continue
+        if before is not None and SUB_TOKEN_PATTERN.match(data["text"][before].strip()) and _same_line(data, before, i):
+            continue  # "SUB TOTAL" read as two words
+        left, top = data["left"][i] / scale, data["top"][i] / scale
+        width, height = data["width"][i] / scale, data["height"][i] / scale
+        pad = height * padding
+        regions.append((
+            int(left + width), max(0, int(top - pad)),
+            img.width, min(img.height, int(top + height + pad))
+        ))
+    return regions
+
+
+def _same_line(data, i, j):
+    """Whether two image_to_data words sit on one text line: vertical centres under half a word height apart
+
+    Positions rather than line numbers, since sparse-text mode (--psm 11)
+    often puts every word in a block of its own.
+    """
+    centre_i = data["top"][i] + data["height"][i] / 2
+    centre_j = data["top"][j] + data["height"][j] / 2
+    return abs(centre_i - centre_j) < max(data["height"][i], data["height"][j]) / 2
+
+
+def ocr_total_regions(img, regions, engine, config=""):
+    """Re-OCR each TOTAL region at full resolution with a numeric whitelist
+
+    ROI_CONFIG is appended to the caller's config, so its single-line mode
+    and whitelist win over any the caller sets.
+    """
+    config = f"{config} {ROI_CONFIG}".strip()
+    lines = []
+    for box in regions:
+        digits = engine.image_to_string(img.crop(box), config=config).strip()
+        if digits:
+            # Keep the "TOTAL <amount>" shape so cached text parses like a full page
+            lines.append(f"TOTAL {digits}")
+    return "\n".join(lines)
+
+
+def run_ocr(img, config="", stages=None, mode=None):
+    """Preprocess a PIL image and OCR it in the given mode, returning text"""
+    img = preprocess(img, stages)
+    with get_engine_pool().engine() as engine:
+        if (mode or configured_mode()) == "roi":
+            regions = find_total_regions(img, engine, config=config)
+            if regions:
+                text = ocr_total_regions(img, regions, engine, config)
+                if text:
+                    return text
+            # No TOTAL token found on the fast pass: fall back to the whole page
+        return engine.image_to_string(img, config=config)
+
+
+def ocr_image(image_path, config="", stages=None, mode=None):
+    """Preprocess an image, run tesseract on it and return the raw text"""
+    with Image.open(image_path) as img:
+        return run_ocr(img, config, stages, mode)
+
+
+def read_bill(image_path, config="", stages=None, mode=None):
+    """Return (text, total_amounts) for a bill, skipping OCR on a cache hit"""
+    if stages is None:
+        stages = configured_stages()
+    mode = mode or configured_mode()
+    cache = get_cache()
+    if cache is None:
+        text = ocr_image(image_path, config, stages, mode)
+        return text, extract_total_amounts(text)
+
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    # Preprocessing and OCR mode change the output, so both are part of the cache key
+    key = make_key(image_bytes, tesseract_version(), f"{config}|pre={','.join(stages)}|mode={mode}")
+
+    cached = cache.get(key)
+    if cached is not None:
+        text, total_amounts, parser_version = cached
+        if parser_version != PARSER_VERSION:
+            # Parser changed since this entry was stored: re-parse, don't re-OCR
+            total_amounts = extract_total_amounts(text)
+            cache.update_amounts(key, total_amounts, PARSER_VERSION)
+        return text, total_amounts
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        text = run_ocr(img, config, stages, mode)
+    total_amounts = extract_total_amounts(text)
+    cache.put(key, text, total_amounts, PARSER_VERSION)
+    return text, total_amounts
+
+
+def extract_total(image_path):
+    """OCR a bill and return its largest TOTAL amount, raising OCRError if none is found"""
+    _, total_amounts = read_bill(image_path)
+    if not total_amounts:
+        raise OCRError("No total amount found in the image.")
+    return max(total_amounts)
+
+
+def find_bill_images(folder):
+    """List the image files in a folder, sorted by name"""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def _init_worker():
+    """Process pool initializer: warm one engine per worker before the first bill"""
+    init_worker_pool(size=1)
+
+
+def _ocr_job(image_path, category):
+    """Process pool worker: returns (image_path, category, amount, error)"""
+    try:
+        return image_path, category, extract_total(image_path), None
+    except Exception as e:
+        return image_path, category, None, str(e)
+
+
+def batch_ocr(items, max_workers=None, progress=None):
+    """OCR many (image_path, category) pairs across all cores
+
+    progress, if given, is called as progress(done, total, index, result)
+    after each file, index being the item's position in items. Returns the
+    results in the same order as items; each result is an (image_path,
+    category, amount, error) tuple with either amount or error set.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(items)), initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(_ocr_job, image_path, category): i
+            for i, (image_path, category) in enumerate(items)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                image_path, category = items[i]
+                results[i] = (image_path, category, None, str(e))
+            if progress:
+                progress(done, len(items), i, results[i])
+    return results
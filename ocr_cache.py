@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default location and size of the OCR cache (override with OCR_CACHE_PATH / OCR_CACHE_MAX_MB)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_cache.db")
+DEFAULT_MAX_MB = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    amounts TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def make_key(image_bytes, engine_version, config=""):
+    """Content address for an OCR result: image bytes + engine version + config"""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(b"\0" + str(engine_version).encode() + b"\0" + config.encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """On-disk, size-bounded LRU cache of OCR text and the amounts parsed from it
+
+    Safe to share between the processes of a batch scan: SQLite serialises the
+    writes and the hit/miss counters live in the database.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.getenv("OCR_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("OCR_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _bump(self, name, amount=1):
+        self.conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key):
+        """Return (text, amounts, parser_version) for a key, or None on a miss"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT text, amounts, parser_version FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._bump("misses")
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._bump("hits")
+        text, amounts, parser_version = row
+        return text, json.loads(amounts), parser_version
+
+    def put(self, key, text, amounts, parser_version):
+        """Store an OCR result, evicting least recently used entries if over size"""
+        size = len(text.encode("utf-8")) + len(key)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, text, amounts, parser_version, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, json.dumps(amounts), parser_version, size, time.time())
+            )
+            self._evict()
+
+    def update_amounts(self, key, amounts, parser_version):
+        """Replace the parsed amounts for a cached text (after a parser change)"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE entries SET amounts = ?, parser_version = ? WHERE key = ?",
+                (json.dumps(amounts), parser_version, key)
+            )
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._bump("evictions", evicted)
+
+    def stats(self):
+        """Return hit/miss/eviction counters plus the current entry count and size"""
+        with self._lock:
+            stats = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        stats.update(entries=entries, bytes=size)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("UPDATE stats SET value = 0")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
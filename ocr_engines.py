@@ -0,0 +1,185 @@
+import os
+import shlex
+import threading
+from contextlib import contextmanager
+from queue import Queue
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # Optional: falls back to one tesseract subprocess per call
+    tesserocr = None
+
+# "auto" uses tesserocr when installed, otherwise the pytesseract subprocess path
+# (override with OCR_BACKEND=subprocess|tesserocr)
+DEFAULT_BACKEND = "auto"
+
+
+def parse_config(config):
+    """Split a tesseract command-line config into (psm, {variable: value})"""
+    psm = None
+    variables = {}
+    args = shlex.split(config or "")
+    i = 0
+    while i < len(args):
+        if args[i] == "--psm" and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif args[i] == "-c" and i + 1 < len(args):
+            name, _, value = args[i + 1].partition("=")
+            variables[name] = value
+            i += 1
+        i += 1
+    return psm, variables
+
+
+class SubprocessEngine:
+    """pytesseract backend: forks tesseract and reloads the model on every call"""
+
+    name = "subprocess"
+
+    def version(self):
+        return str(pytesseract.get_tesseract_version())
+
+    def image_to_string(self, img, config=""):
+        return pytesseract.image_to_string(img, config=config)
+
+    def image_to_data(self, img, config=""):
+        return pytesseract.image_to_data(img, config=config, output_type=pytesseract.Output.DICT)
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """In-process tesseract API kept initialised between calls"""
+
+    name = "tesserocr"
+
+    def __init__(self, lang="eng"):
+        self.api = tesserocr.PyTessBaseAPI(lang=lang)
+        self.default_psm = self.api.GetPageSegMode()
+
+    def version(self):
+        return f"tesserocr-{tesserocr.tesseract_version().split()[1]}"
+
+    @contextmanager
+    def _configured(self, img, config):
+        psm, variables = parse_config(config)
+        # Remember what each variable was (None for ones tesseract doesn't know) so it can be put back
+        saved = {name: self.api.GetVariableAsString(name) for name in variables}
+        self.api.SetPageSegMode(psm if psm is not None else self.default_psm)
+        try:
+            for name, value in variables.items():
+                self.api.SetVariable(name, value)
+            self.api.SetImage(img)
+            yield self.api
+        finally:
+            # Restore the previous values so the next bill sees a clean engine
+            for name, value in saved.items():
+                if value is not None:
+                    self.api.SetVariable(name, value)
+            self.api.Clear()
+
+    def image_to_string(self, img, config=""):
+        with self._configured(img, config) as api:
+            return api.GetUTF8Text()
+
+    def image_to_data(self, img, config=""):
+        """Word boxes in the same dict-of-lists shape as pytesseract's Output.DICT"""
+        data = {"text": [], "left": [], "top": [], "width": [], "height": [], "conf": []}
+        with self._configured(img, config) as api:
+            api.Recognize()
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(api.GetIterator(), level):
+                box = word.BoundingBox(level)
+                if box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                data["text"].append(word.GetUTF8Text(level) or "")
+                data["left"].append(x1)
+                data["top"].append(y1)
+                data["width"].append(x2 - x1)
+                data["height"].append(y2 - y1)
+                data["conf"].append(word.Confidence(level))
+        return data
+
+    def close(self):
+        self.api.End()
+
+
+def configured_backend():
+    backend = os.getenv("OCR_BACKEND", DEFAULT_BACKEND).strip().lower()
+    if backend == "auto":
+        return "tesserocr" if tesserocr is not None else "subprocess"
+    if backend == "tesserocr" and tesserocr is None:
+        raise ValueError("OCR_BACKEND=tesserocr but the tesserocr package is not installed")
+    if backend not in ("tesserocr", "subprocess"):
+        raise ValueError(f"Unknown OCR_BACKEND: {backend}")
+    return backend
+
+
+def create_engine(backend=None):
+    if (backend or configured_backend()) == "tesserocr":
+        return TesserocrEngine()
+    return SubprocessEngine()
+
+
+class EnginePool:
+    """Fixed-size pool of pre-initialised OCR engines shared across bills"""
+
+    def __init__(self, size=None, backend=None):
+        self.backend = backend or configured_backend()
+        self.size = size or os.cpu_count() or 1
+        self._engines = Queue()
+        self._all = []
+        for _ in range(self.size):
+            engine = create_engine(self.backend)
+            self._all.append(engine)
+            self._engines.put(engine)
+
+    @contextmanager
+    def engine(self):
+        """Check out an engine for exclusive use"""
+        engine = self._engines.get()
+        try:
+            yield engine
+        finally:
+            self._engines.put(engine)
+
+    def version(self):
+        with self.engine() as engine:
+            return engine.version()
+
+    def close(self):
+        for engine in self._all:
+            engine.close()
+        self._all = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_engine_pool(size=None):
+    """Return this process's engine pool, creating it on first use
+
+    The pool is sized to the core count unless OCR_POOL_SIZE or size says
+    otherwise; batch worker processes each get a pool of one (see
+    init_worker_pool).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = size or int(os.getenv("OCR_POOL_SIZE", "0")) or None
+            _pool = EnginePool(size)
+        return _pool
+
+
+def init_worker_pool(size=1):
+    """Give a new worker process its own pool, replacing any it inherited from the parent on fork"""
+    global _pool, _pool_lock
+    # A forked child also inherits the lock in whatever state another parent thread left it
+    _pool_lock = threading.Lock()
+    _pool = EnginePool(size)
+    return _pool
@@ -0,0 +1,101 @@
+import threading
+from datetime import date, datetime, timedelta
+
+# Time buckets rolled up for every hierarchy node, finest first
+PERIODS = ("day", "week", "month", "quarter", "year")
+
+
+def period_key(period, day):
+    """Bucket label of a date: 2024-05-17, week of 2024-05-13 (its Monday), 2024-05, 2024-Q2, 2024"""
+    if period == "day":
+        return day.isoformat()
+    if period == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if period == "month":
+        return f"{day.year:04d}-{day.month:02d}"
+    if period == "quarter":
+        return f"{day.year:04d}-Q{(day.month - 1) // 3 + 1}"
+    if period == "year":
+        return f"{day.year:04d}"
+    raise ValueError(f"Unknown period: {period}")
+
+
+def quarter_key(year, quarter):
+    return f"{year:04d}-Q{quarter}"
+
+
+def as_date(timestamp):
+    """The calendar day of a datetime, date, "YYYY-MM-DD..." string or None (today)"""
+    if timestamp is None:
+        return date.today()
+    if isinstance(timestamp, datetime):
+        return timestamp.date()
+    if isinstance(timestamp, date):
+        return timestamp
+    return date.fromisoformat(timestamp[:10])
+
+
+class PeriodRollups:
+    """Spending per hierarchy node in every day/week/month/quarter/year bucket
+
+    buckets[(period, key)] is a sparse {node id: total}, so reading a
+    department's month or the company's quarter is a dict lookup. Adding an
+    expense touches one bucket per period along the category's ancestor
+    path; batches are grouped by (category, day) first, so a bulk import
+    only fans out once per distinct pair.
+    """
+
+    def __init__(self, hierarchy):
+        self._lock = threading.Lock()
+        self.hierarchy = hierarchy
+        self.buckets = {}
+        self._keys = {}  # date -> ((period, key), ...) cache
+
+    def _bucket_keys(self, day):
+        keys = self._keys.get(day)
+        if keys is None:
+            keys = self._keys[day] = tuple((period, period_key(period, day)) for period in PERIODS)
+        return keys
+
+    def _add(self, category, day, amount):
+        path = self.hierarchy.path(category)
+        for key in self._bucket_keys(day):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = {}
+            for node in path:
+                bucket[node] = bucket.get(node, 0.0) + amount
+
+    def add_batch(self, expenses):
+        """Add (category, amount, timestamp) expenses"""
+        grouped = {}
+        for category, amount, timestamp in expenses:
+            key = (category, as_date(timestamp))
+            grouped[key] = grouped.get(key, 0.0) + amount
+        with self._lock:
+            for (category, day), amount in grouped.items():
+                self._add(category, day, amount)
+
+    def load(self, daily_rows):
+        """Rebuild every bucket from (day string, category, total) rows, e.g. Ledger.load_daily_totals()"""
+        with self._lock:
+            self.buckets = {}
+            for day, category, total in daily_rows:
+                if category in self.hierarchy.paths:
+                    self._add(category, date.fromisoformat(day), total)
+
+    def total(self, period, key, node=None):
+        """Spending of a node (default: the whole company) in one bucket"""
+        bucket = self.buckets.get((period, key))
+        if not bucket:
+            return 0.0
+        return bucket.get(self.hierarchy.root if node is None else node, 0.0)
+
+    def current(self, period, node=None, today=None):
+        """Spending of a node in the bucket containing today"""
+        return self.total(period, period_key(period, today or date.today()), node)
+
+    def node_totals(self, period, key):
+        """Copy of {node id: total} for one bucket"""
+        with self._lock:
+            return dict(self.buckets.get((period, key), {}))
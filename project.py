@@ -1,210 +1,145 @@
-import re
-from PIL import Image, ImageTk
-import pytesseract
-import qrcode
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime
-import webbrowser
-import requests
-import json
+from datetime import date, datetime
 import os
 from dotenv import load_dotenv
-import speech_recognition as sr
 import threading 
-import time
+import itertools
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from expense_core import (
+    categories_data, aggregates, ceo_dashboard_data, initialize_ceo_dashboard,
+    open_ledger, record_expense, record_expenses, calculate_totals,
+    verify_aggregates, export_totals, export_expenses, expense_listeners, get_ledger,
+    resolve_category, load_hierarchy, period_spent, month_node_totals, update_savings_goals
+)
+
+# Heavy dependencies (PIL, qrcode, matplotlib, pytesseract via ocr, requests via
+# ai_client, speech_recognition) are imported inside the functions that use them
+# so the main window appears without paying for them up front.
 
 # Load environment variables
 load_dotenv()
 
-# Initialize global variables with additional categories
-categories_data = {
-    "Food": [],
-    "Health": [],
-    "Monthly Bills": [],
-    "EMI": [],
-    "Shopping": [],
-    "Entertainment": [],
-    "Education": [],
-    "Insurance": [],
-    "Travel": [],
-    "Office Supplies": [],
-    "Utilities": [],
-    "Maintenance": [],
-    "Marketing": [],
-    "Software": [],
-    "Hardware": []
-}
-
-# Path to the Tesseract executable (change this if needed)
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-# Global variable for selected image path
-selected_image_path = None
+# Background OCR jobs: workers post (job_id, amount, error) to ocr_results,
+# which check_ocr_jobs drains on the Tk thread
+ocr_executor = None
+ocr_jobs = {}
+ocr_results = Queue()
+ocr_job_ids = itertools.count(1)
+
+# The open pie chart window, its chart and canvas (refreshed when expenses are added)
+pie_chart_window = {"window": None, "chart": None, "canvas": None}
+
+# The open monthly trends window (same shape, plus its rolling-window setting)
+trend_chart_window = {"window": None, "chart": None, "canvas": None, "window_months": None}
 
 # Voice recognition variables
-voice_queue = Queue()
+voice_dispatcher = None  # voice_dispatch.VoiceDispatcher, wakes the Tk loop with <<VoiceCommand>>
+voice_partial = ""  # Transcript so far of the utterance being spoken
 is_listening = False
-recognizer = sr.Recognizer()
-microphone = sr.Microphone()
-
-# CEO Dashboard data
-ceo_dashboard_data = {
-    "monthly_budget": 100000,  # Default budget
-    "department_spending": {},
-    "alerts": [],
-    "savings_goals": {}
-}
-
-def initialize_ceo_dashboard():
-    """Initialize default CEO dashboard data"""
-    ceo_dashboard_data["department_spending"] = {
-        "HR": {"budget": 20000, "spent": 0},
-        "IT": {"budget": 30000, "spent": 0},
-        "Marketing": {"budget": 25000, "spent": 0},
-        "Operations": {"budget": 25000, "spent": 0}
-    }
-    ceo_dashboard_data["savings_goals"] = {
-        "Q1": {"target": 50000, "saved": 0},
-        "Q2": {"target": 60000, "saved": 0},
-        "Q3": {"target": 70000, "saved": 0},
-        "Q4": {"target": 80000, "saved": 0}
-    }
+recognizer = None
+microphone = None  # Opened by init_voice() the first time voice control is enabled
+speech_backend = None  # Offline or web recogniser chosen by speech_backends (VOICE_BACKEND)
+intent_parser = None  # voice_intents.IntentParser, compiled on the first command
 
 def ocr_and_filter_total(image_path, category_name):
+    import ocr
     try:
-        # Perform OCR on the image
-        text = pytesseract.image_to_string(Image.open(image_path))
-        
-        # Filter sentences containing the keyword "TOTAL"
-        sentences = text.split('\n')
-        total_sentences = [sentence for sentence in sentences if 'TOTAL' in sentence.upper()]
-        
-        # Extract and store the numerical part of the filtered sentences
-        total_amounts = []
-        for sentence in total_sentences:
-            # Use regular expression to extract numerical part (including commas)
-            total_amount = re.search(r'[\d,]+\.*\d*', sentence.replace(',', ''))
-            if total_amount:
-                total_amounts.append(float(total_amount.group()))
-
-        if not total_amounts:
-            messagebox.showerror("Error", "No total amount found in the image.")
-            return False
-
-        max_amount = max(total_amounts)
-        categories_data[category_name].append(max_amount)
-        
-        # Update CEO dashboard
-        update_ceo_dashboard(category_name, max_amount)
-        
-        # Add timestamp to the expense
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        messagebox.showinfo("Success", f"Bill of ₹{max_amount:.2f} added successfully to {category_name} at {timestamp}")
-        return True
-        
+        # Perform OCR on the image and keep the largest TOTAL amount
+        max_amount = ocr.extract_total(image_path)
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to process image: {str(e)}")
+        return apply_ocr_result(category_name, None, e)
+    return apply_ocr_result(category_name, max_amount, None)
+
+def apply_ocr_result(category_name, max_amount, error):
+    """Record an OCR'd bill (or report its error) on the Tk thread"""
+    import ocr
+    if isinstance(error, ocr.OCRError):
+        messagebox.showerror("Error", str(error))
         return False
+    if error is not None:
+        messagebox.showerror("Error", f"Failed to process image: {str(error)}")
+        return False
+    
+    # Store the expense with its timestamp and update CEO dashboard
+    timestamp = record_expense(category_name, max_amount, source="ocr")
+    messagebox.showinfo("Success", f"Bill of ₹{max_amount:.2f} added successfully to {category_name} at {timestamp}")
+    return True
 
-def update_ceo_dashboard(category, amount):
-    """Update CEO dashboard data when new expenses are added"""
-    # Update department spending (simplified mapping)
-    department = "Operations"  # Default department
-    if category in ["Software", "Hardware", "Office Supplies"]:
-        department = "IT"
-    elif category in ["Marketing"]:
-        department = "Marketing"
-    elif category in ["Health", "Insurance"]:
-        department = "HR"
-
-    if department in ceo_dashboard_data["department_spending"]:
-        ceo_dashboard_data["department_spending"][department]["spent"] += amount
-    
-    # Check for budget alerts
-    check_budget_alerts()
-    
-    # Update savings (simplified - assumes savings is budget minus spent)
-    quarter = "Q" + str((datetime.now().month - 1) // 3 + 1)
-    if quarter in ceo_dashboard_data["savings_goals"]:
-        total_spent = sum(sum(expenses) for expenses in categories_data.values())
-        ceo_dashboard_data["savings_goals"][quarter]["saved"] = ceo_dashboard_data["monthly_budget"] - total_spent
-
-def check_budget_alerts():
-    """Check for budget overruns and add alerts"""
-    ceo_dashboard_data["alerts"] = []
-    for dept, data in ceo_dashboard_data["department_spending"].items():
-        if data["spent"] > data["budget"]:
-            overage = data["spent"] - data["budget"]
-            ceo_dashboard_data["alerts"].append(
-                f"Budget overrun in {dept}: ₹{overage:.2f} over budget"
-            )
+def submit_ocr_job(image_path, category, on_done=None):
+    """Queue a bill for OCR on a worker thread and return its job id
     
-    # Check overall budget
-    total_spent = sum(sum(expenses) for expenses in categories_data.values())
-    if total_spent > ceo_dashboard_data["monthly_budget"]:
-        overage = total_spent - ceo_dashboard_data["monthly_budget"]
-        ceo_dashboard_data["alerts"].append(
-            f"Company-wide budget overrun: ₹{overage:.2f} over monthly budget"
-        )
+    on_done(success) is called on the Tk thread once the bill is recorded.
+    """
+    global ocr_executor
+    if ocr_executor is None:
+        ocr_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr")
+    
+    job_id = next(ocr_job_ids)
+    cancelled = threading.Event()
+    
+    def run():
+        import ocr
+        if cancelled.is_set():
+            return
+        try:
+            ocr_results.put((job_id, ocr.extract_total(image_path), None))
+        except Exception as e:
+            ocr_results.put((job_id, None, e))
+    
+    ocr_jobs[job_id] = {
+        "category": category,
+        "cancelled": cancelled,
+        "future": ocr_executor.submit(run),
+        "on_done": on_done
+    }
+    return job_id
+
+def cancel_ocr_job(job_id):
+    """Cancel a queued job, or discard the result of one already running"""
+    job = ocr_jobs.pop(job_id, None)
+    if job:
+        job["cancelled"].set()
+        job["future"].cancel()
 
-def calculate_totals():
-    return {category: sum(expenses) for category, expenses in categories_data.items()}
+def check_ocr_jobs():
+    """Apply finished OCR jobs periodically"""
+    while not ocr_results.empty():
+        job_id, amount, error = ocr_results.get()
+        job = ocr_jobs.pop(job_id, None)
+        if job is None:
+            continue  # Cancelled while tesseract was running
+        success = apply_ocr_result(job["category"], amount, error)
+        if job["on_done"]:
+            job["on_done"](success)
+    root.after(100, check_ocr_jobs)
 
 def generate_qr_code():
-    totals = calculate_totals()
-    GT = sum(totals.values())
-    qr_data = "=== Expense Summary ===\n"
-    qr_data += "\n".join([f"{category}: ₹{amount:.2f}" for category, amount in totals.items()])
-    qr_data += f"\n\nGrand Total: ₹{GT:.2f}"
-    qr_data += f"\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(qr_data)
-    qr.make(fit=True)
+    """Return (PhotoImages, part texts) for the summary QR code(s)
+    
+    Codes are rendered once per distinct set of totals (see qr_summary); a
+    summary too large for one symbol is split into numbered parts.
+    """
+    from PIL import ImageTk
+    from qr_summary import summary_codes
     
-    img = qr.make_image(fill_color="black", back_color="white")
-    img = img.resize((250, 250), Image.Resampling.LANCZOS)
-    return ImageTk.PhotoImage(img), qr_data
+    _, qr_texts, images = summary_codes(calculate_totals())
+    return [ImageTk.PhotoImage(img) for img in images], qr_texts
 
 def show_pie_chart():
-    totals = calculate_totals()
-    categories = list(totals.keys())
-    amounts = list(totals.values())
-    
-    # Create small slices for zero values so all categories appear
-    amounts = [v if v > 0 else 0.1 for v in amounts]
-    
-    # Create a colorful palette
-    colors = plt.cm.tab20c(range(len(categories)))
-    
-    fig, ax = plt.subplots(figsize=(8, 6))
-    wedges, texts, autotexts = ax.pie(
-        amounts, 
-        labels=categories, 
-        autopct=lambda p: f'{p:.1f}%\n(₹{p * sum(amounts)/100:.2f})' if p > 1 else '',
-        startangle=140,
-        colors=colors,
-        wedgeprops={'linewidth': 1, 'edgecolor': 'white'}
-    )
-    
-    # Hide labels and percentages for zero (actually 0.1) values
-    for i, amount in enumerate(totals.values()):
-        if amount == 0:
-            texts[i].set_visible(False)
-            autotexts[i].set_visible(False)
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from charts import PieChart
+    
+    # Only one chart window is needed: bring the open one forward with fresh data
+    if pie_chart_window["window"] is not None and pie_chart_window["window"].winfo_exists():
+        refresh_pie_chart()
+        pie_chart_window["window"].deiconify()
+        pie_chart_window["window"].lift()
+        return
     
-    ax.axis('equal')
-    ax.set_title('Company Expenditure Distribution', pad=20, fontweight='bold')
-    plt.tight_layout()
+    chart = PieChart()
+    chart.update(calculate_totals())
     
     # Create a new window for the chart
     chart_window = tk.Toplevel()
@@ -218,17 +153,79 @@ def show_pie_chart():
             initialfile=f"expense_chart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
         )
         if filename:
-            fig.savefig(filename, dpi=300, bbox_inches='tight')
+            with open(filename, 'wb') as f:
+                f.write(chart.render_png(dpi=300))
             messagebox.showinfo("Success", f"Chart exported as {filename}")
     
     export_btn = tk.Button(chart_window, text="Export Chart", command=export_chart)
     export_btn.pack(pady=5)
     
-    canvas = FigureCanvasTkAgg(fig, master=chart_window)
+    canvas = FigureCanvasTkAgg(chart.figure, master=chart_window)
     canvas.draw()
     canvas.get_tk_widget().pack()
+    
+    def on_destroy(event):
+        if event.widget is chart_window:
+            chart.close()
+            pie_chart_window.update(window=None, chart=None, canvas=None)
+    
+    chart_window.bind("<Destroy>", on_destroy)
+    pie_chart_window.update(window=chart_window, chart=chart, canvas=canvas)
+
+def refresh_pie_chart():
+    """Move the open pie chart's wedges to the current totals"""
+    if pie_chart_window["chart"] is not None:
+        pie_chart_window["chart"].update(calculate_totals())
+        pie_chart_window["canvas"].draw_idle()
+
+def show_monthly_trends():
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from trends import MonthlyTrendChart
+    
+    if trend_chart_window["window"] is not None and trend_chart_window["window"].winfo_exists():
+        refresh_trend_chart()
+        trend_chart_window["window"].deiconify()
+        trend_chart_window["window"].lift()
+        return
+    
+    chart = MonthlyTrendChart()
+    chart_window = tk.Toplevel()
+    chart_window.title("Monthly Trends")
+    
+    controls = tk.Frame(chart_window)
+    controls.pack(pady=5)
+    tk.Label(controls, text="Rolling average (months):").pack(side=tk.LEFT)
+    window_months = tk.IntVar(value=3)
+    tk.Spinbox(controls, from_=1, to=24, width=4, textvariable=window_months,
+               command=refresh_trend_chart).pack(side=tk.LEFT, padx=5)
+    
+    canvas = FigureCanvasTkAgg(chart.figure, master=chart_window)
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
+    def on_destroy(event):
+        if event.widget is chart_window:
+            chart.close()
+            trend_chart_window.update(window=None, chart=None, canvas=None, window_months=None)
+    
+    chart_window.bind("<Destroy>", on_destroy)
+    trend_chart_window.update(window=chart_window, chart=chart, canvas=canvas, window_months=window_months)
+    refresh_trend_chart()
+
+def refresh_trend_chart():
+    """Re-read the monthly category totals and redraw the open trends chart"""
+    if trend_chart_window["chart"] is None:
+        return
+    try:
+        window = max(1, int(trend_chart_window["window_months"].get()))
+    except (tk.TclError, ValueError):
+        window = 3
+    rows, id_names = get_ledger().load_month_columns()
+    trend_chart_window["chart"].update(rows, id_names, list(categories_data.keys()), window=window)
+    trend_chart_window["canvas"].draw_idle()
 
 def show_summary():
+    # Full reports double as a consistency checkpoint for the running totals
+    verify_aggregates()
     totals = calculate_totals()
     GT = sum(totals.values())
     
@@ -341,17 +338,32 @@ def show_summary():
     qr_frame = tk.Frame(scrollable_frame)
     qr_frame.pack(pady=20)
     
-    qr_img, qr_data = generate_qr_code()
-    qr_label = tk.Label(qr_frame, image=qr_img)
-    qr_label.image = qr_img
+    qr_images, qr_texts = generate_qr_code()
+    qr_label = tk.Label(qr_frame, image=qr_images[0])
+    qr_label.images = qr_images
     qr_label.pack()
     
-    tk.Label(
+    qr_caption = tk.Label(
         qr_frame, 
         text="Scan for expense summary", 
         font=('Helvetica', 8),
         fg='#7f8c8d'
-    ).pack()
+    )
+    qr_caption.pack()
+    
+    if len(qr_images) > 1:
+        qr_part = {"index": 0}
+        
+        def show_qr_part(step):
+            qr_part["index"] = (qr_part["index"] + step) % len(qr_images)
+            qr_label.config(image=qr_images[qr_part["index"]])
+            qr_caption.config(text=f"Scan all parts: {qr_part['index'] + 1} of {len(qr_images)}")
+        
+        qr_nav = tk.Frame(qr_frame)
+        qr_nav.pack()
+        tk.Button(qr_nav, text="◀", command=lambda: show_qr_part(-1)).pack(side=tk.LEFT, padx=5)
+        tk.Button(qr_nav, text="▶", command=lambda: show_qr_part(1)).pack(side=tk.LEFT, padx=5)
+        show_qr_part(0)
     
     # Buttons
     btn_frame = tk.Frame(scrollable_frame)
@@ -366,6 +378,15 @@ def show_summary():
         padx=10
     ).pack(side=tk.LEFT, padx=5)
     
+    tk.Button(
+        btn_frame, 
+        text="Line Items", 
+        command=show_line_items,
+        bg='#34495e',
+        fg='white',
+        padx=10
+    ).pack(side=tk.LEFT, padx=5)
+    
     tk.Button(
         btn_frame, 
         text="Export Data", 
@@ -393,6 +414,145 @@ def show_summary():
         padx=10
     ).pack(side=tk.LEFT, padx=5)
 
+LINE_ITEM_COLUMNS = (
+    # (column id, heading, sort key, width, anchor)
+    ("ts", "Date", "ts", 150, 'w'),
+    ("category", "Category", "category", 140, 'w'),
+    ("department", "Department", None, 110, 'w'),
+    ("amount", "Amount (₹)", "amount", 110, 'e'),
+    ("source", "Source", None, 80, 'w'),
+)
+
+def show_line_items(category=None):
+    """Browse individual expenses; only the rows on screen exist as Treeview items"""
+    from line_items import ExpensePager
+    
+    pager = ExpensePager(get_ledger(), category=category)
+    state = {"first": 0, "visible": 20}
+    
+    items_window = tk.Toplevel()
+    items_window.title("Expense Line Items")
+    items_window.geometry("700x500")
+    
+    top_frame = tk.Frame(items_window)
+    top_frame.pack(fill=tk.X, padx=10, pady=5)
+    tk.Label(top_frame, text="Category:").pack(side=tk.LEFT)
+    category_var = tk.StringVar(value=category or "All")
+    category_box = ttk.Combobox(top_frame, textvariable=category_var, state="readonly",
+                                values=["All"] + list(categories_data.keys()), width=20)
+    category_box.pack(side=tk.LEFT, padx=5)
+    count_label = tk.Label(top_frame, text="", fg='#7f8c8d')
+    count_label.pack(side=tk.RIGHT)
+    
+    table_frame = tk.Frame(items_window)
+    table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    tree = ttk.Treeview(table_frame, columns=[c[0] for c in LINE_ITEM_COLUMNS], show="headings")
+    scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    
+    def render():
+        total = len(pager)
+        first = max(0, min(state["first"], total - state["visible"]))
+        state["first"] = first
+        rows = pager.rows(first, state["visible"])
+        
+        # Reuse a fixed pool of items, one per visible line
+        existing = tree.get_children()
+        for i, (_, ts, cat, department, amount, source) in enumerate(rows):
+            values = (ts, cat, department, f"{amount:.2f}", source)
+            if i < len(existing):
+                tree.item(existing[i], values=values)
+            else:
+                tree.insert("", tk.END, iid=f"row{i}", values=values)
+        if len(existing) > len(rows):
+            tree.delete(*existing[len(rows):])
+        
+        if total:
+            scrollbar.set(first / total, min(1.0, (first + len(rows)) / total))
+            count_label.config(text=f"{first + 1:,}-{first + len(rows):,} of {total:,} expenses")
+        else:
+            scrollbar.set(0.0, 1.0)
+            count_label.config(text="No expenses recorded")
+    
+    def scroll_to(first):
+        state["first"] = int(first)
+        render()
+    
+    def on_scrollbar(action, amount, unit=None):
+        if action == "moveto":
+            scroll_to(float(amount) * len(pager))
+        elif unit == "pages":
+            scroll_to(state["first"] + int(amount) * state["visible"])
+        else:
+            scroll_to(state["first"] + int(amount))
+    
+    def on_wheel(event):
+        if event.num == 4 or event.delta > 0:
+            scroll_to(state["first"] - 3)
+        else:
+            scroll_to(state["first"] + 3)
+        return "break"
+    
+    def on_resize(event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Leave room for the heading row
+        visible = max(1, event.height // row_height - 1)
+        if visible != state["visible"]:
+            state["visible"] = visible
+            render()
+    
+    def sort_by(sort_key):
+        descending = not pager.descending if pager.sort == sort_key else sort_key != "category"
+        pager.set_order(sort_key, descending)
+        for col_id, heading, key, _, _ in LINE_ITEM_COLUMNS:
+            arrow = (" ▼" if descending else " ▲") if key == sort_key else ""
+            tree.heading(col_id, text=heading + arrow)
+        scroll_to(0)
+    
+    def on_category(event=None):
+        selected = category_var.get()
+        pager.set_category(None if selected == "All" else selected)
+        scroll_to(0)
+    
+    def on_expenses_added():
+        pager.invalidate()
+        render()
+    
+    for col_id, heading, sort_key, width, anchor in LINE_ITEM_COLUMNS:
+        if sort_key:
+            tree.heading(col_id, text=heading, command=lambda k=sort_key: sort_by(k))
+        else:
+            tree.heading(col_id, text=heading)
+        tree.column(col_id, width=width, anchor=anchor)
+    tree.heading("ts", text="Date ▼")
+    
+    scrollbar.config(command=on_scrollbar)
+    tree.bind("<Configure>", on_resize)
+    for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+        tree.bind(sequence, on_wheel)
+    items_window.bind("<Prior>", lambda e: on_scrollbar("scroll", -1, "pages"))
+    items_window.bind("<Next>", lambda e: on_scrollbar("scroll", 1, "pages"))
+    items_window.bind("<Home>", lambda e: scroll_to(0))
+    items_window.bind("<End>", lambda e: scroll_to(len(pager)))
+    category_box.bind("<<ComboboxSelected>>", on_category)
+    
+    btn_frame = tk.Frame(items_window)
+    btn_frame.pack(pady=5)
+    tk.Button(btn_frame, text="Export...", command=lambda: export_line_items(pager.category),
+              bg='#2ecc71', fg='white', padx=10).pack(side=tk.LEFT, padx=5)
+    tk.Button(btn_frame, text="Close", command=items_window.destroy,
+              bg='#e74c3c', fg='white', padx=10).pack(side=tk.LEFT, padx=5)
+    
+    expense_listeners.append(on_expenses_added)
+    
+    def on_destroy(event):
+        if event.widget is items_window and on_expenses_added in expense_listeners:
+            expense_listeners.remove(on_expenses_added)
+    
+    items_window.bind("<Destroy>", on_destroy)
+    render()
+
 def export_data(totals):
     filename = filedialog.asksaveasfilename(
         defaultextension=".txt",
@@ -402,38 +562,73 @@ def export_data(totals):
     
     if filename:
         try:
-            if filename.endswith('.csv'):
-                # Export as CSV with UTF-8 encoding
-                with open(filename, 'w', encoding='utf-8') as f:  # Add encoding here
-                    f.write("Category,Amount (₹)\n")
-                    for category, amount in totals.items():
-                        f.write(f"{category},{amount:.2f}\n")
-                    GT = sum(totals.values())
-                    f.write(f"GRAND TOTAL,{GT:.2f}\n")
-            else:
-                # Export as text with UTF-8 encoding
-                with open(filename, 'w', encoding='utf-8') as f:  # Add encoding here
-                    f.write("=== COMPANY EXPENSE REPORT ===\n\n")
-                    f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                    
-                    for category, amount in totals.items():
-                        f.write(f"{category:<20}: ₹{amount:>10.2f}\n")  # ₹ symbol will work now
-                    
-                    GT = sum(totals.values())
-                    f.write("\n")
-                    f.write(f"{'GRAND TOTAL':<20}: ₹{GT:>10.2f}\n")
-            
+            export_totals(totals, filename)
             messagebox.showinfo("Success", f"Report exported successfully to {filename}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export file: {str(e)}")
             
+def export_line_items(category=None):
+    """Export every expense (or one category's) in the background with a progress bar"""
+    filename = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("JSON Lines", "*.jsonl"),
+                   ("Compressed JSON Lines", "*.jsonl.gz"), ("Zstandard JSON Lines", "*.jsonl.zst"),
+                   ("All files", "*.*")],
+        initialfile=f"expense_items_{datetime.now().strftime('%Y%m%d')}.csv"
+    )
+    if not filename:
+        return
+    
+    export_window = tk.Toplevel()
+    export_window.title("Exporting Line Items")
+    export_window.geometry("400x140")
+    status_label = tk.Label(export_window, text=f"Writing {os.path.basename(filename)}...")
+    status_label.pack(pady=10)
+    progress = ttk.Progressbar(export_window, orient='horizontal', length=300, mode='determinate')
+    progress.pack(pady=5)
+    
+    cancel = threading.Event()
+    messages = Queue()
+    
+    def run():
+        try:
+            written = export_expenses(
+                filename, category=category, cancel=cancel,
+                progress=lambda done, total: messages.put(("progress", done, total))
+            )
+            messages.put(("done", written))
+        except Exception as e:
+            messages.put(("error", e))
+    
+    def poll():
+        while not messages.empty():
+            message = messages.get()
+            if message[0] == "progress":
+                _, done, total = message
+                if total:
+                    progress.config(maximum=total, value=done)
+                status_label.config(text=f"Exported {done:,}" + (f" of {total:,}" if total else "") + " expenses")
+                continue
+            export_window.destroy()
+            if message[0] == "done":
+                messagebox.showinfo("Success", f"Exported {message[1]:,} expenses to {filename}")
+            elif not cancel.is_set():
+                messagebox.showerror("Error", f"Failed to export file: {message[1]}")
+            return
+        export_window.after(100, poll)
+    
+    tk.Button(export_window, text="Cancel", command=cancel.set,
+              bg='#e74c3c', fg='white', padx=10).pack(pady=5)
+    threading.Thread(target=run, daemon=True).start()
+    export_window.after(100, poll)
+
 def upload_bill():
-    global selected_image_path
     selected_image_path = None
+    job_id = None
     
     upload_window = tk.Toplevel()
     upload_window.title("Upload Expense Bill")
-    upload_window.geometry("400x500")
+    upload_window.geometry("400x560")
     
     # Category selection
     tk.Label(
@@ -484,6 +679,7 @@ def upload_bill():
     ).pack()
     
     def on_image_select():
+        nonlocal selected_image_path
         category = category_var.get()
         if not category:
             messagebox.showerror("Error", "Please select a category first")
@@ -496,6 +692,7 @@ def upload_bill():
         
         if file_path:
             # Show preview of selected image
+            from PIL import Image, ImageTk
             try:
                 img = Image.open(file_path)
                 img.thumbnail((200, 200))
@@ -507,7 +704,6 @@ def upload_bill():
                 
                 # Add confirm button
                 confirm_btn.config(state=tk.NORMAL)
-                global selected_image_path
                 selected_image_path = file_path
             except Exception as e:
                 messagebox.showerror("Error", f"Could not open image: {str(e)}")
@@ -551,17 +747,51 @@ def upload_bill():
             if amount <= 0:
                 raise ValueError("Amount must be positive")
             
-            categories_data[category].append(amount)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Store the expense and update CEO dashboard
+            timestamp = record_expense(category, amount, source="manual")
             messagebox.showinfo("Success", f"Manual entry of ₹{amount:.2f} added successfully to {category} at {timestamp}")
             
-            # Update CEO dashboard
-            update_ceo_dashboard(category, amount)
-            
             upload_window.destroy()
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid amount: {str(e)}")
     
+    def start_upload():
+        nonlocal job_id
+        job_id = process_upload(category_var.get(), selected_image_path, on_upload_done)
+        if job_id is None:
+            return
+        confirm_btn.config(state=tk.DISABLED)
+        cancel_btn.config(state=tk.NORMAL)
+        upload_progress.pack(pady=5)
+        upload_progress.start(15)
+        file_label.config(text="Reading bill...")
+    
+    def stop_progress():
+        upload_progress.stop()
+        upload_progress.pack_forget()
+        cancel_btn.config(state=tk.DISABLED)
+    
+    def on_upload_done(success):
+        nonlocal job_id
+        job_id = None
+        if not upload_window.winfo_exists():
+            return
+        if success:
+            upload_window.destroy()
+        else:
+            stop_progress()
+            confirm_btn.config(state=tk.NORMAL)
+            file_label.config(text=os.path.basename(selected_image_path))
+    
+    def cancel_upload():
+        nonlocal job_id
+        if job_id is not None:
+            cancel_ocr_job(job_id)
+            job_id = None
+        stop_progress()
+        confirm_btn.config(state=tk.NORMAL)
+        file_label.config(text="Upload cancelled")
+    
     # Buttons frame
     btn_frame = tk.Frame(upload_window)
     btn_frame.pack(pady=20)
@@ -582,7 +812,7 @@ def upload_bill():
         bg='#2ecc71',
         fg='white',
         padx=15,
-        command=lambda: process_upload(category_var.get(), upload_window)
+        command=start_upload
     )
     confirm_btn.pack(side=tk.LEFT, padx=5)
     
@@ -594,107 +824,428 @@ def upload_bill():
         fg='white',
         padx=15
     ).pack(side=tk.LEFT, padx=5)
+    
+    # OCR progress (shown while the bill is being read)
+    progress_frame = tk.Frame(upload_window)
+    progress_frame.pack()
+    
+    upload_progress = ttk.Progressbar(progress_frame, orient='horizontal', length=250, mode='indeterminate')
+    
+    cancel_btn = tk.Button(
+        progress_frame,
+        text="Cancel",
+        state=tk.DISABLED,
+        command=cancel_upload,
+        bg='#e74c3c',
+        fg='white',
+        padx=15
+    )
+    cancel_btn.pack(side=tk.BOTTOM, pady=5)
 
-def process_upload(category, window):
-    global selected_image_path
-    if selected_image_path and category:
-        if ocr_and_filter_total(selected_image_path, category):
-            window.destroy()
-    selected_image_path = None
+def process_upload(category, image_path, on_done=None):
+    """Queue the selected bill for OCR without blocking the UI; returns the job id"""
+    if image_path and category:
+        return submit_ocr_job(image_path, category, on_done)
+    return None
 
-def get_ai_insights(expense_data):
-    """Get AI-powered insights using Groq API"""
-    try:
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            messagebox.showerror("Error", "Groq API key not found in environment variables")
+def batch_upload_bills():
+    """Scan a folder (or a selection) of bill images in parallel"""
+    import ocr
+    
+    batch_window = tk.Toplevel()
+    batch_window.title("Batch Upload Bills")
+    batch_window.geometry("700x550")
+
+    pending_items = []  # (image_path, category) pairs waiting to be scanned
+    row_ids = []  # results table row of each pending item (the same bill may be queued twice)
+    result_queue = Queue()
+
+    # Category selection
+    top_frame = tk.Frame(batch_window)
+    top_frame.pack(pady=10, padx=10, fill=tk.X)
+
+    tk.Label(
+        top_frame,
+        text="Category for selected bills:",
+        font=('Helvetica', 10, 'bold')
+    ).pack(side=tk.LEFT)
+
+    category_var = tk.StringVar(value="")
+    ttk.Combobox(
+        top_frame,
+        textvariable=category_var,
+        values=list(categories_data.keys()),
+        state='readonly',
+        width=20
+    ).pack(side=tk.LEFT, padx=5)
+
+    # Per-file results table
+    table_frame = tk.Frame(batch_window)
+    table_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+
+    results_table = ttk.Treeview(
+        table_frame,
+        columns=("file", "category", "amount", "status"),
+        show='headings'
+    )
+    for column, heading, width in [("file", "File", 260), ("category", "Category", 130),
+                                   ("amount", "Amount (₹)", 100), ("status", "Status", 180)]:
+        results_table.heading(column, text=heading)
+        results_table.column(column, width=width, anchor='w')
+
+    table_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=results_table.yview)
+    results_table.configure(yscrollcommand=table_scrollbar.set)
+    results_table.pack(side="left", fill="both", expand=True)
+    table_scrollbar.pack(side="right", fill="y")
+
+    # Progress
+    progress = ttk.Progressbar(batch_window, orient='horizontal', length=400, mode='determinate')
+    progress.pack(pady=5)
+    status_label = tk.Label(batch_window, text="No bills selected", fg='gray')
+    status_label.pack()
+
+    def add_items(paths):
+        category = category_var.get()
+        if not category:
+            messagebox.showerror("Error", "Please select a category first")
             return
-        
-        # Prepare the prompt
-        prompt = f"""Analyze this company expense data and provide insights and recommendations:
-        
-        Expense Breakdown:
-        {json.dumps(expense_data, indent=2)}
-        
-        Total Expenses: ₹{sum(expense_data.values()):.2f}
-        
-        Please provide:
-        1. Key observations about spending patterns
-        2. Potential areas for cost optimization
-        3. Recommendations for budget allocation
-        4. Any unusual spending patterns to investigate
-        
-        Respond in clear, actionable bullet points suitable for a business manager."""
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "prompt": prompt,
-            "max_tokens": 1000,
-            "temperature": 0.7
-        }
-        
-        response = requests.post(
-            "https://api.groq.com/v1/completions",
-            headers=headers,
-            json=payload,
-            timeout=30
+        for path in paths:
+            pending_items.append((path, category))
+            row_ids.append(results_table.insert(
+                '', tk.END, values=(os.path.basename(path), category, "", "Pending")
+            ))
+        status_label.config(text=f"{len(pending_items)} bills queued")
+        start_btn.config(state=tk.NORMAL if pending_items else tk.DISABLED)
+
+    def select_folder():
+        folder = filedialog.askdirectory(title="Select Folder of Bill Images")
+        if folder:
+            add_items(ocr.find_bill_images(folder))
+
+    def select_images():
+        paths = filedialog.askopenfilenames(
+            title="Select Bill Images",
+            filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff")]
         )
-        
-        response.raise_for_status()
-        insights = response.json()["choices"][0]["text"]
-        
-        # Display insights in a new window
-        insights_window = tk.Toplevel()
-        insights_window.title("AI-Powered Expense Insights")
-        insights_window.geometry("700x500")
-        
-        # Header
-        tk.Label(
-            insights_window,
-            text="AI Expense Insights",
-            font=('Helvetica', 14, 'bold'),
-            pady=10
-        ).pack()
-        
-        # Text widget for scrollable content
-        text_frame = tk.Frame(insights_window)
-        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        scrollbar = tk.Scrollbar(text_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        insights_text = tk.Text(
-            text_frame,
-            wrap=tk.WORD,
-            yscrollcommand=scrollbar.set,
-            font=('Helvetica', 10),
-            padx=10,
-            pady=10
+        if paths:
+            add_items(paths)
+
+    def run_batch(items):
+        results = ocr.batch_ocr(
+            items,
+            progress=lambda done, total, index, result: result_queue.put(("progress", done, total, index, result))
         )
-        insights_text.pack(fill=tk.BOTH, expand=True)
-        
-        scrollbar.config(command=insights_text.yview)
+        result_queue.put(("done", results))
+
+    def start_batch():
+        if not pending_items:
+            return
+        for btn in (folder_btn, images_btn, start_btn):
+            btn.config(state=tk.DISABLED)
+        progress.config(maximum=len(pending_items), value=0)
+        status_label.config(text=f"Scanning {len(pending_items)} bills...")
+        threading.Thread(target=run_batch, args=(list(pending_items),), daemon=True).start()
+        # Polled from root: closing this window mid-scan must not lose the bills already read
+        root.after(100, poll_results)
+
+    def poll_results():
+        while not result_queue.empty():
+            message = result_queue.get()
+            if message[0] == "progress":
+                if not batch_window.winfo_exists():
+                    continue
+                _, done, total, index, (image_path, category, amount, error) = message
+                row = row_ids[index]
+                if error:
+                    results_table.item(row, values=(os.path.basename(image_path), category, "", f"Failed: {error}"))
+                else:
+                    results_table.item(row, values=(os.path.basename(image_path), category, f"{amount:.2f}", "OK"))
+                progress.config(value=done)
+                status_label.config(text=f"Scanned {done} of {total} bills")
+            else:
+                finish_batch(message[1])
+                return
+        root.after(100, poll_results)
+
+    def finish_batch(results):
+        # Commit every successful bill in one batch
+        timestamp = datetime.now()
+        expenses = [(category, amount, timestamp) for _, category, amount, error in results if not error]
+        record_expenses(expenses, source="ocr")
+
+        failed = len(results) - len(expenses)
+        message = (f"Added {len(expenses)} bills totalling ₹{sum(amount for _, amount, _ in expenses):.2f}\n"
+                   f"{failed} bills could not be read")
+        if not batch_window.winfo_exists():
+            messagebox.showinfo("Batch Upload", message)
+            return
+        cache = ocr.get_cache()
+        cache_note = f" (OCR cache: {cache.stats()['hits']} hits)" if cache else ""
+        status_label.config(text=f"Done: {len(expenses)} added, {failed} failed{cache_note}", fg='black')
+        pending_items.clear()
+        row_ids.clear()
+        for btn in (folder_btn, images_btn):
+            btn.config(state=tk.NORMAL)
+        messagebox.showinfo("Batch Upload", message, parent=batch_window)
+
+    # Buttons
+    btn_frame = tk.Frame(batch_window)
+    btn_frame.pack(pady=10)
+
+    folder_btn = tk.Button(btn_frame, text="Select Folder", command=select_folder,
+                           bg='#3498db', fg='white', padx=15)
+    folder_btn.pack(side=tk.LEFT, padx=5)
+
+    images_btn = tk.Button(btn_frame, text="Select Images", command=select_images,
+                           bg='#3498db', fg='white', padx=15)
+    images_btn.pack(side=tk.LEFT, padx=5)
+
+    start_btn = tk.Button(btn_frame, text="Start Scan", command=start_batch, state=tk.DISABLED,
+                          bg='#2ecc71', fg='white', padx=15)
+    start_btn.pack(side=tk.LEFT, padx=5)
+
+    tk.Button(btn_frame, text="Close", command=batch_window.destroy,
+              bg='#e74c3c', fg='white', padx=15).pack(side=tk.LEFT, padx=5)
+
+def import_expense_file():
+    """Bulk import a CSV/JSONL file or bank statement; parsing runs off the Tk thread"""
+    import importer
+    
+    import_window = tk.Toplevel()
+    import_window.title("Import Expenses")
+    import_window.geometry("520x360")
+    
+    path_var = tk.StringVar(value="")
+    category_var = tk.StringVar(value="")
+    debits_negative = tk.BooleanVar(value=False)
+    messages = Queue()
+    
+    form = tk.Frame(import_window)
+    form.pack(pady=10, padx=10, fill=tk.X)
+    
+    tk.Label(form, text="File:", font=('Helvetica', 10, 'bold')).grid(row=0, column=0, sticky='w')
+    tk.Entry(form, textvariable=path_var, width=40).grid(row=0, column=1, padx=5)
+    
+    def choose_file():
+        path = filedialog.askopenfilename(
+            title="Select Expense File or Bank Statement",
+            filetypes=[("CSV / statements", "*.csv *.tsv *.txt"), ("JSON Lines", "*.jsonl *.ndjson"),
+                       ("All files", "*.*")]
+        )
+        if path:
+            path_var.set(path)
+    
+    tk.Button(form, text="Browse...", command=choose_file).grid(row=0, column=2)
+    
+    tk.Label(form, text="Default category:", font=('Helvetica', 10, 'bold')).grid(row=1, column=0, sticky='w', pady=8)
+    ttk.Combobox(form, textvariable=category_var, values=list(categories_data.keys()),
+                 state='readonly', width=20).grid(row=1, column=1, sticky='w', padx=5)
+    tk.Checkbutton(form, text="Expenses are negative amounts (single Amount column)",
+                   variable=debits_negative).grid(row=2, column=0, columnspan=3, sticky='w')
+    
+    status_label = tk.Label(import_window, text="Rows without a category use the default category",
+                            fg='gray', wraplength=480, justify=tk.LEFT)
+    status_label.pack(pady=5)
+    progress = ttk.Progressbar(import_window, orient='horizontal', length=400, mode='indeterminate')
+    progress.pack(pady=5)
+    
+    def parse(path, default_category, negative):
+        try:
+            result = importer.read_expense_file(path, resolve_category, default_category=default_category,
+                                                debits_negative=negative)
+            messages.put(("done", result))
+        except (importer.ExpenseImportError, OSError, UnicodeDecodeError) as e:
+            messages.put(("error", e))
+    
+    def start_import():
+        path = path_var.get()
+        if not path:
+            messagebox.showerror("Error", "Please select a file first")
+            return
+        import_btn.config(state=tk.DISABLED)
+        status_label.config(text=f"Reading {os.path.basename(path)}...", fg='black')
+        progress.start(10)
+        threading.Thread(target=parse, args=(path, category_var.get() or None, debits_negative.get()),
+                         daemon=True).start()
+        import_window.after(100, poll)
+    
+    def poll():
+        if messages.empty():
+            import_window.after(100, poll)
+            return
+        kind, payload = messages.get()
+        progress.stop()
+        import_btn.config(state=tk.NORMAL)
+        if kind == "error":
+            status_label.config(text=f"Import failed: {payload}", fg='#e74c3c')
+            return
         
-        # Insert the insights
-        insights_text.insert(tk.END, insights)
-        insights_text.config(state=tk.DISABLED)  # Make it read-only
+        # One batch: one ledger transaction and one dashboard refresh
+        record_expenses(payload.expenses, source="import")
+        total = sum(amount for _, amount, _ in payload.expenses)
+        status_label.config(
+            text=f"Imported {len(payload.expenses):,} expenses totalling ₹{total:,.2f}; "
+                 f"{len(payload.rejected):,} rejected, {payload.skipped:,} skipped",
+            fg='black'
+        )
+        if payload.rejected and messagebox.askyesno(
+            "Rejected Rows", f"{len(payload.rejected):,} rows could not be imported. Save a report?"
+        ):
+            report = filedialog.asksaveasfilename(defaultextension=".csv", initialfile="rejected_rows.csv",
+                                                  filetypes=[("CSV files", "*.csv")])
+            if report:
+                payload.write_rejections(report)
+    
+    btn_frame = tk.Frame(import_window)
+    btn_frame.pack(pady=10)
+    import_btn = tk.Button(btn_frame, text="Import", command=start_import,
+                           bg='#2ecc71', fg='white', padx=15)
+    import_btn.pack(side=tk.LEFT, padx=5)
+    tk.Button(btn_frame, text="Close", command=import_window.destroy,
+              bg='#e74c3c', fg='white', padx=15).pack(side=tk.LEFT, padx=5)
+
+def get_ai_insights(expense_data):
+    """Get AI-powered insights using Groq API, streamed into a window as they arrive
+    
+    Unchanged expense data is answered from the insights cache; the Refresh
+    button forces a new request.
+    """
+    if not os.getenv("GROQ_API_KEY"):
+        messagebox.showerror("Error", "Groq API key not found in environment variables")
+        return
+    
+    import ai_client
+    prompt = ai_client.build_insights_prompt(expense_data)
+    key = ai_client.cache_key(expense_data)
+    cache = ai_client.get_cache()
+    token_queue = Queue()  # Worker thread -> Tk thread: ("token", text) / ("done", text) / ("error", exc)
+    cancel = threading.Event()
+    
+    # Display insights in a new window
+    insights_window = tk.Toplevel()
+    insights_window.title("AI-Powered Expense Insights")
+    insights_window.geometry("700x500")
+    
+    # Header
+    tk.Label(
+        insights_window,
+        text="AI Expense Insights",
+        font=('Helvetica', 14, 'bold'),
+        pady=10
+    ).pack()
+    
+    status_label = tk.Label(insights_window, text="", fg='gray')
+    status_label.pack()
+    
+    # Text widget for scrollable content
+    text_frame = tk.Frame(insights_window)
+    text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    
+    scrollbar = tk.Scrollbar(text_frame)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    
+    insights_text = tk.Text(
+        text_frame,
+        wrap=tk.WORD,
+        yscrollcommand=scrollbar.set,
+        font=('Helvetica', 10),
+        padx=10,
+        pady=10,
+        state=tk.DISABLED  # Read-only; enabled briefly to append tokens
+    )
+    insights_text.pack(fill=tk.BOTH, expand=True)
+    
+    scrollbar.config(command=insights_text.yview)
+    
+    def close_window():
+        cancel.set()
+        insights_window.destroy()
+    
+    insights_window.protocol("WM_DELETE_WINDOW", close_window)
+    
+    # Buttons
+    btn_frame = tk.Frame(insights_window)
+    btn_frame.pack(pady=10)
+    
+    refresh_btn = tk.Button(
+        btn_frame,
+        text="Refresh",
+        command=lambda: load_insights(refresh=True),
+        bg='#3498db',
+        fg='white',
+        padx=15
+    )
+    refresh_btn.pack(side=tk.LEFT, padx=5)
+    
+    tk.Button(
+        btn_frame,
+        text="Close",
+        command=close_window,
+        bg='#e74c3c',
+        fg='white',
+        padx=15
+    ).pack(side=tk.LEFT, padx=5)
+    
+    def fetch():
+        try:
+            text = ai_client.stream_completion(prompt, lambda token: token_queue.put(("token", token)), cancel=cancel)
+            token_queue.put(("done", text))
+        except ai_client.InsightsCancelled:
+            pass
+        except Exception as e:
+            token_queue.put(("error", e))
+    
+    def drain_tokens():
+        if not insights_window.winfo_exists():
+            return
+        pieces = []
+        while not token_queue.empty():
+            kind, value = token_queue.get()
+            if kind == "token":
+                pieces.append(value)
+                continue
+            append_text(pieces)
+            refresh_btn.config(state=tk.NORMAL)
+            if kind == "done":
+                cache.put(key, value)
+                status_label.config(text="")
+            else:
+                status_label.config(text="Failed", fg='red')
+                messagebox.showerror("API Error", f"Failed to get AI insights: {str(value)}", parent=insights_window)
+            return
+        append_text(pieces)
+        insights_window.after(50, drain_tokens)
+    
+    def append_text(pieces):
+        if pieces:
+            insights_text.config(state=tk.NORMAL)
+            insights_text.insert(tk.END, "".join(pieces))
+            insights_text.see(tk.END)
+            insights_text.config(state=tk.DISABLED)
+    
+    def load_insights(refresh=False):
+        insights_text.config(state=tk.NORMAL)
+        insights_text.delete("1.0", tk.END)
+        insights_text.config(state=tk.DISABLED)
         
-        # Close button
-        tk.Button(
-            insights_window,
-            text="Close",
-            command=insights_window.destroy,
-            bg='#e74c3c',
-            fg='white',
-            padx=15
-        ).pack(pady=10)
+        cached = None if refresh else cache.get(key)
+        if cached:
+            text, created = cached
+            append_text([text])
+            status_label.config(
+                text=f"Cached answer from {datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M')}",
+                fg='gray'
+            )
+            return
         
-    except Exception as e:
-        messagebox.showerror("API Error", f"Failed to get AI insights: {str(e)}")
+        if refresh:
+            cache.invalidate(key)
+        status_label.config(text="Generating insights...", fg='gray')
+        refresh_btn.config(state=tk.DISABLED)
+        threading.Thread(target=fetch, daemon=True).start()
+        insights_window.after(50, drain_tokens)
+    
+    load_insights()
 
 def show_help():
     help_window = tk.Toplevel()
@@ -711,8 +1262,10 @@ def show_help():
     help_text = """1. Upload Bill:
    - Select a category
    - Choose an image of your bill
-   - The system will extract the total amount
+   - The system will extract the total amount in the background
+     (you can keep working, or cancel while it reads)
    - Or enter the amount manually
+   - Use Batch Upload to scan a whole folder of bills at once
 
 2. View Summary:
    - See all expenses by category
@@ -751,7 +1304,90 @@ def show_help():
         fg='white'
     ).pack(pady=10)
 
+# Current alerts listed on the Overview tab before "…and N more"
+MAX_OVERVIEW_ALERTS = 8
+
+# Levels the Departments tab can expand to, outermost first
+HIERARCHY_DEPTHS = (("Divisions", "division"), ("Departments", "department"), ("Categories", "category"))
+
+def build_hierarchy_tree(parent):
+    """Expandable Treeview of spending rolled up through the cost-center hierarchy
+    
+    Children are inserted the first time a node is opened, so thousands of categories cost nothing until someone
+    looks at them. Figures are for the current month, like the budgets.
+    """
+    hierarchy = load_hierarchy()
+    totals = month_node_totals()
+    
+    controls = tk.Frame(parent)
+    controls.pack(fill=tk.X, padx=20)
+    table_frame = tk.Frame(parent)
+    table_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+    
+    tree = ttk.Treeview(table_frame, columns=("budget", "spent", "remaining", "used"))
+    tree.heading("#0", text="Cost center")
+    tree.column("#0", width=260, anchor='w')
+    for column, heading, width in [("budget", "Budget", 110), ("spent", "Spent", 110),
+                                   ("remaining", "Remaining", 110), ("used", "Used", 70)]:
+        tree.heading(column, text=heading)
+        tree.column(column, width=width, anchor='e')
+    tree.tag_configure("over", foreground='red')
+    scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    
+    def insert(node, parent_item=""):
+        budget = hierarchy.budgets[node]
+        spent = totals.get(node, 0.0)
+        if budget is None:
+            values = ("", f"₹{spent:,.2f}", "", "")
+            tags = ()
+        else:
+            used = f"{spent / budget * 100:.0f}%" if budget else ""
+            values = (f"₹{budget:,.2f}", f"₹{spent:,.2f}", f"₹{budget - spent:,.2f}", used)
+            tags = ("over",) if spent > budget else ()
+        item = tree.insert(parent_item, tk.END, iid=str(node), text=hierarchy.names[node], values=values, tags=tags)
+        if hierarchy.children[node]:
+            tree.insert(item, tk.END, iid=f"placeholder-{node}")  # Shows the expand arrow
+        return item
+    
+    def populate(item):
+        node = int(item)
+        placeholder = f"placeholder-{node}"
+        if tree.exists(placeholder):
+            tree.delete(placeholder)
+            for child in hierarchy.children[node]:
+                insert(child, item)
+    
+    def on_open(event):
+        populate(tree.focus())
+    
+    def expand_to(level):
+        """Open every node above the given level and close the rest"""
+        stack = [str(hierarchy.root)]
+        while stack:
+            item = stack.pop()
+            node = int(item)
+            if hierarchy.levels[node] == level:
+                tree.item(item, open=False)
+                continue
+            populate(item)
+            tree.item(item, open=True)
+            stack.extend(tree.get_children(item))
+    
+    tree.bind("<<TreeviewOpen>>", on_open)
+    insert(hierarchy.root)
+    expand_to("department")
+    
+    tk.Label(controls, text="Show:").pack(side=tk.LEFT)
+    for label, level in HIERARCHY_DEPTHS:
+        tk.Button(controls, text=label, command=lambda level=level: expand_to(level)).pack(side=tk.LEFT, padx=2)
+    tk.Button(controls, text="Collapse all", command=lambda: expand_to("company")).pack(side=tk.LEFT, padx=2)
+    return tree
+
 def show_ceo_dashboard():
+    update_savings_goals()  # Cheap, and picks up a new quarter even if nothing was recorded since
     dashboard_window = tk.Toplevel()
     dashboard_window.title("CEO Dashboard")
     dashboard_window.geometry("800x600")
@@ -772,8 +1408,8 @@ def show_ceo_dashboard():
         pady=10
     ).pack()
     
-    # Current month spending
-    total_spent = sum(sum(expenses) for expenses in categories_data.values())
+    # Current month spending (from the materialized period rollups, not all-time totals)
+    total_spent = period_spent("month")
     budget_percentage = (total_spent / ceo_dashboard_data["monthly_budget"]) * 100
     
     budget_frame = tk.Frame(overview_frame)
@@ -787,7 +1423,14 @@ def show_ceo_dashboard():
     
     tk.Label(
         budget_frame,
-        text=f"Total Spent: ₹{total_spent:,.2f} ({budget_percentage:.1f}% of budget)",
+        text=f"Spent in {date.today():%B %Y}: ₹{total_spent:,.2f} ({budget_percentage:.1f}% of budget)",
+        font=('Helvetica', 10)
+    ).pack(anchor='w')
+    
+    tk.Label(
+        budget_frame,
+        text=f"This quarter: ₹{period_spent('quarter'):,.2f}    This year: ₹{period_spent('year'):,.2f}    "
+             f"All time: ₹{aggregates.grand_total:,.2f}",
         font=('Helvetica', 10)
     ).pack(anchor='w')
     
@@ -814,7 +1457,8 @@ def show_ceo_dashboard():
     alerts_frame.pack(pady=10, padx=20, fill=tk.X)
     
     if ceo_dashboard_data["alerts"]:
-        for alert in ceo_dashboard_data["alerts"]:
+        # Most severe first; the full record is on the Alert History tab
+        for alert in ceo_dashboard_data["alerts"][:MAX_OVERVIEW_ALERTS]:
             tk.Label(
                 alerts_frame,
                 text=f"⚠️ {alert}",
@@ -822,6 +1466,10 @@ def show_ceo_dashboard():
                 fg='red',
                 anchor='w'
             ).pack(fill=tk.X, pady=2)
+        hidden = len(ceo_dashboard_data["alerts"]) - MAX_OVERVIEW_ALERTS
+        if hidden > 0:
+            tk.Label(alerts_frame, text=f"…and {hidden} more", font=('Helvetica', 10), fg='red',
+                     anchor='w').pack(fill=tk.X, pady=2)
     else:
         tk.Label(
             alerts_frame,
@@ -830,90 +1478,37 @@ def show_ceo_dashboard():
             fg='green'
         ).pack()
     
+    # Alert History Tab: every tier crossing, newest first
+    history_frame = ttk.Frame(notebook)
+    notebook.add(history_frame, text="Alert History")
+    
+    history_table_frame = tk.Frame(history_frame)
+    history_table_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+    history_table = ttk.Treeview(history_table_frame, columns=("ts", "tier", "alert"), show='headings')
+    for column, heading, width, anchor in [("ts", "Time", 140, 'w'), ("tier", "Tier", 60, 'e'),
+                                           ("alert", "Alert", 520, 'w')]:
+        history_table.heading(column, text=heading)
+        history_table.column(column, width=width, anchor=anchor)
+    history_scrollbar = ttk.Scrollbar(history_table_frame, orient="vertical", command=history_table.yview)
+    history_table.configure(yscrollcommand=history_scrollbar.set)
+    history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    history_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    for ts, rule, tier, spent, budget, message in ceo_dashboard_data["alert_history"]:
+        history_table.insert("", tk.END, values=(ts, f"{tier:.0f}%", message))
+    
     # Department Spending Tab
     dept_frame = ttk.Frame(notebook)
     notebook.add(dept_frame, text="Departments")
     
-    # Department spending table
+    # Department spending tree: company > division > department > category
     tk.Label(
         dept_frame,
-        text="Department Spending",
+        text=f"Department Spending — {date.today():%B %Y}",
         font=('Helvetica', 12, 'bold'),
         pady=10
     ).pack()
     
-    table_frame = tk.Frame(dept_frame)
-    table_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
-    
-    # Table headers
-    tk.Label(
-        table_frame,
-        text="Department",
-        font=('Helvetica', 10, 'bold'),
-        borderwidth=1,
-        relief='solid',
-        width=20
-    ).grid(row=0, column=0, sticky='ew')
-    
-    tk.Label(
-        table_frame,
-        text="Budget",
-        font=('Helvetica', 10, 'bold'),
-        borderwidth=1,
-        relief='solid',
-        width=15
-    ).grid(row=0, column=1, sticky='ew')
-    
-    tk.Label(
-        table_frame,
-        text="Spent",
-        font=('Helvetica', 10, 'bold'),
-        borderwidth=1,
-        relief='solid',
-        width=15
-    ).grid(row=0, column=2, sticky='ew')
-    
-    tk.Label(
-        table_frame,
-        text="Remaining",
-        font=('Helvetica', 10, 'bold'),
-        borderwidth=1,
-        relief='solid',
-        width=15
-    ).grid(row=0, column=3, sticky='ew')
-    
-    # Department rows
-    for i, (dept, data) in enumerate(ceo_dashboard_data["department_spending"].items(), start=1):
-        remaining = data["budget"] - data["spent"]
-        
-        tk.Label(
-            table_frame,
-            text=dept,
-            borderwidth=1,
-            relief='solid'
-        ).grid(row=i, column=0, sticky='ew')
-        
-        tk.Label(
-            table_frame,
-            text=f"₹{data['budget']:,.2f}",
-            borderwidth=1,
-            relief='solid'
-        ).grid(row=i, column=1, sticky='ew')
-        
-        tk.Label(
-            table_frame,
-            text=f"₹{data['spent']:,.2f}",
-            borderwidth=1,
-            relief='solid'
-        ).grid(row=i, column=2, sticky='ew')
-        
-        tk.Label(
-            table_frame,
-            text=f"₹{remaining:,.2f}",
-            borderwidth=1,
-            relief='solid',
-            fg='green' if remaining >= 0 else 'red'
-        ).grid(row=i, column=3, sticky='ew')
+    build_hierarchy_tree(dept_frame)
     
     # Savings Goals Tab
     savings_frame = ttk.Frame(notebook)
@@ -921,11 +1516,18 @@ def show_ceo_dashboard():
     
     tk.Label(
         savings_frame,
-        text="Quarterly Savings Goals",
+        text=f"Quarterly Savings Goals — {date.today().year}",
         font=('Helvetica', 12, 'bold'),
         pady=10
     ).pack()
     
+    tk.Label(
+        savings_frame,
+        text="Saved = three monthly budgets minus the quarter's spending",
+        font=('Helvetica', 9),
+        fg='#7f8c8d'
+    ).pack()
+    
     # Savings goals table
     savings_table = tk.Frame(savings_frame)
     savings_table.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
@@ -1021,66 +1623,114 @@ def show_ceo_dashboard():
         padx=15
     ).pack(pady=10)
 
-def process_voice_command(command):
-    """Process voice commands and perform actions"""
-    command = command.lower()
-    
-    # Add expense pattern: "add [amount] for [category]"
-    add_pattern = r"add (\d+) for (\w+)"
-    match = re.search(add_pattern, command)
-    if match:
-        amount = float(match.group(1))
-        category = match.group(2).capitalize()
-        
-        # Find the best matching category
-        matched_category = None
-        for cat in categories_data.keys():
-            if cat.lower().startswith(category.lower()):
-                matched_category = cat
-                break
-        
-        if matched_category:
-            categories_data[matched_category].append(amount)
-            update_ceo_dashboard(matched_category, amount)
-            messagebox.showinfo("Success", f"Added ₹{amount:.2f} to {matched_category}")
-        else:
-            messagebox.showerror("Error", f"Category '{category}' not found")
-        return
-    
-    # Other commands
-    if "show pie chart" in command:
-        show_pie_chart()
-    elif "show summary" in command or "show report" in command:
-        show_summary()
-    elif "show dashboard" in command or "ceo dashboard" in command:
-        show_ceo_dashboard()
-    elif "help" in command:
-        show_help()
-    else:
+def get_intent_parser():
+    global intent_parser
+    if intent_parser is None:
+        from voice_intents import IntentParser
+        intent_parser = IntentParser(categories_data.keys())
+    return intent_parser
+
+def process_voice_command(command, heard_at=None, intents=None):
+    """Process voice commands and perform actions
+    
+    heard_at is the perf_counter time the phrase ended; the end-of-speech to
+    action latency is recorded once the expenses and commands have been applied.
+    intents are the command's parsed intents if the caller already has them.
+    """
+    if intents is None:
+        intents = get_intent_parser().parse(command)
+    
+    # Every expense in one utterance ("add 500 for food and 1200 for travel") is one batch
+    timestamp = datetime.now()
+    expenses = [(intent[1], intent[2], timestamp) for intent in intents if intent[0] == "add"]
+    if expenses:
+        record_expenses(expenses, source="voice")
+    
+    actions = {"pie_chart": show_pie_chart, "summary": show_summary,
+               "dashboard": show_ceo_dashboard, "help": show_help}
+    for intent in intents:
+        if intent[0] == "command":
+            actions[intent[1]]()
+    
+    if heard_at is not None and voice_dispatcher is not None:
+        voice_dispatcher.record_latency(heard_at)
+        update_voice_status()
+    
+    # Confirmation dialogs come after the actions so they don't count towards latency
+    if expenses:
+        messagebox.showinfo("Success", "\n".join(f"Added ₹{amount:.2f} to {category}"
+                                                 for category, amount, _ in expenses))
+    errors = [intent[1] for intent in intents if intent[0] == "error"]
+    if errors:
+        messagebox.showerror("Error", "\n".join(errors))
+    if not intents:
         messagebox.showinfo("Voice Command", f"Command not recognized: {command}")
 
+def init_voice():
+    """Create the recognizer, speech backend and audio source on first use"""
+    global recognizer, microphone, speech_backend
+    if microphone is None:
+        import speech_recognition as sr
+        import speech_backends
+        speech_backend = speech_backends.create_backend(categories_data.keys())
+        recognizer = sr.Recognizer()
+        microphone = speech_backends.open_audio_source()
+    return recognizer, microphone
+
 def listen_for_commands():
-    """Background thread that listens for voice commands"""
-    global is_listening
-    with microphone as source:
-        recognizer.adjust_for_ambient_noise(source)
-        while is_listening:
+    """Background thread that streams audio through voice activity detection and the
+    speech backend, posting each utterance's transcript as soon as the speaker stops"""
+    from voice_stream import StreamingListener, stream_source
+    
+    def on_partial(text):
+        global voice_partial
+        voice_partial = text
+        notify_voice_partial()
+    
+    def on_error(error, utterance):
+        # One failed phrase (e.g. the online recogniser unreachable for a moment) doesn't stop listening
+        print(f"Voice recognition error: {error}")
+    
+    def on_final(command, utterance, heard_at):
+        if command:
+            # Parsed here so the dispatcher knows which commands record expenses and must never be merged or dropped
+            intents = get_intent_parser().parse(command)
+            mutating = any(intent[0] == "add" for intent in intents)
+            voice_dispatcher.post((command, intents), heard_at, mutating)
+    
+    try:
+        with microphone as source:
+            # The noise floor is calibrated on the first quarter second and then kept up to date
+            listener = StreamingListener(speech_backend, source.SAMPLE_RATE, source.SAMPLE_WIDTH,
+                                         on_final, on_partial, on_error=on_error)
+            stream_source(source, listener, lambda: is_listening)
+    except Exception as e:
+        print(f"Voice recognition stopped: {e}")
+    finally:
+        # The audio ended or failed without the user turning listening off: let them start it again
+        if is_listening:
             try:
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                command = recognizer.recognize_google(audio)
-                voice_queue.put(command)
-            except sr.WaitTimeoutError:
-                pass
-            except sr.UnknownValueError:
-                pass
-            except Exception as e:
-                print(f"Voice recognition error: {e}")
+                root.after(0, voice_stopped)
+            except (tk.TclError, RuntimeError):
+                pass  # The window is closing
+
+def voice_stopped():
+    """Show voice control as off after the listener thread has ended by itself"""
+    global is_listening
+    is_listening = False
+    voice_btn.config(text="🎤 Voice Control", bg='#3498db', fg='white')
+    voice_partial_label.config(text="")
 
 def toggle_voice_recognition():
     """Toggle voice recognition on/off"""
     global is_listening
     
     if not is_listening:
+        try:
+            init_voice()
+        except Exception as e:
+            messagebox.showerror("Voice Control", f"Could not start voice control: {str(e)}")
+            return
         is_listening = True
         threading.Thread(target=listen_for_commands, daemon=True).start()
         voice_btn.config(text="🎙️ Listening...", bg='red', fg='white')
@@ -1090,23 +1740,49 @@ def toggle_voice_recognition():
         voice_btn.config(text="🎤 Voice Control", bg='#3498db', fg='white')
         messagebox.showinfo("Voice Control", "Voice recognition deactivated")
 
-def check_voice_queue():
-    """Check the voice command queue periodically"""
-    while not voice_queue.empty():
-        command = voice_queue.get()
-        process_voice_command(command)
-    root.after(100, check_voice_queue)
+def notify_voice_command():
+    """Wake the Tk loop from the listener thread (event_generate is safe to call off-thread)"""
+    try:
+        root.event_generate("<<VoiceCommand>>", when="tail")
+    except (tk.TclError, RuntimeError):
+        pass  # The window is closing
+
+def notify_voice_partial():
+    try:
+        root.event_generate("<<VoicePartial>>", when="tail")
+    except (tk.TclError, RuntimeError):
+        pass
+
+def on_voice_partial(event=None):
+    """Show what has been heard so far while the speaker is still talking"""
+    voice_partial_label.config(text=f"Hearing: {voice_partial}…" if voice_partial else "")
+
+def on_voice_command(event=None):
+    """Handle every command queued since the last wake-up"""
+    for (command, intents), heard_at in voice_dispatcher.drain():
+        process_voice_command(command, heard_at, intents)
+
+def update_voice_status():
+    stats = voice_dispatcher.stats()
+    text = f"Voice: last {stats['last_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms over {stats['handled']} commands"
+    if stats["dropped"]:
+        text += f", {stats['dropped']} dropped"
+    voice_status_label.config(text=text)
 
 def main_window():
-    global root, voice_btn
+    global root, voice_btn, voice_status_label, voice_partial_label, voice_dispatcher
+    from voice_dispatch import VoiceDispatcher
     
     root = tk.Tk()
     root.title("Company Expense Tracker")
-    root.geometry("500x600")  # Increased height for additional button
+    root.geometry("500x800")  # Increased height for additional buttons
     root.configure(bg='#f5f6fa')
     
-    # Initialize CEO dashboard data
+    # Initialize CEO dashboard data and load persisted expenses
     initialize_ceo_dashboard()
+    open_ledger()
+    expense_listeners.append(refresh_pie_chart)
+    expense_listeners.append(refresh_trend_chart)
     
     # Header
     header_frame = tk.Frame(root, bg='#2c3e50')
@@ -1142,6 +1818,24 @@ def main_window():
         **button_style
     ).pack(pady=8)
     
+    tk.Button(
+        button_frame,
+        text="🗂️ Batch Upload Bills",
+        command=batch_upload_bills,
+        bg='#2980b9',
+        fg='white',
+        **button_style
+    ).pack(pady=8)
+    
+    tk.Button(
+        button_frame,
+        text="📥 Import Expenses",
+        command=import_expense_file,
+        bg='#16a085',
+        fg='white',
+        **button_style
+    ).pack(pady=8)
+    
     tk.Button(
         button_frame,
         text="📊 View Expense Summary",
@@ -1160,6 +1854,15 @@ def main_window():
         **button_style
     ).pack(pady=8)
     
+    tk.Button(
+        button_frame,
+        text="📅 Monthly Trends",
+        command=show_monthly_trends,
+        bg='#8e44ad',
+        fg='white',
+        **button_style
+    ).pack(pady=8)
+    
     tk.Button(
         button_frame,
         text="👔 CEO Dashboard",
@@ -1188,6 +1891,13 @@ def main_window():
     )
     voice_btn.pack(pady=8)
     
+    # End-of-speech to action latency, filled in after the first voice command
+    voice_status_label = tk.Label(button_frame, text="", font=('Helvetica', 8), fg='#7f8c8d', bg='#f5f6fa')
+    voice_status_label.pack()
+    voice_partial_label = tk.Label(button_frame, text="", font=('Helvetica', 9, 'italic'), fg='#2c3e50',
+                                   bg='#f5f6fa', wraplength=400)
+    voice_partial_label.pack()
+    
     tk.Button(
         button_frame,
         text="❓ Help Guide",
@@ -1219,8 +1929,11 @@ def main_window():
         pady=5
     ).pack()
     
-    # Start checking for voice commands
-    root.after(100, check_voice_queue)
+    # Voice commands arrive as <<VoiceCommand>> events; OCR jobs are still polled
+    voice_dispatcher = VoiceDispatcher(notify_voice_command)
+    root.bind("<<VoiceCommand>>", on_voice_command)
+    root.bind("<<VoicePartial>>", on_voice_partial)
+    root.after(100, check_ocr_jobs)
     
     root.mainloop()
 
@@ -0,0 +1,268 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Compact summary payload, version 1:
+#   byte 0     format version
+#   byte 1     flags (bit 0: body is zlib-compressed)
+#   body       varint generated (minutes since EPOCH)
+#              varint n, then n x (category ref, varint paise)              totals
+#              varint m, then m x (zigzag minutes before generated, ref, paise)  line items
+# A category ref is 1 + its index in KNOWN_CATEGORIES, or 0 followed by a
+# length-prefixed UTF-8 name. The payload is written into QR codes as
+# Base45 text (RFC 9285), which scanners read as plain alphanumerics.
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+EPOCH = datetime(2020, 1, 1)
+
+# Append-only: a category's position is part of the wire format
+KNOWN_CATEGORIES = (
+    "Food", "Health", "Monthly Bills", "EMI", "Shopping", "Entertainment", "Education",
+    "Insurance", "Travel", "Office Supplies", "Utilities", "Maintenance", "Marketing",
+    "Software", "Hardware",
+)
+_CATEGORY_CODES = {name: i + 1 for i, name in enumerate(KNOWN_CATEGORIES)}
+
+BASE45_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_BASE45_VALUES = {char: i for i, char in enumerate(BASE45_ALPHABET)}
+
+# Each symbol holds at most this many characters: the alphanumeric capacity
+# of a version 10 code at error correction M, still easy to scan on screen
+MAX_SYMBOL_CHARS = 311
+PART_PREFIX = "EXS"
+
+# Rendered codes keyed by the summary's content (not its timestamp)
+IMAGE_CACHE_SIZE = 16
+_image_cache = OrderedDict()
+_image_cache_lock = threading.Lock()
+
+
+class QRPayloadError(Exception):
+    pass
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise QRPayloadError("Truncated payload")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _write_category(out, name):
+    code = _CATEGORY_CODES.get(name)
+    if code is not None:
+        _write_varint(out, code)
+        return
+    encoded = name.encode("utf-8")
+    _write_varint(out, 0)
+    _write_varint(out, len(encoded))
+    out.extend(encoded)
+
+
+def _read_category(data, pos):
+    code, pos = _read_varint(data, pos)
+    if code:
+        if code > len(KNOWN_CATEGORIES):
+            raise QRPayloadError(f"Unknown category code {code}")
+        return KNOWN_CATEGORIES[code - 1], pos
+    length, pos = _read_varint(data, pos)
+    return data[pos:pos + length].decode("utf-8"), pos + length
+
+
+def _minutes(moment):
+    return int((moment - EPOCH).total_seconds() // 60)
+
+
+def _encode_totals(totals):
+    out = bytearray()
+    entries = [(category, round(amount * 100)) for category, amount in totals.items()]
+    entries = [(category, paise) for category, paise in entries if paise]
+    _write_varint(out, len(entries))
+    for category, paise in entries:
+        _write_category(out, category)
+        _write_varint(out, _zigzag(paise))
+    return out
+
+
+def encode_summary(totals, generated=None, items=()):
+    """Pack {category: amount} totals (and optional (datetime, category, amount) items) into bytes
+
+    Amounts are kept to the paisa; zero totals are left out.
+    """
+    generated = generated or datetime.now()
+    body = bytearray()
+    _write_varint(body, _minutes(generated))
+    body.extend(_encode_totals(totals))
+    _write_varint(body, len(items))
+    for moment, category, amount in items:
+        _write_varint(body, _zigzag(_minutes(generated) - _minutes(moment)))
+        _write_category(body, category)
+        _write_varint(body, _zigzag(round(amount * 100)))
+
+    flags = 0
+    compressed = zlib.compress(bytes(body), 9)
+    if len(compressed) < len(body):
+        body, flags = compressed, FLAG_ZLIB
+    return bytes([FORMAT_VERSION, flags]) + bytes(body)
+
+
+def decode_summary(data):
+    """Inverse of encode_summary: {"generated", "totals", "items", "grand_total"}"""
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        raise QRPayloadError("Not an expense summary payload")
+    body = data[2:]
+    if data[1] & FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise QRPayloadError(f"Corrupt payload: {e}") from None
+
+    minutes, pos = _read_varint(body, 0)
+    generated = EPOCH + timedelta(minutes=minutes)
+    totals = {}
+    count, pos = _read_varint(body, pos)
+    for _ in range(count):
+        category, pos = _read_category(body, pos)
+        paise, pos = _read_varint(body, pos)
+        totals[category] = _unzigzag(paise) / 100
+    items = []
+    count, pos = _read_varint(body, pos)
+    for _ in range(count):
+        delta, pos = _read_varint(body, pos)
+        category, pos = _read_category(body, pos)
+        paise, pos = _read_varint(body, pos)
+        items.append((generated - timedelta(minutes=_unzigzag(delta)), category, _unzigzag(paise) / 100))
+    return {"generated": generated, "totals": totals, "items": items,
+            "grand_total": round(sum(totals.values()), 2)}
+
+
+def base45_encode(data):
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += (BASE45_ALPHABET[c], BASE45_ALPHABET[d])
+    return "".join(chars)
+
+
+def base45_decode(text):
+    try:
+        values = [_BASE45_VALUES[char] for char in text]
+    except KeyError as e:
+        raise QRPayloadError(f"Invalid Base45 character {e}") from None
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            value = chunk[0] + chunk[1] * 45 + chunk[2] * 2025
+            if value > 0xFFFF:
+                raise QRPayloadError("Invalid Base45 group")
+            out.extend(divmod(value, 256))
+        elif len(chunk) == 2:
+            value = chunk[0] + chunk[1] * 45
+            if value > 0xFF:
+                raise QRPayloadError("Invalid Base45 group")
+            out.append(value)
+        else:
+            raise QRPayloadError("Truncated Base45 text")
+    return bytes(out)
+
+
+def split_payload(data, max_chars=MAX_SYMBOL_CHARS):
+    """Turn a payload into one or more "EXS/<i>/<n>/<crc>/<base45>" symbol texts
+
+    Every part carries the CRC-32 of the whole payload so parts of different
+    summaries are never mixed up when reassembled.
+    """
+    crc = f"{zlib.crc32(data):08X}"
+    # Header length grows with the part count; size parts for a generous 3-digit header
+    header = len(f"{PART_PREFIX}/999/999/{crc}/")
+    per_part = max(2, (max_chars - header) // 3 * 2)
+    chunks = [data[i:i + per_part] for i in range(0, len(data), per_part)] or [b""]
+    return [f"{PART_PREFIX}/{i}/{len(chunks)}/{crc}/{base45_encode(chunk)}"
+            for i, chunk in enumerate(chunks, start=1)]
+
+
+def join_parts(texts):
+    """Reassemble scanned part texts (any order) into the original payload"""
+    parts, total, crc = {}, None, None
+    for text in texts:
+        fields = text.rstrip("\r\n").split("/", 4)
+        if len(fields) != 5 or fields[0] != PART_PREFIX:
+            raise QRPayloadError("Not an expense summary QR code")
+        _, index, count, part_crc, chunk = fields
+        if crc is not None and (part_crc != crc or int(count) != total):
+            raise QRPayloadError("Parts belong to different summaries")
+        crc, total = part_crc, int(count)
+        parts[int(index)] = base45_decode(chunk)
+    missing = [i for i in range(1, (total or 0) + 1) if i not in parts]
+    if missing or not parts:
+        raise QRPayloadError(f"Missing parts: {', '.join(map(str, missing))}")
+    data = b"".join(parts[i] for i in range(1, total + 1))
+    if f"{zlib.crc32(data):08X}" != crc:
+        raise QRPayloadError("Checksum mismatch")
+    return data
+
+
+def decode_parts(texts):
+    """Decode the summary from the texts of its scanned QR codes"""
+    return decode_summary(join_parts(texts))
+
+
+def render_part(text, size=250):
+    """Render one part as a PIL image close to size pixels, at a whole number of pixels per module"""
+    import qrcode
+    from qrcode.util import QRData
+
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_M, border=4)
+    qr.add_data(QRData(text.encode("ascii")))
+    qr.make(fit=True)
+    qr.box_size = max(1, size // (qr.modules_count + 2 * qr.border))
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+
+def summary_codes(totals, items=(), size=250):
+    """Return (generated, part_texts, images) for a summary, rendering only when its content changed"""
+    key = hashlib.sha256(
+        bytes(_encode_totals(totals)) + f"{list(items)!r}\0{size}".encode("utf-8")
+    ).hexdigest()
+    with _image_cache_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key]
+
+    generated = datetime.now().replace(second=0, microsecond=0)
+    texts = split_payload(encode_summary(totals, generated, items))
+    entry = (generated, texts, [render_part(text, size) for text in texts])
+    with _image_cache_lock:
+        _image_cache[key] = entry
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+    return entry
@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import speech_recognition as sr
+import voice_grammar
+from voice_stream import StreamingListener, stream_source
+
+try:
+    import vosk
+except ImportError:  # Optional: offline recognition restricted to the command grammar
+    vosk = None
+
+# "auto" prefers an offline engine (Vosk with a model on disk, then pocketsphinx)
+# and falls back to Google's web API (override with VOICE_BACKEND=vosk|sphinx|google)
+DEFAULT_BACKEND = "auto"
+DEFAULT_VOSK_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vosk-model")
+VOSK_SAMPLE_RATE = 16000
+
+
+def vosk_model_path():
+    return os.getenv("VOSK_MODEL_PATH", DEFAULT_VOSK_MODEL)
+
+
+def sphinx_available():
+    try:
+        import pocketsphinx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class BufferedDecoder:
+    """Streaming interface for backends that only decode whole phrases: collects the
+    audio and recognises it once the utterance is over (no partial transcripts)"""
+
+    def __init__(self, backend, sample_rate, sample_width):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.chunks = []
+
+    def accept(self, chunk):
+        self.chunks.append(chunk)
+
+    def partial(self):
+        return None
+
+    def finish(self):
+        audio = sr.AudioData(b"".join(self.chunks), self.sample_rate, self.sample_width)
+        return self.backend.recognize(audio)
+
+
+class GoogleBackend:
+    """Google Web Speech API through speech_recognition (network round trip per phrase)"""
+
+    name = "google"
+
+    def __init__(self, categories=()):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        """Return the transcript of an sr.AudioData phrase, or None if nothing was understood"""
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return None
+
+    def stream(self, sample_rate, sample_width):
+        return BufferedDecoder(self, sample_rate, sample_width)
+
+
+class SphinxBackend:
+    """Offline pocketsphinx decoding against a JSGF grammar of the commands and categories"""
+
+    name = "sphinx"
+
+    def __init__(self, categories=()):
+        self.recognizer = sr.Recognizer()
+        # pocketsphinx compiles the grammar next to the .jsgf file, so give it its own directory
+        self._dir = tempfile.TemporaryDirectory(prefix="expense-grammar-")
+        self.grammar_path = os.path.join(self._dir.name, "expenses.jsgf")
+        with open(self.grammar_path, "w", encoding="utf-8") as f:
+            f.write(voice_grammar.jsgf_grammar(categories))
+
+    def recognize(self, audio):
+        try:
+            text = self.recognizer.recognize_sphinx(audio, grammar=self.grammar_path)
+        except sr.UnknownValueError:
+            return None
+        return text or None
+
+    def stream(self, sample_rate, sample_width):
+        return BufferedDecoder(self, sample_rate, sample_width)
+
+
+class VoskDecoder:
+    """Incremental Vosk decoding: audio is decoded as it is accepted, so partial
+    transcripts are available mid-utterance and finish() has little left to do"""
+
+    def __init__(self, model, grammar, sample_rate, sample_width):
+        self.recognizer = vosk.KaldiRecognizer(model, sample_rate, grammar)
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.text = []
+
+    def accept(self, chunk):
+        if self.sample_width != 2:
+            chunk = sr.AudioData(chunk, self.sample_rate, self.sample_width).get_raw_data(convert_width=2)
+        if self.recognizer.AcceptWaveform(chunk):
+            # Vosk found an internal pause; keep what it has settled on
+            self.text.append(json.loads(self.recognizer.Result()).get("text", ""))
+
+    def partial(self):
+        current = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return _clean(" ".join(self.text + [current])) or None
+
+    def finish(self):
+        self.text.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return _clean(" ".join(self.text)) or None
+
+
+def _clean(text):
+    return " ".join(word for word in text.split() if word != "[unk]")
+
+
+class VoskBackend:
+    """Offline Vosk (Kaldi) decoding with the vocabulary restricted to the command set
+
+    The model is loaded once; each phrase gets a fresh, cheap recogniser.
+    """
+
+    name = "vosk"
+
+    def __init__(self, categories=(), model_path=None):
+        model_path = model_path or vosk_model_path()
+        if not os.path.isdir(model_path):
+            raise ValueError(f"Vosk model not found at {model_path} (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+        self.grammar = voice_grammar.vosk_grammar(categories)
+
+    def recognize(self, audio):
+        recognizer = vosk.KaldiRecognizer(self.model, VOSK_SAMPLE_RATE, self.grammar)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2))
+        return _clean(json.loads(recognizer.FinalResult()).get("text", "")) or None
+
+    def stream(self, sample_rate, sample_width):
+        return VoskDecoder(self.model, self.grammar, sample_rate, sample_width)
+
+
+BACKENDS = {"google": GoogleBackend, "sphinx": SphinxBackend, "vosk": VoskBackend}
+
+
+def configured_backend(backend=None):
+    """Resolve a backend name (default VOICE_BACKEND) to one that can actually run"""
+    backend = (backend or os.getenv("VOICE_BACKEND", DEFAULT_BACKEND)).strip().lower()
+    if backend == "auto":
+        if vosk is not None and os.path.isdir(vosk_model_path()):
+            return "vosk"
+        return "sphinx" if sphinx_available() else "google"
+    if backend == "vosk" and vosk is None:
+        raise ValueError("VOICE_BACKEND=vosk but the vosk package is not installed")
+    if backend == "sphinx" and not sphinx_available():
+        raise ValueError("VOICE_BACKEND=sphinx but the pocketsphinx package is not installed")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown VOICE_BACKEND: {backend}")
+    return backend
+
+
+def create_backend(categories, backend=None):
+    return BACKENDS[configured_backend(backend)](categories)
+
+
+def open_audio_source():
+    """The microphone, or the WAV file named by VOICE_INPUT_WAV (for replaying recorded commands)"""
+    path = os.getenv("VOICE_INPUT_WAV")
+    return sr.AudioFile(path) if path else sr.Microphone()
+
+
+def transcribe_file(path, backend):
+    """Split a WAV/AIFF/FLAC recording into utterances and return each one's transcript"""
+    transcripts = []
+
+    def on_final(text, utterance, heard_at):
+        if text:
+            transcripts.append(text)
+
+    with sr.AudioFile(path) as source:
+        stream_source(source, StreamingListener(backend, source.SAMPLE_RATE, source.SAMPLE_WIDTH, on_final))
+    return transcripts
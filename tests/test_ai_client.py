@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import ai_client
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Completions endpoint that plays back the server's scripted responses, one per request
+
+    A script entry is (status, "json" or "sse", body, delay); an SSE body is
+    a list of raw event-stream lines sent as separate chunks.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append((self.client_address, json.loads(body)))
+        status, kind, content, delay = self.server.script.pop(0) if self.server.script else self.server.default
+        time.sleep(delay)
+        if kind == "sse":
+            self.send_response(status)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for line in content:
+                data = f"{line}\n".encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        data = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def completion(text):
+    return {"choices": [{"text": text}]}
+
+
+class StreamCompletionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.script = []
+        self.server.default = (200, "json", completion("ok"), 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/completions"
+        patches = [
+            mock.patch.dict(os.environ, {"GROQ_API_URL": url, "GROQ_API_KEY": "test-key"}),
+            mock.patch.object(ai_client, "BACKOFF_BASE", 0.01),
+            mock.patch.object(ai_client, "_session", None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        ai_client.get_session().close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def complete(self, **kwargs):
+        tokens = []
+        text = ai_client.stream_completion("prompt", tokens.append, **kwargs)
+        return text, tokens
+
+    def test_sse_chunks_are_assembled_in_order(self):
+        events = [completion("Cut "), {"choices": [{"delta": {"content": "travel "}}]},
+                  {"choices": [{"delta": {}}]}, completion("costs.")]
+        lines = [": keep-alive"]
+        for event in events:
+            lines += [f"data: {json.dumps(event)}", ""]
+        lines += ["data: [DONE]", "", f"data: {json.dumps(completion('ignored'))}", ""]
+        self.server.script.append((200, "sse", lines, 0))
+        text, tokens = self.complete()
+        self.assertEqual(tokens, ["Cut ", "travel ", "costs."])
+        self.assertEqual(text, "Cut travel costs.")
+        payload = self.server.requests[0][1]
+        self.assertTrue(payload["stream"])
+        self.assertEqual(payload["prompt"], "prompt")
+
+    def test_503_is_retried(self):
+        self.server.script.append((503, "json", {"error": "overloaded"}, 0))
+        self.server.script.append((200, "json", completion("Spend less."), 0))
+        text, tokens = self.complete()
+        self.assertEqual(text, "Spend less.")
+        self.assertEqual(tokens, ["Spend less."])
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_503_after_last_retry_fails(self):
+        self.server.default = (503, "json", {"error": "overloaded"}, 0)
+        with self.assertRaises(requests.HTTPError):
+            self.complete(max_retries=1)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_slow_server_times_out_at_the_deadline(self):
+        self.server.default = (200, "json", completion("late"), 2)
+        start = time.monotonic()
+        with self.assertRaises(ai_client.InsightsError):
+            self.complete(deadline=0.5)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_connection_is_reused(self):
+        self.complete()
+        self.complete()
+        self.complete()
+        clients = {address for address, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(clients), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from budget_rules import BudgetRule, BudgetRuleEngine
+from ledger import Ledger
+
+
+class Rollups:
+    """Stand-in for periods.PeriodRollups: {(period, bucket, node): total}"""
+
+    def __init__(self, totals):
+        self.totals = totals
+
+    def total(self, period, key, node=None):
+        return self.totals.get((period, key, node), 0.0)
+
+
+class AlertStateTest(unittest.TestCase):
+    def setUp(self):
+        self.rule = BudgetRule("department", "IT", 3, 1000)
+        self.rollups = Rollups({("month", "2024-05", 3): 850.0, ("month", "2024-06", 3): 1000.0})
+
+    def test_tier_fires_once_per_bucket(self):
+        engine = BudgetRuleEngine([self.rule])
+        fired, _ = engine.evaluate(self.rollups, today=date(2024, 5, 20))
+        self.assertEqual([(key, tier) for key, tier, *_ in fired], [("department:IT@2024-05", 80.0)])
+        fired, cleared = engine.evaluate(self.rollups, today=date(2024, 5, 21))
+        self.assertEqual((fired, cleared), ([], []))
+
+    def test_new_bucket_drops_older_state(self):
+        state = {"department:IT@2024-04": 120.0, "department:IT@2024-05": 80.0, "company:Company@2024-04": 100.0}
+        engine = BudgetRuleEngine([self.rule], state)
+        fired, cleared = engine.evaluate(self.rollups, today=date(2024, 6, 2))
+        self.assertEqual([(key, tier) for key, tier, *_ in fired], [("department:IT@2024-06", 100.0)])
+        self.assertEqual(sorted(cleared), ["department:IT@2024-04", "department:IT@2024-05"])
+        self.assertEqual(engine.state, {"department:IT@2024-06": 100.0, "company:Company@2024-04": 100.0})
+
+        ledger = Ledger(":memory:")
+        self.addCleanup(ledger.close)
+        ledger.record_alerts([], state)
+        changed = [alert[0] for alert in fired] + cleared
+        ledger.record_alerts(fired, {key: engine.state.get(key, 0.0) for key in changed})
+        self.assertEqual(ledger.load_alert_state(), engine.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
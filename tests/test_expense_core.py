@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import expense_core
+
+HIERARCHY = {"company": "Acme", "divisions": {"Technology": {"IT": {"budget": 1000, "categories": ["Cloud Hosting", "Software"]}}}}
+
+
+class HierarchyCategoriesTest(unittest.TestCase):
+    def setUp(self):
+        saved = {name: getattr(expense_core, name) for name in ("hierarchy", "period_rollups")}
+        categories = list(expense_core.categories_data)
+        aggregate_totals = dict(expense_core.aggregates.category_totals)
+
+        def restore():
+            for name, value in saved.items():
+                setattr(expense_core, name, value)
+            for category in list(expense_core.categories_data):
+                if category not in categories:
+                    del expense_core.categories_data[category]
+            expense_core.aggregates.category_totals = aggregate_totals
+
+        self.addCleanup(restore)
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(HIERARCHY, f)
+        self.addCleanup(os.remove, f.name)
+        expense_core.load_hierarchy(f.name)
+
+    def test_hierarchy_only_category_in_all_time_totals(self):
+        totals = expense_core.calculate_totals()
+        self.assertEqual(totals["Cloud Hosting"], 0.0)
+        self.assertEqual(list(totals), list(expense_core.categories_data))
+        self.assertEqual(list(totals), list(expense_core.calculate_totals("month")))
+
+
+if __name__ == "__main__":
+    unittest.main()
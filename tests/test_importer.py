@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from importer import parse_amounts, read_expense_file
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+STATEMENT = os.path.join(FIXTURES, "statement_dr_cr.csv")
+
+
+def resolve(name):
+    return "Food" if name.strip().lower() == "food" else None
+
+
+class ParseAmountsTest(unittest.TestCase):
+    def test_marks(self):
+        amounts, debit, credit = parse_amounts(["50,000.00 Cr", "450.00 Dr", "(300.00)", "120.50", "-75"], marks=True)
+        self.assertEqual(amounts.tolist(), [50000.0, -450.0, -300.0, 120.5, -75.0])
+        self.assertEqual(debit.tolist(), [False, True, True, False, False])
+        self.assertEqual(credit.tolist(), [True, False, False, False, False])
+
+
+class DrCrStatementTest(unittest.TestCase):
+    def amounts(self, result):
+        return sorted(amount for _, amount, _ in result.expenses)
+
+    def test_default_mode(self):
+        result = read_expense_file(STATEMENT, resolve, default_category="Food")
+        # Dr and parentheses are debits, a bare positive number is an expense
+        self.assertEqual(self.amounts(result), [120.5, 300.0, 450.0])
+        # Both Cr rows are skipped as credits, not imported
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual([reason for _, reason, _ in result.rejected], ["amount must be positive", "invalid amount"])
+
+    def test_debits_negative(self):
+        result = read_expense_file(STATEMENT, resolve, default_category="Food", debits_negative=True)
+        # Only the bare sign flips: -75.00 is now an expense and 120.50 a credit
+        self.assertEqual(self.amounts(result), [75.0, 300.0, 450.0])
+        self.assertEqual(result.skipped, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger import SORT_COLUMNS, Ledger
+
+
+class PageExpensesTest(unittest.TestCase):
+    def setUp(self):
+        self.ledger = Ledger(":memory:")
+        start = datetime(2024, 1, 1)
+        self.ledger.add_expenses([
+            (category, "IT", float(n), start + timedelta(days=n % 7), "manual")
+            for n in range(1, 31) for category in ("Food", "Software")
+        ])
+        self.queries = []
+        self.ledger.conn.set_trace_callback(self.queries.append)
+
+    def tearDown(self):
+        self.ledger.close()
+
+    def plan(self, query):
+        return [row[3] for row in self.ledger.conn.execute("EXPLAIN QUERY PLAN " + query)]
+
+    def test_every_ordering_walks_an_index(self):
+        for sort in SORT_COLUMNS:
+            for descending in (False, True):
+                for category in (None, "Food"):
+                    self.queries.clear()
+                    self.ledger.page_expenses(10, 5, sort, descending, category)
+                    plan = self.plan(self.queries[-1])
+                    with self.subTest(sort=sort, descending=descending, category=category):
+                        self.assertTrue(any("INDEX" in step for step in plan), plan)
+                        self.assertFalse(any("TEMP B-TREE" in step for step in plan), plan)
+
+    def test_category_pages_are_by_date_within_category(self):
+        rows = self.ledger.page_expenses(0, 60, sort="category")
+        keys = [(category, ts, id_) for id_, ts, category, _, _, _ in rows]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(rows), 60)
+
+
+class MonthColumnsTest(unittest.TestCase):
+    def test_one_row_per_month_and_category(self):
+        ledger = Ledger(":memory:")
+        self.addCleanup(ledger.close)
+        ledger.add_expenses([
+            ("Food", "HR", 10.0, datetime(2024, 1, 3), "manual"),
+            ("Food", "HR", 15.0, datetime(2024, 1, 28), "manual"),
+            ("Travel", "HR", 7.5, datetime(2024, 1, 28), "manual"),
+            ("Food", "HR", 4.0, datetime(2024, 3, 1), "manual"),
+        ])
+        rows, names = ledger.load_month_columns()
+        totals = {(month, names[category_id]): total for month, category_id, total in rows}
+        self.assertEqual(totals, {(2024 * 12, "Food"): 25.0, (2024 * 12, "Travel"): 7.5, (2024 * 12 + 2, "Food"): 4.0})
+        rows, _ = ledger.load_month_columns(start="2024-02-01")
+        self.assertEqual([total for _, _, total in rows], [4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
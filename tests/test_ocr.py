@@ -0,0 +1,107 @@
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ocr
+from ocr import ROI_CONFIG, extract_total_amounts, find_total_regions, ocr_total_regions
+
+
+class RecordingEngine:
+    """OCR engine stand-in that remembers the config of every call"""
+
+    def __init__(self):
+        self.configs = []
+
+    def image_to_string(self, img, config=""):
+        self.configs.append(config)
+        return "1,250.00\n"
+
+    def image_to_data(self, img, config=""):
+        self.configs.append(config)
+        return {"text": ["SUBTOTAL", "TOTAL:"], "left": [10, 10], "top": [40, 60],
+                "width": [80, 50], "height": [10, 10], "conf": [90, 90]}
+
+
+class ExtractTotalAmountsTest(unittest.TestCase):
+    def test_subtotals_are_not_totals(self):
+        text = "\n".join([
+            "Widget 2 x 100.00", "SUBTOTAL 1,100.00", "Sub Total 1100", "Sub-total: 1100.00",
+            "GST 150.00", "TOTAL 1,250.00", "Grand Total: 1,300.50", "GRANDTOTAL1400", "TOTALS 9",
+        ])
+        self.assertEqual(extract_total_amounts(text), [1250.0, 1300.5, 1400.0])
+
+
+class TotalRegionsTest(unittest.TestCase):
+    def test_caller_config_is_passed_through(self):
+        img = Image.new("L", (400, 100), 255)
+        engine = RecordingEngine()
+        regions = find_total_regions(img, engine, config="--oem 1")
+        self.assertEqual(regions, [(60, 55, 400, 75)])
+        text = ocr_total_regions(img, regions, engine, "--oem 1")
+        self.assertEqual(text, "TOTAL 1,250.00")
+        self.assertEqual(engine.configs, ["--oem 1 --psm 11", f"--oem 1 {ROI_CONFIG}"])
+        self.assertEqual(extract_total_amounts(text), [1250.0])
+
+
+class ReceiptEngine:
+    """Stand-in engine reading a receipt with a "SUB TOTAL" split into two words
+
+    Line 1 (y=40) is SUB TOTAL 2,400.00, line 2 (y=60) is TOTAL: 1,250.00.
+    """
+
+    def image_to_data(self, img, config=""):
+        return {"text": ["", "SUB", "TOTAL", "2,400.00", "TOTAL:", "1,250.00"],
+                "left": [0, 10, 40, 300, 10, 300], "top": [0, 41, 40, 40, 60, 60],
+                "width": [0, 25, 45, 60, 50, 60], "height": [0, 9, 10, 10, 10, 10],
+                "conf": [-1, 90, 90, 90, 90, 90]}
+
+    def image_to_string(self, img, config=""):
+        if img.size == (400, 100):
+            return "SUB TOTAL 2,400.00\nTOTAL: 1,250.00\n"
+        # A region crop: its shade tells which line it was cut from (see receipt())
+        return {1: "2,400.00", 2: "1,250.00"}[img.getpixel((img.width // 2, img.height // 2))]
+
+
+def receipt():
+    """Blank 400x100 image with each line's band shaded with its line number"""
+    img = Image.new("L", (400, 100), 255)
+    img.paste(1, (0, 35, 400, 55))
+    img.paste(2, (0, 55, 400, 75))
+    return img
+
+
+class Pool:
+    def __init__(self, engine):
+        self._engine = engine
+
+    @contextmanager
+    def engine(self):
+        yield self._engine
+
+
+class SplitSubtotalTest(unittest.TestCase):
+    def read(self, mode):
+        with mock.patch.object(ocr, "get_engine_pool", return_value=Pool(ReceiptEngine())):
+            return extract_total_amounts(ocr.run_ocr(receipt(), stages=(), mode=mode))
+
+    def test_split_subtotal_is_skipped_in_roi_mode(self):
+        self.assertEqual(self.read("roi"), [1250.0])
+
+    def test_full_mode_agrees(self):
+        self.assertEqual(self.read("full"), [1250.0])
+
+    def test_sub_on_another_line_does_not_hide_a_total(self):
+        data = ReceiptEngine().image_to_data(None)
+        data["top"][1] = 20
+        engine = mock.Mock(image_to_data=mock.Mock(return_value=data))
+        self.assertEqual(len(find_total_regions(Image.new("L", (400, 100), 255), engine)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engines import TesserocrEngine, parse_config
+
+
+class FakeTessAPI:
+    """Just the PyTessBaseAPI calls TesserocrEngine._configured makes"""
+
+    def __init__(self):
+        self.variables = {"tessedit_char_whitelist": "", "preserve_interword_spaces": "0"}
+        self.psm = 3
+
+    def GetVariableAsString(self, name):
+        return self.variables.get(name)
+
+    def SetVariable(self, name, value):
+        if name not in self.variables:
+            return False
+        self.variables[name] = value
+        return True
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def SetImage(self, img):
+        pass
+
+    def Clear(self):
+        pass
+
+
+class TesserocrConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = object.__new__(TesserocrEngine)
+        self.engine.api = FakeTessAPI()
+        self.engine.default_psm = 3
+
+    def test_parse_config(self):
+        self.assertEqual(parse_config("--psm 6 -c tessedit_char_whitelist=0123456789.,"),
+                         (6, {"tessedit_char_whitelist": "0123456789.,"}))
+
+    def test_variables_are_restored(self):
+        api = self.engine.api
+        before = dict(api.variables)
+        config = "--psm 7 -c preserve_interword_spaces=1 -c tessedit_char_whitelist=0123456789 -c no_such_var=1"
+        with self.engine._configured(None, config):
+            self.assertEqual(api.variables["preserve_interword_spaces"], "1")
+            self.assertEqual(api.psm, 7)
+        self.assertEqual(api.variables, before)
+
+    def test_variables_are_restored_after_an_error(self):
+        api = self.engine.api
+        with self.assertRaises(RuntimeError):
+            with self.engine._configured(None, "-c preserve_interword_spaces=1"):
+                raise RuntimeError("recognition failed")
+        self.assertEqual(api.variables["preserve_interword_spaces"], "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_dispatch import VoiceDispatcher
+
+
+class VoiceDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.wakes = 0
+        self.dispatcher = VoiceDispatcher(self.wake, max_pending=3)
+
+    def wake(self):
+        self.wakes += 1
+
+    def commands(self):
+        return [command for command, _ in self.dispatcher.drain()]
+
+    def test_repeated_expense_is_kept(self):
+        self.assertTrue(self.dispatcher.post("add 200 for food", 1.0))
+        self.assertTrue(self.dispatcher.post("add 200 for food", 2.0))
+        self.assertEqual(self.commands(), ["add 200 for food", "add 200 for food"])
+        self.assertEqual(self.wakes, 1)
+
+    def test_repeated_navigation_is_coalesced(self):
+        self.dispatcher.post("show summary", 1.0, mutating=False)
+        self.assertFalse(self.dispatcher.post("show summary", 2.0, mutating=False))
+        self.assertEqual(self.commands(), ["show summary"])
+        self.assertEqual(self.dispatcher.stats()["coalesced"], 1)
+
+    def test_full_queue_drops_navigation_not_expenses(self):
+        self.dispatcher.post("add 1 for food", 1.0)
+        self.dispatcher.post("show summary", 2.0, mutating=False)
+        self.dispatcher.post("add 2 for food", 3.0)
+        self.assertTrue(self.dispatcher.post("add 3 for food", 4.0))
+        self.assertTrue(self.dispatcher.post("add 4 for food", 5.0))
+        self.assertFalse(self.dispatcher.post("show dashboard", 6.0, mutating=False))
+        self.assertEqual(self.commands(), ["add 1 for food", "add 2 for food", "add 3 for food", "add 4 for food"])
+        self.assertEqual(self.dispatcher.stats()["dropped"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
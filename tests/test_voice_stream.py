@@ -0,0 +1,151 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_stream import END_SILENCE_MS, StreamingListener, VoiceActivityDetector, frame_energy
+
+RATE = 16000
+
+# (kind, seconds): two utterances separated by a second of room noise
+SCRIPT = [("quiet", 1.0), ("speech", 1.0), ("quiet", 1.0), ("speech", 0.6), ("quiet", 1.0)]
+SPEECH = [(1.0, 2.0), (3.0, 3.6)]  # where the speech in SCRIPT starts and stops
+
+
+def recording(script=SCRIPT, seed=0):
+    """16-bit-scale samples: low noise, with a loud 220 Hz tone for the speech"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for kind, seconds in script:
+        t = np.arange(int(RATE * seconds)) / RATE
+        part = rng.normal(0, 60, t.size)
+        if kind == "speech":
+            part += 6000 * np.sin(2 * np.pi * 220 * t)
+        parts.append(part)
+    return np.concatenate(parts).astype(np.int32)
+
+
+def pcm(samples, sample_width):
+    """Little-endian PCM bytes of 16-bit-scale samples at 16 or 24 bits"""
+    if sample_width == 2:
+        return samples.astype("<i2").tobytes()
+    wide = (samples * 256).astype("<i4").view(np.uint8).reshape(-1, 4)
+    return wide[:, :3].tobytes()
+
+
+class FrameEnergyTest(unittest.TestCase):
+    def test_same_energy_at_every_width(self):
+        samples = recording([("speech", 0.03)])
+        expected = frame_energy(pcm(samples, 2), 2)
+        self.assertAlmostEqual(frame_energy(pcm(samples, 3), 3), expected, places=6)
+        self.assertAlmostEqual(frame_energy((samples * 65536).astype("<i4").tobytes(), 4), expected, places=6)
+
+    def test_negative_24_bit_samples(self):
+        frame = pcm(np.array([-1000, -1000, 1000, 1000]), 3)
+        self.assertAlmostEqual(frame_energy(frame, 3), 1000.0)
+
+
+class VoiceActivityDetectorTest(unittest.TestCase):
+    def events(self, sample_width):
+        vad = VoiceActivityDetector(RATE, sample_width)
+        data = pcm(recording(), sample_width)
+        events = []
+        for offset in range(0, len(data) - vad.frame_bytes + 1, vad.frame_bytes):
+            event = vad.push(data[offset:offset + vad.frame_bytes])
+            if event:
+                events.append((event[0], vad.time, event[1]))
+        return events
+
+    def check(self, sample_width):
+        events = self.events(sample_width)
+        self.assertEqual([kind for kind, _, _ in events], ["start", "end"] * len(SPEECH))
+        for (onset, offset), (_, started_at, utterance), (_, ended_at, _) in zip(SPEECH, events[::2], events[1::2]):
+            # Speech is noticed within a few frames and the pre-roll reaches back before it began
+            self.assertGreater(started_at, onset)
+            self.assertLess(started_at, onset + 0.15)
+            self.assertLess(utterance.start, onset)
+            self.assertAlmostEqual(utterance.speech_end, offset, delta=0.06)
+            # ... and closed after END_SILENCE_MS of quiet
+            self.assertAlmostEqual(ended_at, utterance.speech_end + END_SILENCE_MS / 1000, delta=0.06)
+            self.assertAlmostEqual(len(utterance.audio) / sample_width / RATE, utterance.end - utterance.start,
+                                   delta=0.001)
+
+    def test_16_bit(self):
+        self.check(2)
+
+    def test_24_bit(self):
+        self.check(3)
+
+
+class RecordingDecoder:
+    def __init__(self, sample_width):
+        self.sample_width = sample_width
+        self.audio = b""
+
+    def accept(self, chunk):
+        self.audio += chunk
+
+    def partial(self):
+        return ""
+
+    def finish(self):
+        return f"{len(self.audio) // self.sample_width} samples"
+
+
+class RecordingBackend:
+    def stream(self, sample_rate, sample_width):
+        return RecordingDecoder(sample_width)
+
+
+class FlakyBackend(RecordingBackend):
+    """Fails to recognise the first utterance, as an online recogniser does on a network blip"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, sample_rate, sample_width):
+        decoder = RecordingDecoder(sample_width)
+        self.calls += 1
+        if self.calls == 1:
+            def finish():
+                raise ConnectionError("recognition service unreachable")
+            decoder.finish = finish
+        return decoder
+
+
+class StreamingListenerTest(unittest.TestCase):
+    def test_each_utterance_is_decoded_once_whatever_the_chunk_size(self):
+        for sample_width in (2, 3):
+            finals = []
+            listener = StreamingListener(RecordingBackend(), RATE, sample_width,
+                                         lambda text, utterance, heard_at: finals.append((text, utterance)))
+            data = pcm(recording(), sample_width)
+            for offset in range(0, len(data), 1000 * sample_width + 1):
+                listener.feed(data[offset:offset + 1000 * sample_width + 1])
+            listener.flush()
+            with self.subTest(sample_width=sample_width):
+                self.assertEqual(len(finals), len(SPEECH))
+                for text, utterance in finals:
+                    # The decoder saw exactly the utterance's audio, pre-roll included
+                    self.assertEqual(text, f"{len(utterance.audio) // sample_width} samples")
+
+    def test_a_failed_utterance_does_not_stop_the_stream(self):
+        finals, errors = [], []
+        listener = StreamingListener(FlakyBackend(), RATE, 2, lambda text, utterance, heard_at: finals.append(text),
+                                     on_error=lambda error, utterance: errors.append(str(error)))
+        listener.feed(pcm(recording(), 2))
+        listener.flush()
+        self.assertEqual(errors, ["recognition service unreachable"])
+        self.assertEqual(len(finals), 1)
+
+    def test_failure_is_raised_without_on_error(self):
+        listener = StreamingListener(FlakyBackend(), RATE, 2, lambda text, utterance, heard_at: None)
+        with self.assertRaises(ConnectionError):
+            listener.feed(pcm(recording(), 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import numpy as np
+from matplotlib import cm
+from matplotlib.figure import Figure
+
+
+def month_label(month_index):
+    year, month = divmod(int(month_index), 12)
+    return f"{year}-{month + 1:02d}"
+
+
+def expense_arrays(rows, id_names, categories=None):
+    """Turn (month_index, category_id, amount) rows into NumPy columns (a month and category may repeat)
+
+    id_names maps category ids to names. Returns (month_indices,
+    category_codes, amounts, category_names); codes index into
+    category_names, which follows `categories` (unknown names appended).
+    """
+    category_names = list(categories or [])
+    order = {name: i for i, name in enumerate(category_names)}
+    for name in sorted(set(id_names.values()) - set(order)):
+        order[name] = len(category_names)
+        category_names.append(name)
+
+    if not rows:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64), category_names)
+
+    columns = np.array(rows, dtype=np.float64)
+    months = columns[:, 0].astype(np.int64)
+    ids = columns[:, 1].astype(np.int64)
+
+    # Small lookup table from ledger category id to display order
+    remap = np.zeros(max(id_names) + 1, dtype=np.int64)
+    for category_id, name in id_names.items():
+        remap[category_id] = order[name]
+    return months, remap[ids], columns[:, 2], category_names
+
+
+def monthly_matrix(months, codes, amounts, n_categories):
+    """Sum amounts into a (n_months x n_categories) matrix covering every month in range
+
+    Returns (month_indices, matrix). Uses one bincount over the flattened
+    (month, category) index instead of a Python loop.
+    """
+    if months.size == 0:
+        return np.empty(0, dtype=np.int64), np.zeros((0, n_categories))
+    first = months.min()
+    n_months = int(months.max() - first + 1)
+    flat = (months - first) * n_categories + codes
+    matrix = np.bincount(flat, weights=amounts, minlength=n_months * n_categories)
+    return np.arange(first, first + n_months), matrix.reshape(n_months, n_categories)
+
+
+def rolling_mean(values, window):
+    """Trailing rolling mean; the first window-1 points average what is available"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0 or window <= 1:
+        return values.copy()
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, values.size + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+
+class MonthlyTrendChart:
+    """Stacked month x category bars with a rolling average of the monthly total"""
+
+    def __init__(self, figsize=(10, 6)):
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot(111)
+
+    def update(self, rows, id_names, categories, window=3):
+        """Redraw from (month_index, category_id, amount) rows, e.g. Ledger.load_month_columns()"""
+        months, codes, amounts, names = expense_arrays(rows, id_names, categories)
+        month_indices, matrix = monthly_matrix(months, codes, amounts, len(names))
+
+        self.ax.clear()
+        if month_indices.size == 0:
+            self.ax.text(0.5, 0.5, "No dated expenses yet", ha='center', va='center', transform=self.ax.transAxes)
+            self.ax.set_axis_off()
+            return
+
+        self.ax.set_axis_on()
+        x = np.arange(month_indices.size)
+        bottoms = np.zeros(month_indices.size)
+        colors = cm.tab20c(range(len(names)))
+        used = matrix.sum(axis=0) > 0
+        for i in np.flatnonzero(used):
+            self.ax.bar(x, matrix[:, i], bottom=bottoms, color=colors[i], label=names[i],
+                        edgecolor='white', linewidth=0.5)
+            bottoms += matrix[:, i]
+
+        monthly_totals = matrix.sum(axis=1)
+        self.ax.plot(x, rolling_mean(monthly_totals, window), color='#2c3e50', linewidth=2,
+                     marker='o', markersize=3, label=f"{window}-month average")
+
+        # Label at most ~24 ticks so multi-year histories stay readable
+        step = max(1, month_indices.size // 24)
+        self.ax.set_xticks(x[::step])
+        self.ax.set_xticklabels([month_label(m) for m in month_indices[::step]], rotation=45, ha='right')
+        self.ax.set_ylabel("Amount (₹)")
+        self.ax.set_title('Monthly Expenditure by Category', pad=15, fontweight='bold')
+        self.ax.legend(fontsize=7, loc='upper left', ncol=2)
+        self.figure.tight_layout()
+
+    def close(self):
+        self.figure.clear()
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+
+# Pending commands kept while the UI is busy; beyond this the oldest command
+# that changes nothing is dropped (commands that record expenses never are)
+MAX_PENDING = 8
+
+# Recent end-of-speech -> action latencies kept for the percentiles
+LATENCY_WINDOW = 200
+
+
+class VoiceDispatcher:
+    """Hands recognised commands from the listener thread to the UI thread
+
+    post() never blocks the listener. Only commands posted as not mutating
+    (opening a chart or report) may be lost: one identical to the
+    non-mutating command still waiting at the back is coalesced, and when
+    the queue is full the oldest of them is dropped to make room. Mutating
+    commands (adding expenses) are always kept, even past max_pending, since
+    saying "add 200 for food" twice means two expenses. notify() is called
+    only when the queue goes from empty to non-empty, so a burst of commands
+    wakes the UI once instead of the UI polling on a timer.
+    """
+
+    def __init__(self, notify, max_pending=MAX_PENDING):
+        self.notify = notify
+        self.max_pending = max_pending
+        self._pending = deque()  # (command, heard_at, mutating)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.handled = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def post(self, command, heard_at=None, mutating=True):
+        """Queue a command heard at heard_at (perf_counter at end of speech); thread-safe
+
+        Returns False if the command was coalesced or dropped, which only
+        happens when mutating is false.
+        """
+        heard_at = time.perf_counter() if heard_at is None else heard_at
+        with self._lock:
+            if not mutating and self._pending:
+                last, _, last_mutating = self._pending[-1]
+                if last == command and not last_mutating:
+                    self.coalesced += 1
+                    return False
+            if len(self._pending) >= self.max_pending and not self._drop_one(mutating):
+                self.dropped += 1
+                return False
+            wake = not self._pending
+            self._pending.append((command, heard_at, mutating))
+        if wake:
+            self.notify()
+        return True
+
+    def _drop_one(self, mutating):
+        """Make room for a new command by dropping the oldest non-mutating one; False if it can't"""
+        for i, (_, _, pending_mutating) in enumerate(self._pending):
+            if not pending_mutating:
+                del self._pending[i]
+                self.dropped += 1
+                return True
+        # Only expenses are waiting: an expense goes in anyway, a non-mutating command doesn't
+        return mutating
+
+    def drain(self):
+        """Take every pending (command, heard_at) pair; call on the UI thread"""
+        with self._lock:
+            pending = [(command, heard_at) for command, heard_at, _ in self._pending]
+            self._pending.clear()
+        return pending
+
+    def record_latency(self, heard_at):
+        """Note that the command heard at heard_at has now been acted on"""
+        latency = time.perf_counter() - heard_at
+        with self._lock:
+            self._latencies.append(latency)
+            self.handled += 1
+        return latency
+
+    def stats(self):
+        """{"handled", "dropped", "coalesced", "last_ms", "p50_ms", "p95_ms"} (latencies None until measured)"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            last = self._latencies[-1] if self._latencies else None
+            stats = {"handled": self.handled, "dropped": self.dropped, "coalesced": self.coalesced,
+                     "last_ms": None, "p50_ms": None, "p95_ms": None}
+        if latencies:
+            stats["last_ms"] = last * 1000
+            stats["p50_ms"] = latencies[len(latencies) // 2] * 1000
+            stats["p95_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        return stats
@@ -0,0 +1,103 @@
+import json
+import re
+
+# Non-expense voice commands, matched as phrases
+COMMAND_PHRASES = (
+    "show pie chart", "show summary", "show report", "show dashboard", "ceo dashboard", "help",
+)
+
+# Words that may appear in "add <amount> [rupees] for <category> [and ...]"
+ADD_WORDS = ("add", "for", "rupees", "rupee", "point", "and")
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70,
+    "eighty": 80, "ninety": 90,
+}
+SCALES = {"hundred": 100, "thousand": 1000, "lakh": 100000, "lakhs": 100000, "million": 1000000,
+          "crore": 10000000, "crores": 10000000}
+NUMBER_WORDS = tuple(UNITS) + tuple(TENS) + tuple(SCALES)
+
+# Other ways people say a category (lower case)
+CATEGORY_SYNONYMS = {
+    "Food": ("groceries", "grocery", "lunch", "dinner", "breakfast", "meals", "snacks"),
+    "Health": ("medical", "medicine", "doctor", "pharmacy", "hospital"),
+    "Monthly Bills": ("bills", "bill", "rent", "phone bill", "internet"),
+    "EMI": ("loan", "installment", "instalment"),
+    "Shopping": ("clothes", "purchase"),
+    "Entertainment": ("movies", "movie", "party"),
+    "Education": ("training", "course", "courses", "books", "tuition"),
+    "Insurance": ("premium", "policy"),
+    "Travel": ("taxi", "cab", "flight", "flights", "train", "hotel", "fuel", "petrol"),
+    "Office Supplies": ("stationery", "supplies", "office"),
+    "Utilities": ("electricity", "water", "gas", "power"),
+    "Maintenance": ("repairs", "repair", "cleaning"),
+    "Marketing": ("ads", "advertising", "promotion"),
+    "Software": ("subscription", "subscriptions", "license", "licence", "cloud"),
+    "Hardware": ("laptop", "laptops", "computer", "computers", "printer"),
+}
+
+
+def category_phrases(categories, synonyms=None):
+    """Return {spoken phrase: category} for the names and synonyms of the given categories"""
+    synonyms = CATEGORY_SYNONYMS if synonyms is None else synonyms
+    phrases = {}
+    for category in categories:
+        for phrase in synonyms.get(category, ()):
+            phrases.setdefault(phrase, category)
+    # Real names win over another category's synonym
+    for category in categories:
+        phrases[category.lower()] = category
+    return phrases
+
+
+def vocabulary(categories):
+    """Every word an offline recogniser needs to know for the command set"""
+    words = set(ADD_WORDS) | set(NUMBER_WORDS)
+    for phrase in COMMAND_PHRASES + tuple(category_phrases(categories)):
+        words.update(phrase.split())
+    return sorted(words)
+
+
+def vosk_grammar(categories):
+    """Phrase list for a Vosk recogniser restricted to the command set (JSON)"""
+    phrases = list(COMMAND_PHRASES) + list(ADD_WORDS) + list(NUMBER_WORDS)
+    phrases += [f"for {name}" for name in category_phrases(categories)]
+    phrases.append("[unk]")
+    return json.dumps(phrases)
+
+
+def jsgf_grammar(categories):
+    """JSGF grammar for pocketsphinx accepting exactly the supported commands"""
+    categories = " | ".join(re.sub(r"[^a-z ]", "", name) for name in category_phrases(categories))
+    commands = " | ".join(COMMAND_PHRASES)
+    return (
+        "#JSGF V1.0;\n"
+        "grammar expenses;\n"
+        f"public <command> = add <item> (and [add] <item>)* | {commands};\n"
+        "<item> = <amount> [rupees | rupee] for <category>;\n"
+        "<amount> = <number>+ [point <number>+];\n"
+        f"<number> = {' | '.join(NUMBER_WORDS)};\n"
+        f"<category> = {categories};\n"
+    )
+
+
+def words_to_number(words):
+    """Value of a run of number words, e.g. ["two", "thousand", "five", "hundred"] -> 2500"""
+    total = current = 0
+    for word in words:
+        if word in UNITS:
+            current += UNITS[word]
+        elif word in TENS:
+            current += TENS[word]
+        elif word == "hundred":
+            current = (current or 1) * 100
+        else:
+            scale = SCALES[word]
+            total += (current or 1) * scale
+            current = 0
+    return total + current
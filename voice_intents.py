@@ -0,0 +1,165 @@
+import re
+from voice_grammar import UNITS, TENS, SCALES, category_phrases, words_to_number
+
+# Command phrase -> action the UI performs
+COMMAND_ACTIONS = {
+    "show pie chart": "pie_chart",
+    "show summary": "summary",
+    "show report": "summary",
+    "show dashboard": "dashboard",
+    "ceo dashboard": "dashboard",
+    "help": "help",
+}
+
+# Words skipped between an amount and its category ("add 500 rupees for food")
+FILLER_WORDS = frozenset(("rupees", "rupee", "rs", "inr", "for", "to", "on", "in", "of", "the", "towards"))
+
+# Shortest spoken prefix accepted for a category's first word ("ent" -> Entertainment)
+MIN_PREFIX = 3
+
+TOKEN_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?|[a-z]+")
+_END = None  # trie key marking a complete phrase
+
+
+def _insert(trie, words, value):
+    node = trie
+    for word in words:
+        node = node.setdefault(word, {})
+    node.setdefault(_END, value)
+
+
+class IntentParser:
+    """Turns a transcript into ("add", category, amount), ("command", action) and ("error", message) intents
+
+    Category names, synonyms and command phrases are compiled into one word
+    trie up front, so a transcript is parsed in a single left-to-right pass
+    with longest-match lookups; no per-category scanning.
+    """
+
+    def __init__(self, categories, synonyms=None):
+        self.categories = trie = {}
+        for phrase, category in category_phrases(categories, synonyms).items():
+            words = phrase.split()
+            _insert(trie, words, category)
+            # Accept the other grammatical number too ("bill"/"bills")
+            last = words[-1]
+            variant = last[:-1] if last.endswith("s") and len(last) > 3 else last + "s"
+            _insert(trie, words[:-1] + [variant], category)
+
+        self.commands = {}
+        for phrase, action in COMMAND_ACTIONS.items():
+            _insert(self.commands, phrase.split(), action)
+
+        # Unique prefixes of each category's first word, for clipped or partial words
+        owners = {}
+        for category in categories:
+            first = category.lower().split()[0]
+            for end in range(MIN_PREFIX, len(first) + 1):
+                owners.setdefault(first[:end], set()).add(category)
+        self.prefixes = {prefix: cats.pop() for prefix, cats in owners.items() if len(cats) == 1}
+
+    @staticmethod
+    def _match(trie, tokens, i):
+        """Longest phrase in trie starting at tokens[i]: (value, next_index) or (None, i)"""
+        node, found, end = trie, None, i
+        for j in range(i, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if _END in node:
+                found, end = node[_END], j + 1
+        return found, end
+
+    @staticmethod
+    def _amount(tokens, i):
+        """Read "1,250.50", "2 thousand" or "two thousand five hundred point five": (amount, next_index)"""
+        n = len(tokens)
+        if i < n and tokens[i][0].isdigit():
+            value = float(tokens[i].replace(",", ""))
+            i += 1
+            while i < n and tokens[i] in SCALES:
+                value *= SCALES[tokens[i]]
+                i += 1
+            return value, i
+
+        start = i
+        while i < n:
+            if tokens[i] in UNITS or tokens[i] in TENS or tokens[i] in SCALES:
+                i += 1
+            # "one hundred and five": "and" inside a number, not between two items
+            elif (tokens[i] == "and" and i > start and tokens[i - 1] in SCALES
+                  and i + 1 < n and (tokens[i + 1] in UNITS or tokens[i + 1] in TENS)):
+                i += 1
+            else:
+                break
+        if i == start:
+            return None, start
+        value = float(words_to_number([word for word in tokens[start:i] if word != "and"]))
+        # Decimals are spoken digit by digit: "point two five" -> .25
+        if i + 1 < n and tokens[i] == "point" and UNITS.get(tokens[i + 1], 10) < 10:
+            i += 1
+            digits = ""
+            while i < n and UNITS.get(tokens[i], 10) < 10:
+                digits += str(UNITS[tokens[i]])
+                i += 1
+            value += float("0." + digits)
+        return value, i
+
+    def _category(self, tokens, i):
+        category, end = self._match(self.categories, tokens, i)
+        if category is None and i < len(tokens):
+            category = self.prefixes.get(tokens[i])
+            end = i + 1 if category else i
+        return category, end
+
+    def parse(self, text):
+        """Return the list of intents in a transcript, in spoken order"""
+        tokens = TOKEN_PATTERN.findall(text.lower().replace("₹", " "))
+        intents = []
+        adding = False
+        heard_items = True  # whether the last "add" was followed by at least one item
+        i, n = 0, len(tokens)
+        while i < n:
+            action, end = self._match(self.commands, tokens, i)
+            if action is not None:
+                if not heard_items:
+                    intents.append(("error", "No amount given"))
+                intents.append(("command", action))
+                adding, heard_items = False, True
+                i = end
+                continue
+
+            token = tokens[i]
+            if token == "add":
+                if not heard_items:
+                    intents.append(("error", "No amount given"))
+                adding, heard_items = True, False
+                i += 1
+                continue
+            if not adding:
+                i += 1
+                continue
+
+            amount, end = self._amount(tokens, i)
+            if amount is None:
+                # "and" between items, or noise inside an add command
+                i += 1
+                continue
+            i = end
+            heard_items = True
+            while i < n and tokens[i] in FILLER_WORDS:
+                i += 1
+            category, end = self._category(tokens, i)
+            if category is None:
+                heard = tokens[i] if i < n else ""
+                intents.append(("error", f"Category '{heard}' not found" if heard else "No category given"))
+                i += 1
+            elif amount <= 0:
+                intents.append(("error", f"Amount for {category} must be positive"))
+                i = end
+            else:
+                intents.append(("add", category, amount))
+                i = end
+        if not heard_items:
+            intents.append(("error", "No amount given"))
+        return intents
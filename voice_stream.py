@@ -0,0 +1,264 @@
+import time
+from collections import deque
+import numpy as np
+
+# Audio is analysed in frames of this length
+FRAME_MS = 30
+
+# Speech starts after this many consecutive loud frames; the frames just
+# before it are kept so the first syllable isn't clipped
+START_FRAMES = 3
+PREROLL_MS = 300
+
+# An utterance ends after this much silence (speech_recognition waits 0.8 s)
+END_SILENCE_MS = 500
+MAX_UTTERANCE_S = 8
+
+# A frame is speech when its energy is SPEECH_RATIO times the noise floor;
+# it must drop below END_RATIO times the floor to count as silence again
+SPEECH_RATIO = 3.0
+END_RATIO = 2.0
+MIN_ENERGY = 150  # 16-bit RMS; keeps a near-silent room from triggering on breathing
+
+# The noise floor is measured over the first CALIBRATION_MS of audio, then
+# re-estimated from the last NOISE_WINDOW_S of silence every RECALIBRATE_S
+CALIBRATION_MS = 250
+NOISE_WINDOW_S = 3
+RECALIBRATE_S = 5
+
+# Partial transcripts are requested at most this often while someone is talking
+PARTIAL_INTERVAL_MS = 300
+
+
+def frame_energy(frame, sample_width):
+    """RMS of a little-endian PCM frame, on the 16-bit scale whatever the sample width"""
+    if sample_width == 1:
+        samples = np.frombuffer(frame, dtype=np.uint8).astype(np.float64) - 128
+    elif sample_width == 3:
+        # No 24-bit dtype: assemble each 3-byte sample into an int32 and sign-extend it
+        raw = np.frombuffer(frame, dtype=np.uint8)[:len(frame) // 3 * 3].reshape(-1, 3).astype(np.int32)
+        samples = (raw[:, 0] | raw[:, 1] << 8 | raw[:, 2] << 16).astype(np.float64)
+        samples[samples >= 1 << 23] -= 1 << 24
+    else:
+        samples = np.frombuffer(frame, dtype=f"<i{sample_width}").astype(np.float64)
+    if not samples.size:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples))) * 2.0 ** (16 - 8 * sample_width)
+
+
+class Utterance:
+    """One stretch of speech: raw audio plus its position in the stream (seconds)"""
+
+    def __init__(self, start):
+        self.start = start
+        self.speech_end = start
+        self.end = start
+        self.frames = []
+        self.energies = []
+
+    @property
+    def audio(self):
+        return b"".join(self.frames)
+
+
+class VoiceActivityDetector:
+    """Energy-based VAD that cuts a PCM stream into utterances as it arrives
+
+    push() takes one frame and returns ("start", utterance) when speech
+    begins, ("end", utterance) when it is over and None otherwise. The noise
+    floor adapts: it is calibrated on the first quarter second and re-estimated
+    from recent silence every few seconds, and "speech" with no quiet gap for
+    NOISE_WINDOW_S (a fan or traffic that just got louder) resets it.
+    """
+
+    def __init__(self, sample_rate, sample_width, end_silence_ms=END_SILENCE_MS):
+        self.sample_width = sample_width
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self.frame_bytes = self.frame_samples * sample_width
+        self.frame_seconds = self.frame_samples / sample_rate
+        self.end_frames = max(1, end_silence_ms // FRAME_MS)
+        self.max_frames = MAX_UTTERANCE_S * 1000 // FRAME_MS
+        self.calibration_frames = max(1, CALIBRATION_MS // FRAME_MS)
+        self.recalibrate_frames = RECALIBRATE_S * 1000 // FRAME_MS
+
+        self.noise_floor = None
+        self.noise = deque(maxlen=NOISE_WINDOW_S * 1000 // FRAME_MS)
+        self.preroll = deque(maxlen=PREROLL_MS // FRAME_MS)
+        self.position = 0  # frames seen
+        self.since_calibration = 0
+        self.loud = 0
+        self.quiet = 0
+        self.utterance = None
+
+    @property
+    def time(self):
+        """Seconds of audio seen so far"""
+        return self.position * self.frame_seconds
+
+    def calibrate(self, energies):
+        self.noise_floor = float(np.median(energies))
+        self.since_calibration = 0
+
+    def push(self, frame):
+        energy = frame_energy(frame, self.sample_width)
+        self.position += 1
+        if self.noise_floor is None:
+            self.noise.append(energy)
+            self.preroll.append((frame, energy))
+            if len(self.noise) >= self.calibration_frames:
+                self.calibrate(self.noise)
+            return None
+
+        floor = max(self.noise_floor, MIN_ENERGY / SPEECH_RATIO)
+        if self.utterance is None:
+            self.preroll.append((frame, energy))
+            if energy > floor * SPEECH_RATIO:
+                self.loud += 1
+                if self.loud >= START_FRAMES:
+                    return self._start()
+                return None
+            self.loud = 0
+            self.noise.append(energy)
+            self.since_calibration += 1
+            if self.since_calibration >= self.recalibrate_frames:
+                self.calibrate(self.noise)
+            return None
+
+        utterance = self.utterance
+        utterance.frames.append(frame)
+        utterance.energies.append(energy)
+        utterance.end = self.time
+        if energy > floor * END_RATIO:
+            self.quiet = 0
+            utterance.speech_end = self.time
+        else:
+            self.quiet += 1
+        if self.quiet >= self.end_frames or len(utterance.frames) >= self.max_frames:
+            return self._end()
+        if len(utterance.frames) >= self.noise.maxlen and len(utterance.frames) % self.calibration_frames == 0:
+            # Speech has gaps between words; seconds without one means the background got louder
+            low = float(np.percentile(utterance.energies[-self.noise.maxlen:], 10))
+            if low > floor * SPEECH_RATIO:
+                self.noise_floor = low
+                self.noise.clear()
+                self.since_calibration = 0
+                return self._end()
+        return None
+
+    def _start(self):
+        frames = list(self.preroll)
+        self.preroll.clear()
+        utterance = Utterance(self.time - len(frames) * self.frame_seconds)
+        utterance.frames = [frame for frame, _ in frames]
+        utterance.energies = [energy for _, energy in frames]
+        utterance.speech_end = utterance.end = self.time
+        self.utterance = utterance
+        self.loud = self.quiet = 0
+        return ("start", utterance)
+
+    def _end(self):
+        utterance, self.utterance = self.utterance, None
+        self.quiet = 0
+        return ("end", utterance)
+
+    def flush(self):
+        """End of input: close the utterance in progress, if any"""
+        return self._end() if self.utterance is not None else None
+
+
+class StreamingListener:
+    """Feeds audio through the VAD and the backend's decoder as it arrives
+
+    on_partial(text) is called with the transcript so far while someone is
+    speaking (for backends that decode incrementally) and
+    on_final(text, utterance, heard_at) once per utterance, heard_at being the
+    perf_counter time at which the speaker stopped talking. If on_error is
+    given, an utterance the backend fails to recognise (e.g. a network error
+    from an online recogniser) is passed to on_error(error, utterance)
+    instead of on_final and listening carries on; otherwise the error is
+    raised.
+    """
+
+    def __init__(self, backend, sample_rate, sample_width, on_final, on_partial=None,
+                 end_silence_ms=END_SILENCE_MS, on_error=None):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.on_final = on_final
+        self.on_partial = on_partial
+        self.on_error = on_error
+        self.vad = VoiceActivityDetector(sample_rate, sample_width, end_silence_ms)
+        self.partial_frames = max(1, PARTIAL_INTERVAL_MS // FRAME_MS)
+        self._buffer = b""
+        self._decoder = None
+        self._partial = ""
+
+    @property
+    def frame_samples(self):
+        return self.vad.frame_samples
+
+    def feed(self, chunk):
+        """Process any amount of PCM audio"""
+        data = self._buffer + chunk
+        size = self.vad.frame_bytes
+        end = len(data) - len(data) % size
+        for offset in range(0, end, size):
+            self._push(data[offset:offset + size])
+        self._buffer = data[end:]
+
+    def flush(self):
+        """End of input: decode whatever utterance is still open"""
+        event = self.vad.flush()
+        if event:
+            self._finish(event[1])
+
+    def _push(self, frame):
+        event = self.vad.push(frame)
+        if event is None:
+            if self._decoder is not None:
+                self._decoder.accept(frame)
+                if self.on_partial and len(self.vad.utterance.frames) % self.partial_frames == 0:
+                    self._report_partial()
+        elif event[0] == "start":
+            self._decoder = self.backend.stream(self.sample_rate, self.sample_width)
+            self._partial = ""
+            self._decoder.accept(event[1].audio)
+        else:
+            self._decoder.accept(frame)
+            self._finish(event[1])
+
+    def _report_partial(self):
+        text = self._decoder.partial()
+        if text and text != self._partial:
+            self._partial = text
+            self.on_partial(text)
+
+    def _finish(self, utterance):
+        # The trailing silence already happened; date the speech end back to when it did
+        heard_at = time.perf_counter() - (utterance.end - utterance.speech_end)
+        decoder, self._decoder = self._decoder, None
+        try:
+            text = decoder.finish()
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            error = e
+        else:
+            error = None
+        if self.on_partial and self._partial:
+            self.on_partial("")
+        if error is not None:
+            self.on_error(error, utterance)
+        else:
+            self.on_final(text, utterance, heard_at)
+
+
+def stream_source(source, listener, keep_going=lambda: True):
+    """Read an open speech_recognition Microphone or AudioFile into the listener until
+    keep_going() is false or the file ends"""
+    while keep_going():
+        chunk = source.stream.read(listener.frame_samples)
+        if not chunk:
+            break
+        listener.feed(chunk)
+    listener.flush()